@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Compares the memory used to hold a synthetic dependency graph as a
+DependencyGraph with the per-package objects chill() used to build.
+
+Usage: python benchmarks/graph_memory.py [NODES] [FAN_OUT]
+"""
+
+import os
+import random
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pip_chill.graph import DependencyGraph  # noqa: E402
+
+
+class LegacyDistribution:
+    """
+    The Distribution class as it was before it got __slots__.
+    """
+
+    def __init__(self, name, version=None, required_by=None):
+        self.name = name
+        self.version = version
+        self.required_by = set(required_by or ())
+        self.hide_version = False
+
+
+def synthetic_edges(nodes: int, fan_out: int) -> list[tuple[str, str]]:
+    generator = random.Random(nodes)
+    names = [f"package-{index}" for index in range(nodes)]
+    return [
+        (names[index], names[generator.randrange(index + 1, nodes)])
+        for index in range(nodes - 1)
+        for _ in range(generator.randint(0, 2 * fan_out))
+    ]
+
+
+def measure(build, edges) -> tuple[int, object]:
+    tracemalloc.start()
+    result = build(edges)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+
+def build_legacy(edges):
+    distributions = {}
+    dependencies = {}
+    for source, target in edges:
+        distributions.setdefault(source, LegacyDistribution(source, "1.0"))
+        dependency = dependencies.setdefault(
+            target, LegacyDistribution(target, "1.0")
+        )
+        dependency.required_by.add(source)
+    return distributions, dependencies
+
+
+def build_graph(edges):
+    graph = DependencyGraph()
+    for source, target in edges:
+        graph.add_edge(
+            graph.add_distribution(source, "1.0"),
+            graph.add_distribution(target, "1.0"),
+        )
+    # Lay out both directions, as chill() and the queries on it do.
+    graph.required_by(0)
+    graph.requires(0)
+    return graph
+
+
+def main() -> None:
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    fan_out = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    edges = synthetic_edges(nodes, fan_out)
+    print(f"{nodes} nodes, {len(edges)} edges")
+    for label, build in (
+        ("dicts of objects", build_legacy),
+        ("DependencyGraph", build_graph),
+    ):
+        size, _ = measure(build, edges)
+        print(f"{label:>20}: {size / 2**20:8.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Times and memory-profiles chill(), the command line and --check on synthetic
+environments, writing a JSON report that can be compared with the one of
+another release.
+
+Usage:
+
+    python benchmarks/run.py --output report.json
+    python benchmarks/run.py --sizes 100,1000 --compare baseline.json
+
+Environments are generated in a temporary directory, or in --work-dir,
+where they are kept and reused by later runs with the same shape.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pip_chill  # noqa: E402
+from pip_chill import cli  # noqa: E402
+
+from synthetic import Shape, make_environment  # noqa: E402
+
+FORMAT_VERSION = 1
+DEFAULT_SIZES = (100, 1_000, 10_000, 50_000)
+
+
+def measure(function, repeat: int) -> dict[str, float | int]:
+    """
+    Returns the best and median wall time of repeat calls to function and
+    the peak memory traced during one more.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    # Tracing slows everything down, so memory is measured apart.
+    gc.collect()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "best": min(times),
+        "median": statistics.median(times),
+        "peak_memory": peak,
+    }
+
+
+def run_cli(arguments: list[str]) -> None:
+    """
+    Runs the command line with arguments, discarding its output.
+    """
+    argv = sys.argv
+    sys.argv = ["pip-chill", *arguments]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            cli.main()
+    except SystemExit as error:
+        # --check exits, with status 0 on synthetic environments, which
+        # have everything they require.
+        if error.code:
+            raise
+    finally:
+        sys.argv = argv
+
+
+def benchmark(directory: str, shape: Shape, repeat: int) -> dict:
+    """
+    Benchmarks pip-chill on an environment of the given shape, made in
+    directory unless it's already there.
+    """
+    path = os.path.join(directory, "-".join(str(value) for value in shape))
+    start = time.perf_counter()
+    environment = make_environment(path, shape)
+    generated = time.perf_counter() - start
+
+    listed = set()
+
+    def run_chill() -> None:
+        distributions, _ = pip_chill.chill(paths=[path], show_all=True)
+        listed.clear()
+        listed.update(distribution.name for distribution in distributions)
+
+    result = {
+        "shape": shape._asdict(),
+        "edges": environment.edges,
+        "generation": generated,
+        "chill": measure(run_chill, repeat),
+        "cli": measure(
+            lambda: run_cli(["--all", "--verbose", "--path", path]), repeat
+        ),
+        "check": measure(lambda: run_cli(["--check", "--path", path]), repeat),
+    }
+    if listed != environment.top_level:
+        raise AssertionError(
+            f"chill() listed {len(listed)} packages instead of the "
+            f"{len(environment.top_level)} expected on {path}"
+        )
+    return result
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> bool:
+    """
+    Prints how report compares to baseline, on environments of the same
+    shape, and returns whether any measurement got worse by more than
+    threshold times.
+    """
+    previous = {
+        tuple(result["shape"].values()): result
+        for result in baseline["results"]
+    }
+    regressed = False
+    for result in report["results"]:
+        packages = result["shape"]["packages"]
+        shape = tuple(result["shape"].values())
+        if shape not in previous:
+            continue
+        for target in ("chill", "cli", "check"):
+            # Reports made before a target was measured don't have it.
+            if target not in previous[shape]:
+                continue
+            for measurement in ("best", "peak_memory"):
+                before = previous[shape][target][measurement]
+                after = result[target][measurement]
+                ratio = after / before if before else 1.0
+                flag = ""
+                if ratio > threshold:
+                    flag = "  REGRESSION"
+                    regressed = True
+                print(
+                    f"{packages:>7} {target:>5} {measurement:>11}: "
+                    f"{ratio:6.2f}x{flag}"
+                )
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="comma separated numbers of packages (default: %(default)s).",
+    )
+    for field, kind, help in (
+        ("fan_out", int, "average number of requirements per package."),
+        ("depth", int, "length of dependency chains."),
+        ("cycles", float, "fraction of packages in a dependency cycle."),
+        ("extras", float, "fraction of packages with an extra."),
+        ("huge", float, "fraction of packages with a huge METADATA."),
+        ("metadata_size", int, "size of a huge METADATA, in bytes."),
+    ):
+        parser.add_argument(
+            "--" + field.replace("_", "-"),
+            type=kind,
+            default=Shape._field_defaults[field],
+            help=help + " (default: %(default)s)",
+        )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--work-dir", help="keep environments in this directory."
+    )
+    parser.add_argument("--output", help="write the JSON report here.")
+    parser.add_argument("--compare", help="compare with this JSON report.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="ratio above which --compare reports a regression.",
+    )
+    args = parser.parse_args()
+
+    directory = args.work_dir or tempfile.mkdtemp(prefix="pip-chill-bench-")
+    report = {
+        "format_version": FORMAT_VERSION,
+        "pip_chill": pip_chill.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "results": [],
+    }
+    try:
+        for size in args.sizes.split(","):
+            shape = Shape(
+                int(size),
+                args.fan_out,
+                args.depth,
+                args.cycles,
+                args.extras,
+                args.huge,
+                args.metadata_size,
+                args.seed,
+            )
+            result = benchmark(directory, shape, args.repeat)
+            report["results"].append(result)
+            print(
+                f"{shape.packages:>7} packages: "
+                f"chill {result['chill']['best']:.3f}s "
+                f"{result['chill']['peak_memory'] / 2**20:.1f} MiB, "
+                f"cli {result['cli']['best']:.3f}s "
+                f"{result['cli']['peak_memory'] / 2**20:.1f} MiB, "
+                f"check {result['check']['best']:.3f}s",
+                file=sys.stderr,
+            )
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline:
+            if compare(report, json.load(baseline), args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
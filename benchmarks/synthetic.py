@@ -0,0 +1,208 @@
+"""
+Builds synthetic site-packages directories of fake dist-info
+distributions, so that pip-chill can be measured offline on environments
+of any size and shape.
+"""
+
+import os
+import random
+from collections import namedtuple
+
+Shape = namedtuple(
+    "Shape",
+    (
+        "packages",
+        "fan_out",
+        "depth",
+        "cycles",
+        "extras",
+        "huge",
+        "metadata_size",
+        "seed",
+    ),
+    defaults=(3, 5, 0.01, 0.05, 0.01, 64 * 1024, 0),
+)
+Shape.__doc__ = """
+The shape of a synthetic environment: the number of packages, the
+average number of requirements of each, the length of the dependency
+chains, the fraction of packages in a dependency cycle, the fraction of
+packages with an extra, the fraction of packages with a METADATA body of
+metadata_size bytes and the seed of the random generator.
+"""
+
+Environment = namedtuple("Environment", ("path", "edges", "top_level"))
+
+
+def package_name(index: int) -> str:
+    return f"package-{index:05d}"
+
+
+def _top_level(targets: list[list[int]]) -> set[int]:
+    """
+    Returns the indices of the packages pip-chill should list: the ones
+    in strongly connected components nothing outside them requires. They
+    are found with Kosaraju's algorithm, independently of pip-chill.
+    """
+    count = len(targets)
+    sources: list[list[int]] = [[] for _ in range(count)]
+    for source, source_targets in enumerate(targets):
+        for target in source_targets:
+            sources[target].append(source)
+
+    # Postorder of a depth first search along requirements.
+    visited = bytearray(count)
+    postorder = []
+    for root in range(count):
+        if visited[root]:
+            continue
+        visited[root] = 1
+        stack = [(root, iter(targets[root]))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if not visited[child]:
+                    visited[child] = 1
+                    stack.append((child, iter(targets[child])))
+                    break
+            else:
+                stack.pop()
+                postorder.append(node)
+
+    # Then the components, searching backwards in reverse postorder.
+    component = [-1] * count
+    components = 0
+    for root in reversed(postorder):
+        if component[root] != -1:
+            continue
+        component[root] = components
+        stack = [root]
+        while stack:
+            for parent in sources[stack.pop()]:
+                if component[parent] == -1:
+                    component[parent] = components
+                    stack.append(parent)
+        components += 1
+
+    required = [False] * components
+    for source, source_targets in enumerate(targets):
+        for target in source_targets:
+            if component[source] != component[target]:
+                required[component[target]] = True
+    return {index for index in range(count) if not required[component[index]]}
+
+
+def _requirements(shape: Shape) -> tuple[list[list[str]], int, set[int]]:
+    """
+    Returns the requirement strings of each package, the number of
+    requirements that hold and the indices of the packages pip-chill
+    should list.
+    """
+    generator = random.Random(shape.seed)
+    count = shape.packages
+    requires: list[list[str]] = [[] for _ in range(count)]
+    # The packages each package requires, counting only requirements that
+    # hold.
+    targets: list[list[int]] = [[] for _ in range(count)]
+    edges = 0
+
+    def require(source: int, target: int, text: str | None = None) -> None:
+        nonlocal edges
+        requires[source].append(text or f"{package_name(target)}>=1.0")
+        targets[source].append(target)
+        edges += 1
+
+    with_extras = set(
+        generator.sample(range(count), int(count * shape.extras))
+    )
+    for index in range(count):
+        # Packages form chains of depth packages, each requiring the next,
+        # and also require some packages further down, which keeps the
+        # graph acyclic until cycles are added below.
+        if (index + 1) % shape.depth and index + 1 < count:
+            require(index, index + 1)
+        for _ in range(generator.randint(0, 2 * max(shape.fan_out - 1, 0))):
+            if index + 2 < count:
+                require(index, generator.randrange(index + 2, count))
+
+        # Requirements whose markers never hold don't count.
+        if index % 7 == 0:
+            target = package_name(generator.randrange(count))
+            requires[index].append(f'{target}; python_version < "3"')
+
+        if index in with_extras:
+            target = generator.randrange(count)
+            # Only counts if something asks for the extra.
+            requires[index].append(
+                f'{package_name(target)}; extra == "test"'
+            )
+            if index > 0 and generator.random() < 0.5:
+                require(
+                    generator.randrange(index),
+                    index,
+                    f"{package_name(index)}[test]",
+                )
+                if target != index:
+                    targets[index].append(target)
+                    edges += 1
+
+    # Close some chains into cycles, whose packages all require each other.
+    # Cycles nothing else requires are listed as a group.
+    for start in generator.sample(
+        range(0, count, shape.depth),
+        min(int(count * shape.cycles), len(range(0, count, shape.depth))),
+    ):
+        end = min(start + shape.depth, count) - 1
+        if end > start:
+            require(end, start)
+
+    return requires, edges, _top_level(targets)
+
+
+def make_environment(directory: str, shape: Shape) -> Environment:
+    """
+    Writes the distributions of an environment of the given shape to
+    directory, which is created if needed, and returns it along with the
+    number of requirements that count and the names of the packages
+    pip-chill should list.
+
+    A directory already holding a complete environment is left alone, so
+    that environments can be reused.
+    """
+    requires, edges, top_level = _requirements(shape)
+    environment = Environment(
+        directory,
+        edges,
+        {package_name(index) for index in top_level},
+    )
+    complete = os.path.join(directory, ".complete")
+    if os.path.exists(complete):
+        return environment
+
+    generator = random.Random(shape.seed + 1)
+    body = "x" * (shape.metadata_size - 1) + "\n"
+    os.makedirs(directory, exist_ok=True)
+
+    for index, requirements in enumerate(requires):
+        name = package_name(index)
+        path = os.path.join(
+            directory, f"{name.replace('-', '_')}-1.0.dist-info"
+        )
+        os.makedirs(path, exist_ok=True)
+        headers = [
+            "Metadata-Version: 2.1",
+            f"Name: {name}",
+            "Version: 1.0",
+            "Summary: A synthetic package",
+        ]
+        headers.extend(f"Requires-Dist: {text}" for text in requirements)
+        if any('extra == "test"' in text for text in requirements):
+            headers.append("Provides-Extra: test")
+        description = body if generator.random() < shape.huge else ""
+        with open(
+            os.path.join(path, "METADATA"), "w", encoding="utf-8"
+        ) as metadata_file:
+            metadata_file.write("\n".join(headers) + "\n\n" + description)
+
+    with open(complete, "w", encoding="utf-8"):
+        pass
+    return environment
@@ -1,11 +1,41 @@
 # -*- coding: utf-8 -*-
 "Pip-chill module root"
 
-from .pip_chill import chill
-
 __author__ = "Ricardo Bánffy"
 __email__ = "rbanffy@gmail.com"
 __version__ = "1.0.4"
 
+# Public names and the modules they live in. They are imported on first
+# use, so that importing pip_chill (and starting the command line) doesn't
+# pay for modules a run may not need.
+_exports = {
+    "achill": "aio",
+    "aiter_chill": "aio",
+    "chill": "pip_chill",
+    "chill_environments": "pip_chill",
+    "dependency_graph": "pip_chill",
+    "fingerprint": "fingerprint",
+    "iter_chill": "pip_chill",
+    "top_level_fingerprints": "fingerprint",
+    "ClosureIndex": "closure",
+    "DependencyGraph": "graph",
+    "Timings": "timings",
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name: str):
+    module = _exports.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    from importlib import import_module
+
+    value = getattr(import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = [chill.__name__]
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_exports})
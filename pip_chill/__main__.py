@@ -0,0 +1,6 @@
+"Allows running pip-chill as python -m pip_chill"
+
+from .cli import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""Runs chill from asyncio code without blocking the event loop"""
+
+import asyncio
+import functools
+import os
+import sys
+from collections.abc import AsyncIterator, Iterable, Mapping
+
+from .discovery import (
+    DistributionMetadata,
+    environment_paths,
+    load_directory,
+    metadata_entries,
+    read_metadata,
+)
+from .pip_chill import (
+    Distribution,
+    dependency_graph,
+    environment_markers,
+    iter_distributions,
+)
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from typing import Any
+
+    from .cache import MetadataCache
+
+# How many batches are read at once, and how many metadata directories
+# each batch reads, unless told otherwise.
+CONCURRENCY = 4
+BATCH_SIZE = 64
+
+
+def _load(
+    entry: str, directory: str, entries: list[os.DirEntry] | None
+) -> list[DistributionMetadata]:
+    return list(load_directory(entry, directory, entries, None))
+
+
+def _stat(entries: list[os.DirEntry]) -> list[os.stat_result | None]:
+    stats = []
+    for child in entries:
+        try:
+            stats.append(child.stat())
+        except OSError:
+            stats.append(None)
+    return stats
+
+
+def _read(paths: list[str]) -> list[DistributionMetadata]:
+    return list(map(read_metadata, paths))
+
+
+async def aiter_metadata(
+    paths: Iterable[str] | None = None,
+    cache: "MetadataCache | None" = None,
+    concurrency: int = CONCURRENCY,
+    batch_size: int = BATCH_SIZE,
+    executor: "Executor | None" = None,
+) -> AsyncIterator[DistributionMetadata]:
+    """
+    Yields what iter_metadata yields for paths, in the same order, without
+    blocking the event loop: directories are listed, and their metadata
+    read in batches of batch_size metadata directories, by executor (the
+    default executor of the loop if None), with at most concurrency of
+    those jobs running at a time.
+
+    cache is only looked up and updated on the loop's thread, as it isn't
+    thread-safe, and saved by the caller, once everything was read.
+    """
+    if paths is None:
+        paths = sys.path
+
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run(function, *args):
+        async with limit:
+            return await loop.run_in_executor(executor, function, *args)
+
+    async def load(
+        entry: str, directory: str, batch: list[os.DirEntry] | None
+    ) -> list[DistributionMetadata]:
+        if cache is None or not batch:
+            return await run(_load, entry, directory, batch)
+        # Metadata directories are stat'ed and read in the executor, and
+        # only the ones the cache doesn't have are read.
+        found = [
+            (child.path, stat, cache.get(child.path, stat))
+            for child, stat in zip(batch, await run(_stat, batch))
+            if stat is not None
+        ]
+        missing = [path for path, _, cached in found if cached is None]
+        loaded = iter(await run(_read, missing) if missing else ())
+        records = []
+        for _, stat, cached in found:
+            if cached is None:
+                cached = next(loaded)
+                cache.put(cached, stat)
+            records.append(cached)
+        return records
+
+    # An empty entry on sys.path means the current directory.
+    path_entries = list(paths)
+    directories = [
+        os.path.abspath(entry or os.curdir) for entry in path_entries
+    ]
+    listings = await asyncio.gather(
+        *(run(metadata_entries, directory) for directory in directories)
+    )
+
+    # Every batch is scheduled at once, and the semaphore holds back the
+    # ones over the limit, so reading goes on while results are consumed.
+    tasks = []
+    for entry, directory, entries in zip(path_entries, directories, listings):
+        batches = [entries]
+        if entries:
+            batches = [
+                entries[start : start + batch_size]
+                for start in range(0, len(entries), batch_size)
+            ]
+        # As load_directory does for the entries it doesn't leave to
+        # importlib.
+        if (
+            cache is not None
+            and entries is not None
+            and (entries or not directory.lower().endswith(".egg"))
+        ):
+            cache.mark_scanned(directory)
+        tasks.extend(
+            asyncio.ensure_future(load(entry, directory, batch))
+            for batch in batches
+        )
+    try:
+        for task in tasks:
+            for record in await task:
+                yield record
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def aiter_chill(
+    show_all: bool = False,
+    no_chill: bool = False,
+    no_version: bool = False,
+    cache: "str | os.PathLike | MetadataCache | None" = None,
+    paths: Iterable[str] | None = None,
+    environment: Mapping[str, str] | None = None,
+    dependencies: bool = False,
+    sort: bool = True,
+    metadata: Iterable[DistributionMetadata] | None = None,
+    concurrency: int = CONCURRENCY,
+    batch_size: int = BATCH_SIZE,
+    executor: "Executor | None" = None,
+) -> AsyncIterator[Distribution]:
+    """
+    Yields what iter_chill yields, without blocking the event loop.
+
+    Metadata is read as aiter_metadata reads it, with concurrency,
+    batch_size and executor, and the graph is built by executor too. The
+    loop gets control back every batch_size distributions yielded.
+    Several calls can run on the same loop at once: share an executor
+    between them to bound the number of threads they use altogether.
+
+    See dependency_graph for the meaning of the other arguments.
+    """
+    loop = asyncio.get_running_loop()
+
+    def run(function, *args, **kwargs):
+        return loop.run_in_executor(
+            executor, functools.partial(function, *args, **kwargs)
+        )
+
+    if metadata is not None:
+        records = await run(list, metadata)
+    else:
+        if cache is not None:
+            from .cache import MetadataCache
+
+            if not isinstance(cache, MetadataCache):
+                cache = await run(MetadataCache, cache)
+        records = [
+            record
+            async for record in aiter_metadata(
+                paths, cache, concurrency, batch_size, executor
+            )
+        ]
+        if cache is not None:
+            await run(cache.save)
+
+    graph = await run(
+        dependency_graph,
+        show_all=show_all,
+        no_chill=no_chill,
+        environment=environment,
+        metadata=records,
+    )
+    top_level = await run(graph.top_level)
+
+    for required in (False, True) if dependencies else (False,):
+        distributions = iter_distributions(
+            graph,
+            dependencies=required,
+            no_version=no_version,
+            sort=sort,
+            top_level=top_level,
+        )
+        for count, distribution in enumerate(distributions, 1):
+            yield distribution
+            if count % batch_size == 0:
+                await asyncio.sleep(0)
+
+
+async def achill(
+    **options: "Any",
+) -> tuple[list[Distribution], list[Distribution]]:
+    """
+    Returns what chill returns, without blocking the event loop. Keyword
+    arguments are the ones of aiter_chill, except dependencies.
+    """
+    packages = []
+    dependencies = []
+    async for distribution in aiter_chill(dependencies=True, **options):
+        if distribution.required_by:
+            dependencies.append(distribution)
+        else:
+            packages.append(distribution)
+    return packages, dependencies
+
+
+async def _achill_environment(
+    environment: str, options: "dict[str, Any]"
+) -> tuple[list[Distribution], list[Distribution]]:
+    loop = asyncio.get_running_loop()
+    paths = await loop.run_in_executor(
+        options.get("executor"), environment_paths, environment
+    )
+    # Evaluate markers for the Python version the environment was made for.
+    options = {
+        **options,
+        "environment": environment_markers(
+            paths, options.get("environment")
+        ),
+    }
+    return await achill(paths=paths, **options)
+
+
+async def achill_environments(
+    environments: Iterable[str], **options: "Any"
+) -> list[tuple[str, tuple[list[Distribution], list[Distribution]]]]:
+    """
+    Returns what chill_environments yields, as a list, analysing the
+    environments concurrently on the running loop. Keyword arguments are
+    passed on to achill.
+    """
+    environments = list(environments)
+    results = await asyncio.gather(
+        *(
+            _achill_environment(environment, options)
+            for environment in environments
+        )
+    )
+    return list(zip(environments, results))
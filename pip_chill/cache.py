@@ -0,0 +1,168 @@
+"""Persistent on-disk cache of distribution metadata"""
+
+import contextlib
+import json
+import os
+import tempfile
+
+from .discovery import DistributionMetadata
+
+
+class MetadataCache:
+    """
+    Caches the name, version and requirements of distributions, keyed by
+    the path of their metadata directory and its modification time and
+    inode. Installers replace the whole dist-info directory when a package
+    changes, so a stale entry is never returned for an upgraded package.
+    """
+
+    filename = "metadata.json"
+    format_version = 1
+
+    def __init__(self, directory: str | os.PathLike):
+        self.directory = os.path.expanduser(os.fspath(directory))
+        self.path = os.path.join(self.directory, self.filename)
+        self._entries: dict[str, dict] = {}
+        self._seen: set[str] = set()
+        self._scanned: set[str] = set()
+        # Entries stored and evicted since the cache was last saved.
+        self._stored: set[str] = set()
+        self._evicted: set[str] = set()
+        self._dirty = False
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(stat: os.stat_result) -> list[int]:
+        return [stat.st_mtime_ns, stat.st_ino]
+
+    def _read(self) -> dict[str, dict]:
+        try:
+            with open(self.path, encoding="utf-8") as cache_file:
+                contents = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+
+        if (
+            not isinstance(contents, dict)
+            or contents.get("version") != self.format_version
+        ):
+            return {}
+
+        entries = contents.get("entries")
+        return entries if isinstance(entries, dict) else {}
+
+    def load(self) -> None:
+        """
+        Reads the cache file. A missing, corrupt or outdated cache file
+        results in an empty cache.
+        """
+        self._entries = self._read()
+
+    def get(
+        self, path: str, stat: os.stat_result
+    ) -> DistributionMetadata | None:
+        """
+        Returns the cached metadata for path, or None if it isn't cached or
+        the directory changed since it was.
+        """
+        self._seen.add(path)
+        entry = self._entries.get(path)
+        if entry is None or entry.get("key") != self._key(stat):
+            return None
+        return DistributionMetadata(
+            entry["name"], entry["version"], tuple(entry["requires"]), path
+        )
+
+    def put(self, record: DistributionMetadata, stat: os.stat_result) -> None:
+        """
+        Stores the metadata of the distribution at record.path.
+        """
+        self._seen.add(record.path)
+        self._entries[record.path] = {
+            "key": self._key(stat),
+            "name": record.name,
+            "version": record.version,
+            "requires": list(record.requires),
+        }
+        self._stored.add(record.path)
+        self._evicted.discard(record.path)
+        self._dirty = True
+
+    def mark_scanned(self, directory: str) -> None:
+        """
+        Records that every metadata directory in directory was visited, so
+        that cached entries for the ones that disappeared can be evicted.
+        """
+        self._scanned.add(directory)
+
+    def evict(self) -> None:
+        """
+        Drops entries for metadata directories that no longer exist in the
+        directories scanned since the cache was loaded.
+        """
+        for path in list(self._entries):
+            if (
+                path not in self._seen
+                and os.path.dirname(path) in self._scanned
+            ):
+                del self._entries[path]
+                self._stored.discard(path)
+                self._evicted.add(path)
+                self._dirty = True
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """
+        Holds an exclusive lock on the cache directory, where supported.
+        """
+        try:
+            import fcntl
+        except ImportError:
+            yield
+            return
+
+        with open(os.path.join(self.directory, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def save(self) -> None:
+        """
+        Evicts stale entries and writes the cache file, if anything changed.
+
+        Other runs, such as the worker processes of chill_environments, may
+        have saved the cache since it was loaded, so the entries stored and
+        evicted here are merged into the ones in the file, under a lock.
+        The file is replaced atomically so concurrent runs never read a
+        partially written cache.
+        """
+        self.evict()
+        if not self._dirty:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        with self._locked():
+            entries = self._read()
+            for path in self._evicted:
+                entries.pop(path, None)
+            for path in self._stored:
+                entries[path] = self._entries[path]
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=self.directory,
+                prefix=".metadata-",
+                suffix=".tmp",
+                delete=False,
+            ) as cache_file:
+                json.dump(
+                    {"version": self.format_version, "entries": entries},
+                    cache_file,
+                )
+            os.replace(cache_file.name, self.path)
+        self._entries = entries
+        self._stored.clear()
+        self._evicted.clear()
+        self._dirty = False
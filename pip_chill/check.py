@@ -0,0 +1,81 @@
+"""Finds requirements of installed distributions that aren't met"""
+
+from collections import namedtuple
+from collections.abc import Iterable
+
+from .graph import DependencyGraph
+from .requirements import Requirement
+from .versions import parse_specifier, satisfies
+
+
+class Problem(
+    namedtuple(
+        "Problem", ("name", "version", "requirement", "required", "installed")
+    )
+):
+    """
+    A requirement of distribution name, at version, that isn't met: the
+    requirement without its marker, with its specifiers sorted as pip
+    prints them, as in "idna<4,>=2.5", the name of the distribution it
+    requires and the version of it installed, None if it isn't. Printed
+    the way pip check reports it.
+    """
+
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        if self.installed is None:
+            return (
+                f"{self.name} {self.version} requires {self.required}, "
+                "which is not installed."
+            )
+        return (
+            f"{self.name} {self.version} has requirement {self.requirement}, "
+            f"but you have {self.required} {self.installed}."
+        )
+
+
+def _requirement_text(requirement: Requirement) -> str:
+    extras = f"[{','.join(requirement.extras)}]" if requirement.extras else ""
+    if requirement.url:
+        return f"{requirement.name}{extras} @ {requirement.url}"
+    specifiers = sorted(
+        str(parse_specifier(text) or text.strip())
+        for text in requirement.specifier.split(",")
+        if text.strip()
+    )
+    return f"{requirement.name}{extras}{','.join(specifiers)}"
+
+
+def unmet_requirements(
+    graph: DependencyGraph, counted: Iterable[tuple[int, Requirement]]
+) -> list[Problem]:
+    """
+    Returns a Problem, sorted, for each requirement in counted, as
+    dependency_graph collects them for graph, that the installed
+    distributions don't meet: the ones on distributions that aren't
+    installed, and the ones whose version specifiers the installed
+    version doesn't satisfy, pre-releases included.
+    """
+    problems = set()
+    for node, requirement in counted:
+        target = graph.get(requirement.name)
+        installed = graph.versions[target]
+        if installed is not None and (
+            not requirement.specifier
+            or requirement.url
+            or satisfies(installed, requirement.specifier)
+        ):
+            continue
+        problems.add(
+            Problem(
+                graph.names[node],
+                graph.versions[node],
+                _requirement_text(requirement),
+                graph.names[target],
+                installed,
+            )
+        )
+    return sorted(
+        problems, key=lambda problem: (problem.name.lower(), problem)
+    )
@@ -1,16 +1,482 @@
 #!/usr/bin/env python3
 "Command line implementation"
 
-import argparse
+import os
+import sys
 
-import pip_chill
+if __name__ == "__main__" and not __package__:
+    # Run as a script, the directory holding this file comes first on
+    # sys.path and would shadow the package with the pip_chill module.
+    sys.path[0] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import pip_chill  # noqa: E402
+from pip_chill.render import FORMATS, render  # noqa: E402
+from pip_chill.timings import Timings  # noqa: E402
+
+
+def _marker_environment(parser, assignments: list[str]) -> dict[str, str]:
+    """
+    Returns the marker variables set with --marker-env NAME=VALUE.
+    """
+    marker_environment = {}
+    for assignment in assignments:
+        name, separator, value = assignment.partition("=")
+        if not separator:
+            parser.error(f"--marker-env expects NAME=VALUE, not {assignment}")
+        marker_environment[name.strip()] = value.strip()
+    return marker_environment
+
+
+def _graph_options(parser, args, options: dict, options_take: str) -> dict:
+    """
+    Returns options for the single environment options_take, as in "--why
+    takes", given with --path, if any.
+    """
+    from pip_chill.discovery import environment_paths
+    from pip_chill.pip_chill import environment_markers
+
+    options = dict(options)
+    if args.paths:
+        if len(args.paths) > 1:
+            parser.error(f"{options_take} a single --path")
+        paths = environment_paths(args.paths[0])
+        options["paths"] = paths
+        options["environment"] = environment_markers(
+            paths, options["environment"]
+        )
+    return options
+
+
+def _closure(parser, args, options: dict) -> list:
+    """
+    Returns the distributions --why or --orphans-if-removed ask for.
+    """
+    from pip_chill.closure import ClosureIndex
+    from pip_chill.pip_chill import Distribution
+
+    options = _graph_options(
+        parser, args, options, "--why and --orphans-if-removed take"
+    )
+    no_version = options.pop("no_version")
+    graph = pip_chill.dependency_graph(**options)
+    name = args.why or args.orphans_if_removed
+    timings = options.get("timings")
+    if timings is None:
+        index = ClosureIndex(graph)
+    else:
+        with timings.phase("closure"):
+            index = ClosureIndex(graph)
+    try:
+        if args.why:
+            # The package itself, then what needs it.
+            node = graph.get(name)
+            nodes = [node] + sorted(
+                (root for root in index.needed_by(name) if root != node),
+                key=graph.names.__getitem__,
+            )
+        else:
+            nodes = sorted(
+                index.orphans_if_removed(name), key=graph.names.__getitem__
+            )
+    except KeyError:
+        from pip_chill.pip_chill import ignored_packages
+        from pip_chill.requirements import canonicalize_name
+
+        key = canonicalize_name(name)
+        if key not in ignored_packages(
+            options["show_all"], options["no_chill"]
+        ):
+            reason = "is not installed"
+        elif key == "pip-chill":
+            reason = "is left out with --no-chill"
+        else:
+            reason = "is left out unless --all is given"
+        parser.exit(1, f"{parser.prog}: error: {name} {reason}\n")
+
+    return [
+        Distribution(
+            graph.names[node],
+            graph.versions[node],
+            required_by=(graph.names[n] for n in graph.required_by(node)),
+            hide_version=no_version,
+        )
+        for node in nodes
+    ]
+
+
+def _check(parser, args, options: dict) -> None:
+    """
+    Prints the requirements of installed packages that aren't met, as pip
+    check does, and exits with status 1 if there are any.
+    """
+    from pip_chill.check import unmet_requirements
+
+    options = _graph_options(parser, args, options, "--check takes")
+    options.pop("no_version")
+    # Requirements on the packages chill leaves out must be met too.
+    options["show_all"] = True
+    options["no_chill"] = False
+    counted: list = []
+    graph = pip_chill.dependency_graph(counted=counted, **options)
+    timings = options.get("timings")
+    if timings is None:
+        problems = unmet_requirements(graph, counted)
+    else:
+        with timings.phase("check"):
+            problems = unmet_requirements(graph, counted)
+    sys.stdout.write("".join(f"{problem}\n" for problem in problems))
+    if timings is not None:
+        timings.close()
+        print(timings.report(), file=sys.stderr)
+    sys.exit(1 if problems else 0)
+
+
+def _tree(parser, args, options: dict) -> None:
+    """
+    Prints the packages chill lists, each followed by what it requires,
+    down to --depth levels.
+    """
+    from pip_chill.tree import iter_tree
+
+    options = _graph_options(parser, args, options, "--tree takes")
+    no_version = options.pop("no_version")
+    graph = pip_chill.dependency_graph(**options)
+    sys.stdout.writelines(
+        f"{line}\n" for line in iter_tree(graph, args.depth, no_version)
+    )
+
+
+def _sizes(parser, args, options: dict) -> None:
+    """
+    Prints the bytes each package chill lists takes, with everything it
+    needs and with what only it needs, then the bytes several of them need.
+    """
+    from pip_chill.sizes import distribution_sizes, footprints, format_size
+
+    options = _graph_options(parser, args, options, "--sizes takes")
+    options.pop("no_version")
+    graph = pip_chill.dependency_graph(**options)
+    found, shared = footprints(
+        graph, distribution_sizes(options.get("paths"), args.jobs)
+    )
+    if args.format == "text":
+        lines = [str(footprint) for footprint in found]
+        lines.append(f"# {format_size(shared)} shared by several packages")
+        sys.stdout.write("".join(f"{line}\n" for line in lines))
+        return
+
+    import json
+
+    records = [footprint._asdict() for footprint in found]
+    if args.format == "jsonl":
+        for record in records:
+            print(json.dumps(record, separators=(",", ":")))
+        return
+    print(
+        json.dumps(
+            {"format_version": 1, "packages": records, "shared": shared},
+            separators=(",", ":"),
+        )
+    )
+
+
+def _check_paths(parser, paths: list[str] | None) -> None:
+    """
+    Stops with an error if any of the environments given with --path is
+    missing, rather than reporting it as empty.
+    """
+    for path in paths or ():
+        if not os.path.exists(path):
+            parser.error(f"--path {path}: no such file or directory")
+
+
+def _fingerprint(parser, args, marker_environment: dict[str, str]) -> None:
+    """
+    Prints the fingerprint of each environment and, with --verbose, the
+    one of each package chill lists in it.
+    """
+    from pip_chill.discovery import environment_paths
+    from pip_chill.fingerprint import fingerprint, top_level_fingerprints
+    from pip_chill.pip_chill import environment_markers
+
+    if args.rootfs is not None:
+        paths = _rootfs(parser, args.rootfs)
+        environments = [
+            (
+                args.rootfs,
+                paths,
+                _image_markers(paths, marker_environment),
+            )
+        ]
+    else:
+        environments = []
+        for environment in args.paths or [None]:
+            paths = None
+            markers = marker_environment
+            if environment is not None:
+                paths = environment_paths(environment)
+                markers = environment_markers(paths, marker_environment)
+            environments.append((environment, paths, markers))
+
+    for environment, paths, markers in environments:
+        digest = fingerprint(paths, record_mtimes=args.record_mtimes)
+        print(digest if environment is None else f"{digest}  {environment}")
+        if not args.verbose:
+            continue
+        for name, digest in top_level_fingerprints(
+            paths,
+            show_all=args.show_all,
+            no_chill=args.no_chill,
+            environment=markers,
+        ).items():
+            print(f"{digest}  {name}")
+
+
+def _rootfs(parser, root: str) -> list[str]:
+    """
+    Returns the site-packages directories of the image unpacked at root,
+    stopping with an error if there are none.
+    """
+    from pip_chill.image import rootfs_paths
+
+    paths = rootfs_paths(root)
+    if not paths:
+        parser.error(f"--rootfs {root}: no site-packages directory found")
+    return paths
+
+
+def _image_tar(parser, path: str) -> list:
+    """
+    Returns the metadata of the distributions in the image saved at path,
+    stopping with an error if it can't be read.
+    """
+    import tarfile
+
+    from pip_chill.image import read_image_tar
+
+    try:
+        return read_image_tar(path)
+    except (OSError, tarfile.TarError) as error:
+        parser.error(f"--image-tar {path}: {error}")
+
+
+def _image_markers(
+    paths: list[str], marker_environment: dict[str, str]
+) -> dict[str, str]:
+    """
+    Returns the marker variables for the Python an image was made for,
+    given the site-packages or metadata directories found in it.
+    """
+    from pip_chill.pip_chill import environment_markers
+
+    # Metadata directories tell the version by their parent.
+    parents = [os.path.dirname(path) for path in paths]
+    return environment_markers(paths + parents, marker_environment)
+
+
+def _diff(parser, args, distributions) -> None:
+    """
+    Prints how distributions differ from the snapshot given with --diff
+    and exits with status 1 if they do.
+    """
+    from pip_chill.snapshot import Snapshot
+
+    try:
+        if args.diff == "-":
+            snapshot = Snapshot(sys.stdin)
+        else:
+            with open(args.diff, encoding="utf-8") as snapshot_file:
+                snapshot = Snapshot(snapshot_file)
+    except (OSError, UnicodeDecodeError) as error:
+        parser.error(f"--diff: can't read {args.diff}: {error}")
+
+    changed = False
+    for change in snapshot.diff(distributions):
+        print(change)
+        changed = True
+    sys.exit(1 if changed else 0)
+
+
+def _hashes(parser, args, results, paths: list[str] | None) -> None:
+    """
+    Prints results pinned with the digests pip checks, and exits with
+    status 1 if any package lacks one. paths are where the distributions
+    were installed, sys.path if None, unless given with --path.
+    """
+    from pip_chill.discovery import environment_paths
+    from pip_chill.hashes import (
+        distribution_hashes,
+        find_hashes,
+        hashed_requirement,
+    )
+
+    from pip_chill.pip_chill import ignored_packages
+    from pip_chill.requirements import canonicalize_name
+
+    archives = args.wheel_cache or args.wheelhouse
+    tagged = args.paths is not None and len(args.paths) > 1
+    ignored = ignored_packages(args.show_all, args.no_chill)
+    complete = True
+    for environment, distributions in results:
+        if args.paths:
+            paths = environment_paths(environment)
+        # Dependencies that aren't installed can't be pinned, and packages
+        # chill leaves out are only pinned if something requires them.
+        distributions = [
+            distribution
+            for distribution in distributions
+            if distribution.version is not None
+            and (
+                distribution.required_by
+                or canonicalize_name(distribution.name) not in ignored
+            )
+        ]
+        hashes = find_hashes(distributions, paths, archives, args.jobs)
+        lines = [f"# Environment: {environment}"] if tagged else []
+        for distribution in distributions:
+            if not distribution_hashes(distribution, hashes):
+                complete = False
+                print(
+                    f"{parser.prog}: no hash found for {distribution.name}"
+                    f"=={distribution.version}",
+                    file=sys.stderr,
+                )
+            lines.append(hashed_requirement(distribution, hashes))
+        sys.stdout.write("".join(f"{line}\n" for line in lines))
+    sys.exit(0 if complete else 1)
+
+
+def _used_by(args, results, paths: list[str] | None) -> list:
+    """
+    Returns results with the packages chill lists marked as imported by
+    the sources in --used-by or not. paths are where the distributions
+    were installed, sys.path if None, unless given with --path.
+    """
+    from pip_chill.discovery import environment_paths
+    from pip_chill.imports import (
+        mark_used,
+        module_index,
+        scan_imports,
+        used_distributions,
+    )
+
+    modules = scan_imports(args.used_by, args.cache_dir, args.processes)
+    marked = []
+    for environment, distributions in results:
+        if args.paths:
+            paths = environment_paths(environment)
+        used = used_distributions(modules, module_index(paths))
+        marked.append((environment, mark_used(distributions, used)))
+    return marked
+
+
+def serve(arguments: list[str]) -> None:
+    """Serves the dependency graph of an environment on a Unix socket"""
+
+    import argparse
+
+    from pip_chill import server
+    from pip_chill.discovery import environment_paths
+    from pip_chill.pip_chill import environment_markers
+
+    parser = argparse.ArgumentParser(
+        prog="pip-chill serve",
+        description="Keep the dependency graph of an environment up to "
+        "date and answer queries about it on a Unix socket.",
+    )
+    parser.add_argument(
+        "--socket",
+        required=True,
+        dest="socket",
+        metavar="PATH",
+        help="listen on the Unix socket at PATH.",
+    )
+    parser.add_argument(
+        "--path",
+        action="append",
+        dest="paths",
+        metavar="DIR",
+        help="serve the environment (virtualenv prefix or site-packages "
+        "directory) at DIR instead of the running one. Can be repeated.",
+    )
+    parser.add_argument(
+        "--no-chill",
+        action="store_true",
+        dest="no_chill",
+        help="leave pip-chill out.",
+    )
+    parser.add_argument(
+        "-a",
+        "--all",
+        "--show-all",
+        action="store_true",
+        dest="show_all",
+        help="include pip, setuptools and wheel.",
+    )
+    parser.add_argument(
+        "--marker-env",
+        action="append",
+        dest="marker_env",
+        default=[],
+        metavar="NAME=VALUE",
+        help="evaluate environment markers with NAME set to VALUE, as in "
+        "python_version=3.9. Can be repeated.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        dest="interval",
+        metavar="SECONDS",
+        help="check for changes inotify may have missed every SECONDS "
+        "(default: 1).",
+    )
+    args = parser.parse_args(arguments)
+    _check_paths(parser, args.paths)
+
+    marker_environment = _marker_environment(parser, args.marker_env)
+    paths = None
+    if args.paths:
+        paths = [
+            path
+            for environment in args.paths
+            for path in environment_paths(environment)
+        ]
+        # Evaluate markers for the Python version the environment was made
+        # for.
+        marker_environment = environment_markers(paths, marker_environment)
+
+    try:
+        server.serve(
+            args.socket,
+            paths=paths,
+            show_all=args.show_all,
+            no_chill=args.no_chill,
+            environment=marker_environment,
+            interval=args.interval,
+        )
+    except KeyboardInterrupt:
+        pass
 
 
 def main() -> None:
     """Console script for pip_chill"""
 
+    if len(sys.argv) == 1:
+        # The most common invocation doesn't need argparse, which is slow
+        # to import.
+        render([(None, pip_chill.iter_chill())], sys.stdout)
+        return
+
+    if sys.argv[1] == "serve":
+        serve(sys.argv[2:])
+        return
+
+    import argparse
+
     parser = argparse.ArgumentParser(
-        description="Like `pip freeze`, but more relaxed."
+        description="Like `pip freeze`, but more relaxed. Run "
+        "`pip-chill serve --help` to keep answering from a daemon instead."
     )
     parser.add_argument(
         "--no-version",
@@ -39,19 +505,397 @@ def main() -> None:
         dest="verbose",
         help="list commented out dependencies too.",
     )
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        metavar="DIR",
+        help="cache distribution metadata in DIR to speed up later runs.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        dest="jobs",
+        metavar="N",
+        help="read distribution metadata with N threads.",
+    )
+    parser.add_argument(
+        "--path",
+        action="append",
+        dest="paths",
+        metavar="DIR",
+        help="analyse the environment (virtualenv prefix or site-packages "
+        "directory) at DIR instead of the running one. Can be repeated.",
+    )
+    parser.add_argument(
+        "--wheelhouse",
+        dest="wheelhouse",
+        metavar="DIR",
+        help="analyse the wheels in DIR, as if they were installed, "
+        "without installing them.",
+    )
+    parser.add_argument(
+        "--rootfs",
+        dest="rootfs",
+        metavar="DIR",
+        help="analyse the Python installations of the unpacked container "
+        "image at DIR.",
+    )
+    parser.add_argument(
+        "--image-tar",
+        dest="image_tar",
+        metavar="FILE",
+        help="analyse the Python installations of the container image "
+        "saved in FILE (as by `docker save` or `docker export`), without "
+        "extracting it.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        dest="processes",
+        metavar="N",
+        help="analyse the environments given with --path in N processes.",
+    )
+    parser.add_argument(
+        "--marker-env",
+        action="append",
+        dest="marker_env",
+        default=[],
+        metavar="NAME=VALUE",
+        help="evaluate environment markers with NAME set to VALUE, as in "
+        "python_version=3.9. Can be repeated.",
+    )
+    parser.add_argument(
+        "--unsorted",
+        action="store_true",
+        dest="unsorted",
+        help="print packages in the order they were found, not by name.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="text",
+        dest="format",
+        help="output format (default: text). json and jsonl include "
+        "dependencies, which have a non-empty required_by list.",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        dest="timings",
+        help="print the time spent in each phase of the run to stderr.",
+    )
+    # Options that do something else than listing packages, of which only
+    # one can be given.
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument(
+        "--fingerprint",
+        action="store_true",
+        dest="fingerprint",
+        help="print a digest of the installed distributions, from "
+        "directory listings only, that changes when they do. With "
+        "--verbose, also print one for each package and what it needs.",
+    )
+    parser.add_argument(
+        "--record-mtimes",
+        action="store_true",
+        dest="record_mtimes",
+        help="make --fingerprint change when packages are reinstalled.",
+    )
+    modes.add_argument(
+        "--diff",
+        dest="diff",
+        metavar="SNAPSHOT",
+        help="compare with pip-chill output saved in SNAPSHOT ('-' for "
+        "stdin), print what was added (+), removed (-) or changed (~) and "
+        "exit with status 1 if anything was.",
+    )
+    modes.add_argument(
+        "--hashes",
+        action="store_true",
+        dest="hashes",
+        help="pin every package, dependencies included, with the "
+        "--hash options pip checks in --require-hashes mode. Digests pip "
+        "recorded on install are reused, others are computed from the "
+        "archives in --wheel-cache.",
+    )
+    parser.add_argument(
+        "--wheel-cache",
+        dest="wheel_cache",
+        metavar="DIR",
+        help="with --hashes, hash the wheels and source archives in DIR "
+        "and below it for packages pip recorded no digest for.",
+    )
+    parser.add_argument(
+        "--used-by",
+        dest="used_by",
+        metavar="SRC_DIR",
+        help="mark the packages listed that the .py files in SRC_DIR don't "
+        "import with '# Not imported' (\"used\" in JSON). Files are parsed "
+        "by --processes processes, and cached in --cache-dir.",
+    )
+    modes.add_argument(
+        "--sizes",
+        action="store_true",
+        dest="sizes",
+        help="show the bytes each package takes with everything it needs, "
+        "and with what only it needs, which removing it would free.",
+    )
+    modes.add_argument(
+        "--tree",
+        action="store_true",
+        dest="tree",
+        help="show each package followed by what it requires, indented. "
+        "Packages whose requirements were already shown are marked "
+        "'# See above'.",
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        dest="depth",
+        metavar="N",
+        help="with --tree, show requirements down to N levels below each "
+        "package.",
+    )
+    modes.add_argument(
+        "--check",
+        action="store_true",
+        dest="check",
+        help="show the requirements of installed packages, pip-chill and "
+        "the ones --all shows included, that aren't met, as `pip check` "
+        "does, and exit with status 1 if there are any.",
+    )
+    modes.add_argument(
+        "--why",
+        dest="why",
+        metavar="PKG",
+        help="show what requires PKG, then the packages chill lists that "
+        "need it.",
+    )
+    modes.add_argument(
+        "--orphans-if-removed",
+        dest="orphans_if_removed",
+        metavar="PKG",
+        help="show the packages nothing chill lists would need if PKG was "
+        "removed.",
+    )
     args = parser.parse_args()
+    if args.processes is not None and not (args.paths or args.used_by):
+        parser.error("--processes only works with --path or --used-by")
+    if args.timings and args.processes is not None and args.processes > 1:
+        parser.error("--timings can't be used with --processes")
+    if args.diff is not None and args.paths and len(args.paths) > 1:
+        parser.error("--diff takes a single --path")
+    if args.diff is not None and args.format != "text":
+        parser.error("--diff can't be used with --format")
+    sources = [
+        option
+        for option, value in (
+            ("--wheelhouse", args.wheelhouse),
+            ("--rootfs", args.rootfs),
+            ("--image-tar", args.image_tar),
+        )
+        if value is not None
+    ]
+    if sources and args.paths:
+        parser.error(f"{sources[0]} can't be used with --path")
+    if len(sources) > 1:
+        parser.error(f"{sources[0]} can't be used with {sources[1]}")
+    for option, directory in (
+        ("--wheelhouse", args.wheelhouse),
+        ("--rootfs", args.rootfs),
+    ):
+        if directory is not None and not os.path.isdir(directory):
+            parser.error(f"{option} {directory}: not a directory")
+    if args.hashes and (args.no_version or args.format != "text"):
+        parser.error("--hashes can't be used with --no-version or --format")
+    if args.wheel_cache is not None:
+        if not args.hashes:
+            parser.error("--wheel-cache only works with --hashes")
+        if not os.path.isdir(args.wheel_cache):
+            parser.error(f"--wheel-cache {args.wheel_cache}: not a directory")
+    if args.fingerprint:
+        for option, given in (
+            # Only installed packages have the directory listings it's
+            # computed from.
+            ("--wheelhouse", args.wheelhouse is not None),
+            ("--image-tar", args.image_tar is not None),
+            ("--format", args.format != "text"),
+            ("--used-by", args.used_by is not None),
+            ("--timings", args.timings),
+            ("--processes", args.processes is not None),
+        ):
+            if given:
+                parser.error(f"--fingerprint can't be used with {option}")
+    elif args.record_mtimes:
+        parser.error("--record-mtimes only works with --fingerprint")
+    # What the modes besides listing packages can't be combined with.
+    for option, given in (
+        ("--sizes", args.sizes),
+        ("--tree", args.tree),
+        ("--check", args.check),
+    ):
+        if not given:
+            continue
+        if args.format != "text" and option != "--sizes":
+            parser.error(f"{option} can't be used with --format")
+        if args.used_by is not None:
+            parser.error(f"{option} can't be used with --used-by")
+    if args.depth is not None:
+        if not args.tree:
+            parser.error("--depth only works with --tree")
+        if args.depth < 0:
+            parser.error("--depth must be at least 0")
+    if args.sizes and (
+        args.wheelhouse is not None or args.image_tar is not None
+    ):
+        parser.error(
+            "--sizes needs installed packages, not --wheelhouse or "
+            "--image-tar"
+        )
+    if args.used_by is not None:
+        if args.wheelhouse is not None or args.image_tar is not None:
+            parser.error(
+                "--used-by needs installed packages, not --wheelhouse or "
+                "--image-tar"
+            )
+        if not os.path.isdir(args.used_by):
+            parser.error(f"--used-by {args.used_by}: not a directory")
+    _check_paths(parser, args.paths)
+
+    marker_environment = _marker_environment(parser, args.marker_env)
+    if args.fingerprint:
+        _fingerprint(parser, args, marker_environment)
+        return
+
+    options = {
+        "show_all": args.show_all,
+        "no_chill": args.no_chill,
+        "no_version": args.no_version,
+        "cache": args.cache_dir,
+        "workers": args.jobs,
+        "environment": marker_environment,
+    }
+    timings = Timings() if args.timings else None
+    if timings is not None:
+        options["timings"] = timings
+    if args.hashes:
+        # pip wants what packages require pinned, even the ones chill
+        # leaves out, such as setuptools. _hashes leaves out the ones
+        # nothing requires.
+        options["show_all"] = True
+
+    # What is analysed instead of the running environment, if not given
+    # with --path.
+    source = None
+    if args.wheelhouse is not None:
+        from pip_chill.wheelhouse import iter_wheelhouse
+
+        source = args.wheelhouse
+        options["metadata"] = iter_wheelhouse(args.wheelhouse, args.jobs)
+    elif args.rootfs is not None:
+        source = args.rootfs
+        options["paths"] = _rootfs(parser, args.rootfs)
+        options["environment"] = _image_markers(
+            options["paths"], marker_environment
+        )
+    elif args.image_tar is not None:
+        source = args.image_tar
+        options["metadata"] = _image_tar(parser, args.image_tar)
+        options["environment"] = _image_markers(
+            [record.path for record in options["metadata"]],
+            marker_environment,
+        )
+
+    if args.sizes:
+        _sizes(parser, args, options)
+        return
+
+    if args.check:
+        _check(parser, args, options)
+
+    if args.tree:
+        _tree(parser, args, options)
+        return
+
+    # Machine readable formats always include dependencies, and so do
+    # diffs, which tell packages that became dependencies, and hashes, as
+    # pip wants every dependency pinned.
+    dependencies = (
+        args.verbose
+        or args.format != "text"
+        or args.diff is not None
+        or args.hashes
+    )
+    if args.why or args.orphans_if_removed:
+        results = [
+            (
+                args.paths[0] if args.paths else source,
+                _closure(parser, args, options),
+            )
+        ]
+    elif not args.paths:
+        results = [
+            (
+                source,
+                pip_chill.iter_chill(
+                    dependencies=dependencies,
+                    sort=not args.unsorted,
+                    **options,
+                ),
+            )
+        ]
+    else:
+        results = (
+            (environment, packages + others if dependencies else packages)
+            for environment, (
+                packages,
+                others,
+            ) in pip_chill.chill_environments(
+                args.paths,
+                processes=args.processes,
+                sort=not args.unsorted,
+                **options,
+            )
+        )
+
+    if args.used_by is not None:
+        results = _used_by(args, results, options.get("paths"))
+
+    if args.diff is not None:
+        _diff(
+            parser,
+            args,
+            (
+                distribution
+                for _, distributions in results
+                for distribution in distributions
+            ),
+        )
+
+    if args.hashes:
+        # Digests pip recorded are looked up where distributions were
+        # installed, which the metadata of uninstalled ones doesn't have.
+        _hashes(
+            parser,
+            args,
+            results,
+            [] if "metadata" in options else options.get("paths"),
+        )
+        return
 
-    distributions, dependencies = pip_chill.chill(
-        show_all=args.show_all,
-        no_chill=args.no_chill,
-        no_version=args.no_version,
+    # Results for more than one environment are tagged with a comment.
+    render(
+        results,
+        sys.stdout,
+        args.format,
+        tagged=args.paths is not None and len(args.paths) > 1,
+        timings=timings,
     )
-    for package in distributions:
-        print(package)
 
-    if args.verbose:
-        for package in dependencies:
-            print(package)
+    if timings is not None:
+        timings.close()
+        print(timings.report(), file=sys.stderr)
 
 
 if __name__ == "__main__":
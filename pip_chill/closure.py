@@ -0,0 +1,238 @@
+"""Precomputed answers to why a package is installed, and what needs it"""
+
+from array import array
+from collections.abc import Sequence
+
+from .graph import DependencyGraph
+
+
+class ClosureIndex:
+    """
+    Answers, for any package of a DependencyGraph, which top-level packages
+    need it (directly or through other packages) and which packages would
+    no longer be needed by any top-level package if it were removed.
+
+    Top-level packages are the ones chill lists: the installed ones nothing
+    requires, and the ones in dependency cycles nothing else requires. The
+    index is built once, in a few passes over the graph:
+
+    * each node gets a bitset (a Python int) of the top-level packages it
+      is reachable from, so finding them is a single lookup;
+    * the dominator tree of the graph, rooted at a virtual node requiring
+      every top-level package, is numbered in preorder. A package is only
+      needed through another when it's in that one's subtree, and every
+      subtree is a contiguous range of the numbering.
+
+    The index doesn't follow later changes to the graph.
+    """
+
+    __slots__ = (
+        "graph",
+        "roots",
+        "_masks",
+        "_order",
+        "_start",
+        "_end",
+    )
+
+    def __init__(self, graph: DependencyGraph):
+        self.graph = graph
+        self.roots = [node for group in graph.top_level() for node in group]
+        order = self._reverse_postorder()
+        self._masks = self._root_masks(order)
+        idoms = self._dominators(order)
+        self._order, self._start, self._end = self._number(idoms)
+
+    def _reverse_postorder(self) -> list[int]:
+        """
+        Returns the nodes reachable from the top-level packages, in reverse
+        postorder of a depth first search from them.
+        """
+        graph = self.graph
+        visited = bytearray(len(graph))
+        postorder: list[int] = []
+        for root in self.roots:
+            if visited[root]:
+                continue
+            visited[root] = 1
+            stack = [(root, iter(graph.requires(root)))]
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    if not visited[child]:
+                        visited[child] = 1
+                        stack.append((child, iter(graph.requires(child))))
+                        break
+                else:
+                    stack.pop()
+                    postorder.append(node)
+        postorder.reverse()
+        return postorder
+
+    def _root_masks(self, order: list[int]) -> list[int]:
+        """
+        Returns, for each node, the bitset of the top-level packages it can
+        be reached from. Bit i stands for self.roots[i].
+        """
+        graph = self.graph
+        masks = [0] * len(graph)
+        for bit, root in enumerate(self.roots):
+            masks[root] = 1 << bit
+        # Parents come before children in reverse postorder, except along
+        # cycles, which may take another pass to settle.
+        changed = True
+        while changed:
+            changed = False
+            for node in order:
+                mask = masks[node]
+                for parent in graph.required_by(node):
+                    mask |= masks[parent]
+                if mask != masks[node]:
+                    masks[node] = mask
+                    changed = True
+        return masks
+
+    def _dominators(self, order: list[int]) -> list[int]:
+        """
+        Returns the immediate dominator of each node: the virtual root
+        requiring all top-level packages, numbered len(graph), for the
+        top-level packages themselves and -1 for nodes they don't reach.
+
+        This is the iterative algorithm of Cooper, Harvey and Kennedy, "A
+        Simple, Fast Dominance Algorithm".
+        """
+        graph = self.graph
+        virtual = len(graph)
+        # Positions in reverse postorder. The virtual root comes first.
+        position = [-1] * (virtual + 1)
+        for index, node in enumerate(order):
+            position[node] = index
+        idoms = [-1] * (virtual + 1)
+        idoms[virtual] = virtual
+        for root in self.roots:
+            idoms[root] = virtual
+        # Top-level packages in cycles are required by others, but only
+        # the virtual root dominates them.
+        others = [node for node in order if idoms[node] == -1]
+
+        changed = True
+        while changed:
+            changed = False
+            for node in others:
+                idom = -1
+                for parent in graph.required_by(node):
+                    if idoms[parent] == -1:
+                        continue
+                    if idom == -1:
+                        idom = parent
+                        continue
+                    # The nearest common dominator of parent and idom.
+                    while parent != idom:
+                        while position[parent] > position[idom]:
+                            parent = idoms[parent]
+                        while position[idom] > position[parent]:
+                            idom = idoms[idom]
+                if idom != -1 and idoms[node] != idom:
+                    idoms[node] = idom
+                    changed = True
+        return idoms
+
+    def _number(self, idoms: list[int]) -> tuple[array, array, array]:
+        """
+        Numbers the dominator tree in preorder. Returns the nodes in that
+        order and, for each node, where its subtree starts and ends.
+        """
+        virtual = len(idoms) - 1
+        children: list[list[int]] = [[] for _ in idoms]
+        for node, idom in enumerate(idoms):
+            if idom != -1 and node != virtual:
+                children[idom].append(node)
+
+        order = array("I")
+        start = array("l", [-1]) * len(idoms)
+        end = array("l", [-1]) * len(idoms)
+        stack = [(virtual, False)]
+        while stack:
+            node, done = stack.pop()
+            if done:
+                end[node] = len(order)
+                continue
+            start[node] = len(order)
+            if node != virtual:
+                order.append(node)
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children[node]))
+        return order, start, end
+
+    def _node(self, name: str) -> int:
+        node = self.graph.get(name)
+        if node is None or not self.graph.is_installed(node):
+            raise KeyError(name)
+        return node
+
+    def needed_by(self, name: str) -> list[int]:
+        """
+        Returns the top-level packages that need name, directly or through
+        other packages. A top-level package only needs itself. Raises
+        KeyError if name isn't installed.
+        """
+        bits = bin(self._masks[self._node(name)])[:1:-1]
+        roots = []
+        bit = bits.find("1")
+        while bit != -1:
+            roots.append(self.roots[bit])
+            bit = bits.find("1", bit + 1)
+        return roots
+
+    def orphans_if_removed(self, name: str) -> list[int]:
+        """
+        Returns the packages no top-level package would need any more if
+        name were removed. Raises KeyError if name isn't installed.
+        """
+        node = self._node(name)
+        if self._start[node] == -1:
+            # Not needed by any top-level package.
+            return []
+        return [
+            orphan
+            for orphan in self._order[self._start[node] + 1 : self._end[node]]
+            if self.graph.is_installed(orphan)
+        ]
+
+    def weigh(
+        self, weights: Sequence[int]
+    ) -> tuple[list[int], list[int], int]:
+        """
+        Adds up weights, such as sizes, given for each node. Returns, in
+        the order of roots, the weight of what each top-level package needs
+        (itself included) and of what only it needs, which removing it
+        would orphan, and the weight of what several of them need.
+        """
+        # A subtree of the dominator tree is a range of the numbering, so
+        # its weight is a difference of prefix sums.
+        prefix = [0]
+        for node in self._order:
+            prefix.append(prefix[-1] + weights[node])
+        exclusive = [
+            prefix[self._end[root]] - prefix[self._start[root]]
+            for root in self.roots
+        ]
+
+        # Packages deep in the graph are needed by many top-level packages,
+        # often the same ones, so each set of them is walked once.
+        by_mask: dict[int, int] = {}
+        for node, mask in enumerate(self._masks):
+            if mask and weights[node]:
+                by_mask[mask] = by_mask.get(mask, 0) + weights[node]
+
+        totals = [0] * len(self.roots)
+        shared = 0
+        for mask, weight in by_mask.items():
+            if mask & (mask - 1):
+                shared += weight
+            bits = bin(mask)[:1:-1]
+            bit = bits.find("1")
+            while bit != -1:
+                totals[bit] += weight
+                bit = bits.find("1", bit + 1)
+        return totals, exclusive, shared
@@ -0,0 +1,408 @@
+"""Locates installed distributions and reads the metadata we need"""
+
+import errno
+import functools
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from collections.abc import Callable, Iterable, Iterator
+
+# importlib.metadata, pathlib, glob and concurrent.futures are slow to
+# import and only needed on some paths, so they are imported where used.
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from importlib import metadata
+    from typing import BinaryIO
+
+    from .cache import MetadataCache
+    from .timings import Timings
+
+METADATA_SUFFIXES = (".dist-info", ".egg-info")
+HEADER_CHUNK_SIZE = 64 * 1024
+
+
+class DistributionMetadata(
+    namedtuple(
+        "DistributionMetadata",
+        ("name", "version", "requires", "path"),
+        defaults=((), None),
+    )
+):
+    """
+    The subset of a distribution's metadata pip-chill works with: its name
+    and version (either may be None for broken distributions), a tuple of
+    requirement strings and the path of its metadata directory.
+    """
+
+    __slots__ = ()
+
+
+def from_distribution(
+    distribution: "metadata.Distribution", path: str | None = None
+) -> DistributionMetadata:
+    """
+    Extracts a DistributionMetadata from an importlib.metadata Distribution.
+    """
+    return DistributionMetadata(
+        distribution.name,
+        distribution.version,
+        tuple(distribution.requires or ()),
+        path,
+    )
+
+
+def read_headers(metadata_file: "BinaryIO") -> tuple[bytes, int]:
+    """
+    Returns the header block of a METADATA file, stopping at the blank
+    line that separates it from the (often huge) description, and the
+    number of bytes read.
+    """
+    headers = b""
+    while chunk := metadata_file.read(HEADER_CHUNK_SIZE):
+        start = max(len(headers) - 3, 0)
+        headers += chunk
+        for separator in (b"\n\n", b"\r\n\r\n"):
+            end = headers.find(separator, start)
+            if end != -1:
+                return headers[:end], len(headers)
+    return headers, len(headers)
+
+
+def parse_headers(headers: bytes, path: str) -> DistributionMetadata | None:
+    """
+    Returns the name, version and requirements in the header block of a
+    METADATA file, the one of the distribution at path.
+
+    Returns None when the headers look unusual, in which case the caller
+    should fall back to a full email parser.
+    """
+    try:
+        text = headers.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+    name = version = None
+    requires = []
+    field = None
+    for line in text.splitlines():
+        if line[:1] in (" ", "\t"):
+            # A folded header. We don't expect our fields to be folded.
+            if field in ("name", "version", "requires-dist"):
+                return None
+            continue
+        field, separator, value = line.partition(":")
+        if not separator:
+            return None
+        field = field.lower()
+        value = value.lstrip(" \t")
+        if field == "name":
+            name = name or value
+        elif field == "version":
+            version = version or value
+        elif field == "requires-dist":
+            requires.append(value)
+
+    if not name or not version:
+        return None
+    return DistributionMetadata(name, version, tuple(requires), path)
+
+
+def parse_message(
+    contents: bytes, path: str, requires: tuple[str, ...] = ()
+) -> DistributionMetadata | None:
+    """
+    Returns the name, version and requirements in a METADATA or PKG-INFO
+    file, the one of the distribution at path, parsed with the email
+    parser. requires are added to the requirements in the file, for
+    egg-info directories that keep them in requires.txt.
+
+    Returns None if the file has no name.
+    """
+    from email.parser import BytesParser
+
+    message = BytesParser().parsebytes(contents, headersonly=True)
+    if message["Name"] is None:
+        return None
+    return DistributionMetadata(
+        str(message["Name"]),
+        None if message["Version"] is None else str(message["Version"]),
+        tuple(map(str, message.get_all("Requires-Dist") or ())) + requires,
+        path,
+    )
+
+
+def read_dist_info(
+    path: str, timings: "Timings | None" = None
+) -> DistributionMetadata | None:
+    """
+    Reads the name, version and requirements from the METADATA headers of
+    the dist-info directory at path, without parsing the whole file.
+
+    Returns None when the file is missing or looks unusual, in which case
+    the caller should fall back to importlib.metadata.
+    """
+    try:
+        with open(os.path.join(path, "METADATA"), "rb") as metadata_file:
+            headers, size = read_headers(metadata_file)
+    except OSError:
+        return None
+    if timings is not None:
+        timings.count("metadata", "bytes read", size)
+    return parse_headers(headers, path)
+
+
+def read_metadata(
+    path: str, timings: "Timings | None" = None
+) -> DistributionMetadata:
+    """
+    Reads the metadata of the distribution stored in the dist-info or
+    egg-info directory at path.
+    """
+    if path.lower().endswith(".dist-info"):
+        record = read_dist_info(path, timings)
+        if record is not None:
+            return record
+
+    if timings is not None:
+        timings.count("metadata", "read by importlib")
+
+    import pathlib
+    from importlib import metadata
+
+    return from_distribution(
+        metadata.PathDistribution(pathlib.Path(path)), path
+    )
+
+
+def environment_paths(directory: str | os.PathLike) -> list[str]:
+    """
+    Returns the site-packages directories of the environment at directory.
+
+    directory can be the prefix of a virtualenv or Python installation, in
+    which case its site-packages directories are looked up, or a
+    site-packages directory itself. Raises FileNotFoundError if it doesn't
+    exist.
+    """
+    import glob
+
+    directory = os.path.abspath(os.fspath(directory))
+    if not os.path.exists(directory):
+        raise FileNotFoundError(
+            errno.ENOENT, "No such environment", directory
+        )
+    found = sorted(
+        path
+        for pattern in (
+            os.path.join("lib", "python*", "site-packages"),
+            os.path.join("lib64", "python*", "site-packages"),
+            os.path.join("Lib", "site-packages"),
+        )
+        for path in glob.glob(os.path.join(glob.escape(directory), pattern))
+        if os.path.isdir(path)
+    )
+    # lib64 is often a symlink to lib.
+    unique = list({os.path.realpath(path): path for path in found}.values())
+    return unique or [directory]
+
+
+def python_version(paths: Iterable[str]) -> str | None:
+    """
+    Returns the X.Y Python version site-packages (or Debian's dist-packages)
+    directories in paths were made for, taken from their lib/pythonX.Y
+    parent, or None if unknown.
+    """
+    for path in paths:
+        match = re.search(
+            r"python(\d+\.\d+)t?[\\/](?:site|dist)-packages$", path
+        )
+        if match is not None:
+            return match[1]
+    return None
+
+
+def metadata_entries(directory: str) -> list[os.DirEntry] | None:
+    """
+    Returns the dist-info and egg-info entries in directory, sorted by name,
+    or None if directory can't be listed. For an unzipped egg, that is its
+    EGG-INFO directory.
+    """
+    egg = directory.lower().endswith(".egg")
+    try:
+        with os.scandir(directory) as children:
+            return sorted(
+                (
+                    child
+                    for child in children
+                    if child.name.lower().endswith(METADATA_SUFFIXES)
+                    or (egg and child.name == "EGG-INFO")
+                ),
+                key=lambda child: child.name,
+            )
+    except OSError:
+        return None
+
+
+def distribution_key(name: str, version: str) -> tuple[str, str]:
+    """
+    Returns the canonical name and normalized version of a distribution,
+    which don't depend on how they are spelled, for use as a key.
+    """
+    from .requirements import canonicalize_name
+    from .versions import parse_version
+
+    parsed = parse_version(version)
+    return canonicalize_name(name), version if parsed is None else str(parsed)
+
+
+def metadata_directories(
+    paths: Iterable[str] | None = None,
+) -> dict[tuple[str, str], str]:
+    """
+    Returns the metadata directory of each distribution installed on
+    paths, which defaults to sys.path, by distribution_key of the name and
+    version their directory names give. Only directories are listed.
+    """
+    if paths is None:
+        paths = sys.path
+
+    index = {}
+    for entry in paths:
+        directory = os.path.abspath(entry or os.curdir)
+        for child in metadata_entries(directory) or ():
+            # {name}-{version}.dist-info, {name}-{version}(-{python})?.egg-info
+            stem = os.path.splitext(child.name)[0]
+            name, _, rest = stem.partition("-")
+            version = rest.partition("-")[0]
+            if version:
+                index.setdefault(distribution_key(name, version), child.path)
+    return index
+
+
+def load_directory(
+    entry: str,
+    directory: str,
+    entries: list[os.DirEntry] | None,
+    cache: "MetadataCache | None",
+    map_function: Callable = map,
+    timings: "Timings | None" = None,
+) -> Iterator[DistributionMetadata]:
+    """
+    Yields the metadata of the distributions in one sys.path entry, found
+    in directory, its absolute path, reading the ones not found in cache
+    with map_function. entries are the metadata directories in it, as
+    metadata_entries returns them, None for entries that aren't a
+    directory.
+    """
+    if entries is None or (not entries and directory.lower().endswith(".egg")):
+        # Zip files, eggs without EGG-INFO and other unusual entries are
+        # left to importlib.
+        if entries is not None or os.path.isfile(directory):
+            from importlib import metadata
+
+            for distribution in metadata.distributions(path=[entry]):
+                yield from_distribution(distribution)
+        return
+
+    read = read_metadata
+    if timings is not None:
+        read = functools.partial(read_metadata, timings=timings)
+
+    if cache is None:
+        yield from map_function(read, [c.path for c in entries])
+        return
+
+    cache.mark_scanned(directory)
+    found = []
+    for child in entries:
+        try:
+            stat = child.stat()
+        except OSError:
+            continue
+        found.append((child.path, stat, cache.get(child.path, stat)))
+
+    missing = [path for path, _, cached in found if cached is None]
+    if timings is not None:
+        timings.count("metadata", "cache hits", len(found) - len(missing))
+    loaded = map_function(read, missing)
+    for _, stat, cached in found:
+        if cached is None:
+            cached = next(loaded)
+            cache.put(cached, stat)
+        yield cached
+
+
+def _timed(
+    listings: Iterator[list[os.DirEntry] | None], timings: "Timings | None"
+) -> Iterator[list[os.DirEntry] | None]:
+    """
+    Yields directory listings, adding the time it takes to get each one to
+    the discovery phase of timings.
+    """
+    if timings is None:
+        yield from listings
+        return
+    while True:
+        start = time.perf_counter()
+        entries = next(listings, False)
+        if entries is False:
+            return
+        timings.add("discovery", time.perf_counter() - start)
+        timings.count("discovery", "directories")
+        timings.count("discovery", "distributions", len(entries or ()))
+        yield entries
+
+
+def iter_metadata(
+    path_entries: Iterable[str] | None = None,
+    cache: "MetadataCache | None" = None,
+    workers: int | None = None,
+    timings: "Timings | None" = None,
+) -> Iterator[DistributionMetadata]:
+    """
+    Yields the metadata of every distribution found on path_entries, which
+    defaults to sys.path.
+
+    If a MetadataCache is given as cache, metadata directories whose stat
+    information didn't change since they were cached are not read again.
+
+    With more than one worker, directories are listed and metadata files
+    are read by a pool of threads. Results are still yielded in the same
+    order as a serial scan.
+
+    If timings is given, the time spent listing directories is added to
+    its discovery phase, and what was read is counted.
+    """
+    if path_entries is None:
+        path_entries = sys.path
+
+    # An empty entry on sys.path means the current directory.
+    path_entries = list(path_entries)
+    directories = [
+        os.path.abspath(entry or os.curdir) for entry in path_entries
+    ]
+
+    if workers is None or workers <= 1:
+        listings = _timed(map(metadata_entries, directories), timings)
+        for entry, directory, entries in zip(
+            path_entries, directories, listings
+        ):
+            yield from load_directory(
+                entry, directory, entries, cache, timings=timings
+            )
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(workers) as executor:
+        listings = _timed(
+            executor.map(metadata_entries, directories), timings
+        )
+        for entry, directory, entries in zip(
+            path_entries, directories, listings
+        ):
+            yield from load_directory(
+                entry, directory, entries, cache, executor.map, timings
+            )
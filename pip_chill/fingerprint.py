@@ -0,0 +1,101 @@
+"""Digests telling whether the packages of an environment changed"""
+
+import hashlib
+import os
+import sys
+from collections.abc import Iterable, Mapping
+
+from .discovery import metadata_entries
+
+
+def _update(digest, text: str) -> None:
+    digest.update(text.encode("utf-8", "surrogateescape") + b"\n")
+
+
+def fingerprint(
+    paths: Iterable[str] | None = None, record_mtimes: bool = False
+) -> str:
+    """
+    Returns a SHA-256 hex digest of the distributions installed on paths,
+    which defaults to sys.path, computed from directory listings only.
+
+    The names of dist-info and egg-info directories encode the name and
+    version of their distribution, so no metadata file is read. With
+    record_mtimes, the modification time of each RECORD file is included
+    too, which tells reinstalls of the same version apart.
+
+    The digest doesn't depend on where the directories are, so equivalent
+    environments on different machines get the same one.
+    """
+    if paths is None:
+        paths = sys.path
+
+    digest = hashlib.sha256()
+    for entry in paths:
+        directory = os.path.abspath(entry or os.curdir)
+        entries = metadata_entries(directory)
+        if entries is None:
+            # Zip files and other entries that aren't directories.
+            try:
+                stat = os.stat(directory)
+            except OSError:
+                continue
+            _update(
+                digest,
+                f"{os.path.basename(directory)} {stat.st_size} "
+                f"{stat.st_mtime_ns}",
+            )
+            continue
+
+        for child in entries:
+            if not record_mtimes:
+                _update(digest, child.name)
+                continue
+            try:
+                mtime = os.stat(
+                    os.path.join(child.path, "RECORD")
+                ).st_mtime_ns
+            except OSError:
+                mtime = None
+            _update(digest, f"{child.name} {mtime}")
+    return digest.hexdigest()
+
+
+def top_level_fingerprints(
+    paths: Iterable[str] | None = None,
+    show_all: bool = False,
+    no_chill: bool = False,
+    environment: Mapping[str, str] | None = None,
+) -> dict[str, str]:
+    """
+    Returns a SHA-256 hex digest for each package chill lists, by name, of
+    the names and versions of that package and of everything it needs,
+    directly or not. A digest only changes when one of those does.
+
+    Unlike fingerprint, this reads the metadata of every distribution to
+    build the dependency graph. See dependency_graph for the meaning of
+    the arguments.
+    """
+    from .closure import ClosureIndex
+    from .pip_chill import dependency_graph
+
+    graph = dependency_graph(
+        show_all=show_all,
+        no_chill=no_chill,
+        paths=paths,
+        environment=environment,
+    )
+    index = ClosureIndex(graph)
+    digests = {root: hashlib.sha256() for root in index.roots}
+    for node in sorted(graph, key=graph.names.__getitem__):
+        if not graph.is_installed(node):
+            continue
+        line = f"{graph.names[node]}=={graph.versions[node]}"
+        for root in index.needed_by(graph.names[node]):
+            _update(digests[root], line)
+    return {
+        graph.names[root]: digest.hexdigest()
+        for root, digest in sorted(
+            digests.items(), key=lambda item: graph.names[item[0]]
+        )
+    }
@@ -0,0 +1,272 @@
+"""Compact dependency graph of installed distributions"""
+
+from array import array
+from collections.abc import Iterable, Iterator
+
+from .requirements import canonicalize_name
+
+
+class DependencyGraph:
+    """
+    A directed graph where an edge goes from a distribution to each of the
+    distributions it requires.
+
+    Package names are interned to consecutive integer ids, looked up by
+    their PEP 503 normalised form, so that Foo_Bar and foo-bar are the same
+    node. The name a node is displayed with is the one its distribution
+    was installed with or, if it isn't installed, the one it was first
+    required with. Edges are
+    collected in two flat arrays and, when first queried, laid out as
+    compressed sparse rows: for node n, its neighbours are
+    targets[offsets[n]:offsets[n + 1]]. This keeps a graph of tens of
+    thousands of packages in a handful of arrays instead of one object,
+    dict and set per package.
+    """
+
+    __slots__ = (
+        "names",
+        "versions",
+        "_ids",
+        "_sources",
+        "_targets",
+        "_requires",
+        "_required_by",
+    )
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self.versions: list[str | None] = []
+        self._ids: dict[str, int] = {}
+        self._sources = array("I")
+        self._targets = array("I")
+        self._requires: tuple[array, array] | None = None
+        self._required_by: tuple[array, array] | None = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return canonicalize_name(name) in self._ids
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__module__}.{self.__class__.__name__} with "
+            f"{len(self)} nodes and {len(self._sources)} edges>"
+        )
+
+    def node(self, name: str) -> int:
+        """
+        Returns the id of name, adding it to the graph if it's not there.
+        """
+        key = canonicalize_name(name)
+        node = self._ids.get(key)
+        if node is None:
+            node = self._ids[key] = len(self.names)
+            self.names.append(name)
+            self.versions.append(None)
+            self._requires = self._required_by = None
+        return node
+
+    def get(self, name: str) -> int | None:
+        """
+        Returns the id of name, or None if it's not in the graph.
+        """
+        return self._ids.get(canonicalize_name(name))
+
+    def add_distribution(self, name: str, version: str | None) -> int:
+        """
+        Records that name is installed with version and returns its id.
+        """
+        node = self.node(name)
+        self.names[node] = name
+        self.versions[node] = version
+        return node
+
+    def add_edge(self, source: int, target: int) -> None:
+        """
+        Records that node source requires node target.
+        """
+        self._sources.append(source)
+        self._targets.append(target)
+        self._requires = self._required_by = None
+
+    def remove_distributions(self, nodes: Iterable[int]) -> None:
+        """
+        Records that nodes are no longer installed and drops the edges going
+        out of them. Nodes keep their ids, and the edges of the nodes that
+        require them, as requirements that aren't installed.
+        """
+        removed = set(nodes)
+        if not removed:
+            return
+        for node in removed:
+            self.versions[node] = None
+        kept = [
+            (source, target)
+            for source, target in zip(self._sources, self._targets)
+            if source not in removed
+        ]
+        self._sources = array("I", [source for source, _ in kept])
+        self._targets = array("I", [target for _, target in kept])
+        self._requires = self._required_by = None
+
+    def clear_edges(self) -> None:
+        """
+        Drops every edge, keeping the nodes.
+        """
+        self._sources = array("I")
+        self._targets = array("I")
+        self._requires = self._required_by = None
+
+    def is_installed(self, node: int) -> bool:
+        """
+        Returns whether node is an installed distribution, as opposed to a
+        requirement that was never installed.
+        """
+        return self.versions[node] is not None
+
+    @property
+    def edge_count(self) -> int:
+        """
+        Number of distinct edges in the graph.
+        """
+        offsets, _ = self._rows(reverse=False)
+        return offsets[-1]
+
+    def _rows(self, reverse: bool) -> tuple[array, array]:
+        """
+        Returns the (offsets, neighbours) compressed rows for the requires
+        (or, if reverse, the required-by) direction, building them if the
+        graph changed since they were last built.
+        """
+        rows = self._required_by if reverse else self._requires
+        if rows is not None:
+            return rows
+
+        if reverse:
+            sources, targets = self._targets, self._sources
+        else:
+            sources, targets = self._sources, self._targets
+
+        # Counting sort of the edges by source node.
+        size = len(self.names)
+        counts = array("I", [0]) * (size + 1)
+        for source in sources:
+            counts[source + 1] += 1
+        for node in range(size):
+            counts[node + 1] += counts[node]
+        positions = array("I", counts)
+        neighbours = array("I", [0]) * len(targets)
+        for source, target in zip(sources, targets):
+            neighbours[positions[source]] = target
+            positions[source] += 1
+
+        # Sort each row and drop duplicate edges.
+        offsets = array("I", [0])
+        unique = array("I")
+        for node in range(size):
+            unique.extend(
+                sorted(set(neighbours[counts[node] : counts[node + 1]]))
+            )
+            offsets.append(len(unique))
+
+        rows = (offsets, unique)
+        if reverse:
+            self._required_by = rows
+        else:
+            self._requires = rows
+        return rows
+
+    def requires(self, node: int) -> array:
+        """
+        Returns the ids of the nodes node requires.
+        """
+        offsets, neighbours = self._rows(reverse=False)
+        return neighbours[offsets[node] : offsets[node + 1]]
+
+    def required_by(self, node: int) -> array:
+        """
+        Returns the ids of the nodes that require node.
+        """
+        offsets, neighbours = self._rows(reverse=True)
+        return neighbours[offsets[node] : offsets[node + 1]]
+
+    def in_degree(self, node: int) -> int:
+        """
+        Returns how many distinct nodes require node.
+        """
+        offsets, _ = self._rows(reverse=True)
+        return offsets[node + 1] - offsets[node]
+
+    def top_level(self) -> list[list[int]]:
+        """
+        Returns the groups of installed nodes nothing outside the group
+        requires, each sorted by id: single packages nothing requires, and
+        dependency cycles nothing else requires.
+
+        Groups are the strongly connected components of the graph, found
+        with Tarjan's algorithm, with no edges coming in from other
+        components. Finding them takes time linear in the size of the
+        graph, and doesn't depend on the order nodes were added in.
+        """
+        offsets, neighbours = self._rows(reverse=False)
+        size = len(self.names)
+        # Order of discovery, lowest order reachable and component of each
+        # node. A node visited but without a component is on the stack.
+        order = array("l", [-1]) * size
+        low = array("l", [0]) * size
+        component = array("l", [-1]) * size
+        components: list[list[int]] = []
+        stack: list[int] = []
+        visited = 0
+
+        for root in range(size):
+            if order[root] != -1:
+                continue
+            order[root] = low[root] = visited
+            visited += 1
+            stack.append(root)
+            # Nodes being visited, with the position of their next edge.
+            path = [(root, offsets[root])]
+            while path:
+                node, edge = path[-1]
+                if edge < offsets[node + 1]:
+                    path[-1] = (node, edge + 1)
+                    child = neighbours[edge]
+                    if order[child] == -1:
+                        order[child] = low[child] = visited
+                        visited += 1
+                        stack.append(child)
+                        path.append((child, offsets[child]))
+                    elif component[child] == -1 and order[child] < low[node]:
+                        low[node] = order[child]
+                    continue
+
+                path.pop()
+                if path and low[node] < low[path[-1][0]]:
+                    low[path[-1][0]] = low[node]
+                if low[node] == order[node]:
+                    members = []
+                    member = -1
+                    while member != node:
+                        member = stack.pop()
+                        component[member] = len(components)
+                        members.append(member)
+                    components.append(members)
+
+        required = bytearray(len(components))
+        for node in range(size):
+            for child in neighbours[offsets[node] : offsets[node + 1]]:
+                if component[child] != component[node]:
+                    required[component[child]] = 1
+
+        groups = []
+        for number, members in enumerate(components):
+            if not required[number]:
+                installed = sorted(filter(self.is_installed, members))
+                if installed:
+                    groups.append(installed)
+        return groups
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self.names)))
@@ -0,0 +1,172 @@
+"""Finds the digests pip checks in --require-hashes mode"""
+
+import hashlib
+import os
+from collections.abc import Iterable
+
+from .discovery import distribution_key, metadata_directories
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from .pip_chill import Distribution
+
+# Files are hashed in blocks this large, into a reused buffer.
+HASH_BUFFER_SIZE = 1024 * 1024
+
+# The archives a distribution can be installed from.
+ARCHIVE_SUFFIXES = (".whl", ".tar.gz", ".zip")
+
+
+def file_hash(path: str) -> str:
+    """
+    Returns the SHA-256 digest of the file at path, as pip's --hash option
+    takes it.
+    """
+    digest = hashlib.sha256()
+    buffer = bytearray(HASH_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as archive:
+        while size := archive.readinto(buffer):
+            digest.update(view[:size])
+    return f"sha256:{digest.hexdigest()}"
+
+
+def recorded_hashes(metadata_directory: str) -> list[str]:
+    """
+    Returns the digests of the archive the distribution whose metadata is
+    in metadata_directory was installed from, as pip recorded them in its
+    direct_url.json file, or an empty list if it didn't.
+    """
+    import json
+
+    try:
+        with open(
+            os.path.join(metadata_directory, "direct_url.json"),
+            encoding="utf-8",
+        ) as direct_url:
+            archive_info = json.load(direct_url).get("archive_info", {})
+    except (OSError, ValueError, AttributeError):
+        return []
+
+    hashes = archive_info.get("hashes") or {}
+    if not hashes and "=" in archive_info.get("hash", ""):
+        # The older, single "<algorithm>=<digest>" form.
+        algorithm, _, value = archive_info["hash"].partition("=")
+        hashes = {algorithm: value}
+    value = hashes.get("sha256")
+    return [] if not value else [f"sha256:{value}"]
+
+
+def archive_index(directory: str) -> dict[tuple[str, str], list[str]]:
+    """
+    Returns the wheels and source archives in directory and the
+    directories below it, such as a wheel cache, by name and version, as
+    their file names give them.
+    """
+    index: dict[tuple[str, str], list[str]] = {}
+    for parent, _, files in os.walk(directory):
+        for file in sorted(files):
+            lower = file.lower()
+            if lower.endswith(".whl"):
+                # {name}-{version}(-{build})?-{python}-{abi}-{platform}.whl
+                name, _, rest = file.partition("-")
+                version = rest.partition("-")[0]
+            elif lower.endswith(ARCHIVE_SUFFIXES):
+                # {name}-{version}.tar.gz, where name may hold dashes.
+                suffix = ".tar.gz" if lower.endswith(".gz") else ".zip"
+                name, _, version = file[: -len(suffix)].rpartition("-")
+            else:
+                continue
+            if name and version:
+                index.setdefault(distribution_key(name, version), []).append(
+                    os.path.join(parent, file)
+                )
+    return index
+
+
+def find_hashes(
+    distributions: Iterable["Distribution"],
+    paths: Iterable[str] | None = None,
+    archives: str | None = None,
+    workers: int | None = None,
+) -> dict[tuple[str, str], list[str]]:
+    """
+    Returns the digests pip would check for each of distributions, by
+    canonical name and version, sorted.
+
+    The digests pip recorded when installing from an archive, in the
+    direct_url.json file of the distributions installed on paths (sys.path
+    if None), are used as they are. The others come from hashing the
+    wheels and source archives of the same name and version found in the
+    archives directory, if given, with workers threads (as many as
+    ThreadPoolExecutor picks if None, serially if 1). Distributions no
+    digest was found for are left out.
+    """
+    installed = metadata_directories(paths)
+    found = archive_index(archives) if archives is not None else {}
+
+    hashes: dict[tuple[str, str], list[str]] = {}
+    pending: dict[tuple[str, str], list[str]] = {}
+    for distribution in distributions:
+        if distribution.version is None:
+            continue
+        key = distribution_key(distribution.name, distribution.version)
+        recorded = []
+        if key in installed:
+            recorded = recorded_hashes(installed[key])
+        if recorded:
+            hashes[key] = recorded
+        elif key in found:
+            pending[key] = found[key]
+
+    files = [file for archives in pending.values() for file in archives]
+    if workers == 1:
+        digests = list(map(file_hash, files))
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(workers) as executor:
+            digests = list(executor.map(file_hash, files))
+    computed = iter(digests)
+    for key, archives in pending.items():
+        hashes[key] = [next(computed) for _ in archives]
+
+    return {key: sorted(set(value)) for key, value in hashes.items()}
+
+
+def distribution_hashes(
+    distribution: "Distribution", hashes: dict[tuple[str, str], list[str]]
+) -> list[str]:
+    """
+    Returns the digests of distribution in hashes, as find_hashes returns
+    them, empty if there are none.
+    """
+    if distribution.version is None:
+        return []
+    key = distribution_key(distribution.name, distribution.version)
+    return hashes.get(key, [])
+
+
+def hashed_requirement(
+    distribution: "Distribution", hashes: dict[tuple[str, str], list[str]]
+) -> str:
+    """
+    Returns the line of a requirements file pinning distribution to its
+    version and digests in hashes, as find_hashes returns them. Every
+    dependency has to be pinned in --require-hashes mode, so dependencies
+    aren't commented out, but what requires them is still noted.
+    """
+    line = f"{distribution.name}=={distribution.version}"
+    for digest in distribution_hashes(distribution, hashes):
+        line += f" --hash={digest}"
+    if distribution.required_by:
+        line += (
+            " # Installed as dependency for "
+            f"{', '.join(sorted(distribution.required_by))}"
+        )
+    elif distribution.cycle:
+        line += (
+            " # Installed in a cycle with "
+            f"{', '.join(sorted(distribution.cycle))}"
+        )
+    return line
@@ -0,0 +1,260 @@
+"""Reads the metadata of the distributions in container images"""
+
+import errno
+import os
+import posixpath
+import re
+import tarfile
+from collections.abc import Iterable
+
+from .discovery import (
+    DistributionMetadata,
+    parse_headers,
+    parse_message,
+    read_headers,
+)
+
+# Where distributions are installed in an image, relative to its root:
+# the system Python and the one in /usr/local, with Debian's dist-packages,
+# conda and virtualenvs under /opt, and user installs.
+ROOTFS_PATTERNS = (
+    "usr/lib*/python3*/*-packages",
+    "usr/local/lib*/python3*/*-packages",
+    "opt/*/lib*/python3*/site-packages",
+    "opt/*/*/lib*/python3*/site-packages",
+    "root/.local/lib/python3*/site-packages",
+    "home/*/.local/lib/python3*/site-packages",
+)
+
+# The same directories in an image tarball, wherever they are.
+_SITE_PACKAGES = re.compile(
+    r"(?:^|/)lib(?:64)?/python3(?:\.\d+)?t?/(?:site|dist)-packages$"
+)
+
+# Aufs-style whiteouts, which docker and OCI layers use to delete files of
+# the layers below them.
+_WHITEOUT = ".wh."
+_OPAQUE = ".wh..wh..opq"
+
+# The files of a metadata directory we read.
+_HEADERS = ("METADATA", "PKG-INFO")
+_REQUIRES = "requires.txt"
+
+
+def rootfs_paths(root: str | os.PathLike) -> list[str]:
+    """
+    Returns the site-packages directories of the unpacked image at root.
+    Symbolic links are only followed when they stay inside root. Raises
+    NotADirectoryError if root isn't a directory.
+    """
+    import glob
+
+    root = os.path.abspath(os.fspath(root))
+    if not os.path.isdir(root):
+        raise NotADirectoryError(errno.ENOTDIR, "Not a directory", root)
+    real_root = os.path.realpath(root)
+    found = {}
+    for pattern in ROOTFS_PATTERNS:
+        pattern = os.path.join(glob.escape(root), pattern)
+        for path in sorted(glob.glob(pattern)):
+            real = os.path.realpath(path)
+            if os.path.isdir(path) and (
+                real == real_root or real.startswith(real_root + os.sep)
+            ):
+                # lib64 is often a symlink to lib.
+                found.setdefault(real, path)
+    return sorted(found.values())
+
+
+def _egg_requires(text: str) -> tuple[str, ...]:
+    """
+    Converts the sections of an egg-info requires.txt file, headed by
+    [extra], [:marker] or [extra:marker], into requirement strings with
+    environment markers, as in METADATA.
+    """
+    requires = []
+    marker = ""
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("["):
+            extra, _, condition = line.strip("[]").partition(":")
+            conditions = [f'extra == "{extra}"'] if extra else []
+            if condition:
+                conditions.append(f"({condition})" if extra else condition)
+            marker = " and ".join(conditions)
+        else:
+            requires.append(f"{line}; {marker}" if marker else line)
+    return tuple(requires)
+
+
+class _Layer:
+    """
+    What a layer holds that matters to us: the files we read of the
+    metadata directories in it, by directory, and the paths it deletes
+    from the layers below.
+    """
+
+    __slots__ = ("directories", "whiteouts", "opaque")
+
+    def __init__(self) -> None:
+        self.directories: dict[str, dict[str, bytes]] = {}
+        self.whiteouts: list[str] = []
+        self.opaque: list[str] = []
+
+    def add(self, archive: tarfile.TarFile, member: tarfile.TarInfo) -> bool:
+        """
+        Records member of archive, a file of this layer, if it is a
+        whiteout or a metadata file. Returns whether it was.
+        """
+        path = posixpath.normpath("/" + member.name)
+        directory, name = posixpath.split(path)
+        if name.startswith(_WHITEOUT):
+            if name == _OPAQUE:
+                self.opaque.append(directory)
+            else:
+                self.whiteouts.append(
+                    posixpath.join(directory, name[len(_WHITEOUT) :])
+                )
+            return True
+        if not member.isfile():
+            return False
+
+        parent, metadata = posixpath.split(directory)
+        if metadata == "EGG-INFO" and parent.endswith(".egg"):
+            parent = posixpath.dirname(parent)
+        elif not metadata.endswith((".dist-info", ".egg-info")):
+            if name.endswith(".egg-info") and _SITE_PACKAGES.search(
+                directory
+            ):
+                # A single file egg-info is a PKG-INFO file.
+                directory, name, parent = path, "PKG-INFO", directory
+            else:
+                return False
+        if name not in _HEADERS + (_REQUIRES,) or not _SITE_PACKAGES.search(
+            parent
+        ):
+            return False
+
+        extracted = archive.extractfile(member)
+        if name == _REQUIRES:
+            contents = extracted.read()
+        else:
+            # Only the headers, not the description that follows them.
+            contents, _ = read_headers(extracted)
+        self.directories.setdefault(directory, {})[name] = contents
+        return True
+
+    def apply(self, directories: dict[str, dict[str, bytes]]) -> None:
+        """
+        Lays this layer over directories, the metadata directories of the
+        layers below it.
+        """
+        for removed in self.whiteouts:
+            prefix = removed + "/"
+            for directory in [
+                d for d in directories if d == removed or d.startswith(prefix)
+            ]:
+                del directories[directory]
+            directory, name = posixpath.split(removed)
+            directories.get(directory, {}).pop(name, None)
+        for directory in self.opaque:
+            prefix = directory.rstrip("/") + "/"
+            for removed in [d for d in directories if d.startswith(prefix)]:
+                del directories[removed]
+        for directory, files in self.directories.items():
+            directories.setdefault(directory, {}).update(files)
+
+
+def _read_directory(
+    directory: str, files: dict[str, bytes]
+) -> DistributionMetadata | None:
+    headers = next((files[name] for name in _HEADERS if name in files), None)
+    if headers is None:
+        return None
+    requires = ()
+    if _REQUIRES in files:
+        requires = _egg_requires(
+            files[_REQUIRES].decode("utf-8", "replace")
+        )
+    record = parse_headers(headers, directory)
+    if record is None:
+        return parse_message(headers, directory, requires)
+    return record._replace(requires=record.requires + requires)
+
+
+def _layer_order(manifest: bytes) -> list[str]:
+    import json
+
+    try:
+        images = json.loads(manifest)
+        # A tarball can hold several images. We read the first one.
+        return [posixpath.normpath(layer) for layer in images[0]["Layers"]]
+    except (ValueError, LookupError, TypeError) as error:
+        raise tarfile.ReadError(f"unexpected manifest.json: {error}")
+
+
+def _is_layer(name: str) -> bool:
+    return name.endswith((".tar", ".tar.gz", ".tgz")) or name.startswith(
+        "blobs/"
+    )
+
+
+def read_image_tar(path: str | os.PathLike) -> list[DistributionMetadata]:
+    """
+    Returns the metadata of the distributions in the image tarball at
+    path, as `docker save` writes it (in either its legacy or its OCI
+    layout), with its layers laid over each other in the order its
+    manifest.json gives, whiteouts deleting what the layers below hold. A
+    tarball without manifest.json is read as a single layer, such as the
+    output of `docker export`. Compressed tarballs are fine too.
+
+    The tarball is read once, as a stream, and nothing is extracted: of
+    each metadata directory in a site-packages directory, only the
+    headers of its METADATA or PKG-INFO file and its requires.txt are
+    kept. Raises tarfile.ReadError if path isn't a readable tarball.
+
+    The result can be given as metadata to dependency_graph and chill, and
+    its paths, which are the paths in the image, to environment_markers.
+    """
+    layers: dict[str, _Layer] = {}
+    # The tarball itself, in case it is a single layer.
+    flat = _Layer()
+    manifest = None
+    with tarfile.open(path, "r|*") as archive:
+        for member in archive:
+            name = posixpath.normpath(member.name)
+            if flat.add(archive, member) or not member.isfile():
+                continue
+            if name == "manifest.json":
+                manifest = archive.extractfile(member).read()
+            elif _is_layer(name):
+                layer = _Layer()
+                try:
+                    with tarfile.open(
+                        fileobj=archive.extractfile(member), mode="r|*"
+                    ) as nested:
+                        for file in nested:
+                            layer.add(nested, file)
+                except tarfile.TarError:
+                    # Configs and manifests in blobs/ aren't tarballs.
+                    continue
+                layers[name] = layer
+
+    order: Iterable[_Layer] = [flat]
+    if manifest is not None:
+        names = _layer_order(manifest)
+        missing = [name for name in names if name not in layers]
+        if missing:
+            raise tarfile.ReadError(f"missing layer {missing[0]}")
+        order = [layers[name] for name in names]
+
+    directories: dict[str, dict[str, bytes]] = {}
+    for layer in order:
+        layer.apply(directories)
+    records = (
+        _read_directory(directory, files)
+        for directory, files in sorted(directories.items())
+    )
+    return [record for record in records if record is not None]
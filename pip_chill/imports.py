@@ -0,0 +1,326 @@
+"""Finds which installed distributions a project's sources import"""
+
+import ast
+import hashlib
+import os
+import re
+import sys
+from collections.abc import Iterable, Iterator
+
+from .discovery import metadata_entries
+from .requirements import canonicalize_name
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from .pip_chill import Distribution
+
+# Directories never scanned for sources, besides hidden ones such as .git
+# and virtualenvs, which hold a pyvenv.cfg file.
+SKIPPED_DIRECTORIES = {"__pycache__", "node_modules", "site-packages"}
+
+# Below this many files to parse, starting worker processes costs more
+# than it saves.
+PARALLEL_THRESHOLD = 64
+CHUNK_SIZE = 64
+
+# Used for sources ast can't parse, such as Python 2 files.
+_IMPORT = re.compile(
+    rb"^[ \t]*(?:from[ \t]+([A-Za-z_]\w*)|import[ \t]+([\w., \t]+))",
+    re.MULTILINE,
+)
+
+# The fields of statements that hold other statements, or except and case
+# clauses, which hold statements in their body.
+_BODIES = ("body", "orelse", "finalbody", "handlers", "cases")
+
+
+def _distribution_name(metadata_directory: str) -> str:
+    # {name}-{version}.dist-info and {name}-{version}(-{python})?.egg-info.
+    return canonicalize_name(
+        os.path.basename(metadata_directory).partition("-")[0]
+    )
+
+
+def _provided_modules(metadata_directory: str) -> set[str]:
+    """
+    Returns the top-level modules the distribution whose metadata is in
+    metadata_directory provides, from its top_level.txt file if it has
+    one, or else from the files its RECORD lists, as
+    importlib.metadata.packages_distributions finds them.
+    """
+    try:
+        with open(
+            os.path.join(metadata_directory, "top_level.txt"),
+            encoding="utf-8",
+        ) as top_level:
+            return {line.strip() for line in top_level if line.strip()}
+    except OSError:
+        pass
+
+    modules = set()
+    try:
+        with open(
+            os.path.join(metadata_directory, "RECORD"), encoding="utf-8"
+        ) as record:
+            for line in record:
+                path = line.partition(",")[0]
+                top, separator, _ = path.partition("/")
+                if separator:
+                    if not top.endswith((".dist-info", ".data", "..")):
+                        modules.add(top)
+                elif top.endswith(".py"):
+                    modules.add(top[:-3])
+                elif top.endswith((".so", ".pyd")):
+                    # Extension modules, such as name.cpython-312-x86_64.so.
+                    modules.add(top.partition(".")[0])
+    except OSError:
+        pass
+    return modules
+
+
+def module_index(paths: Iterable[str] | None = None) -> dict[str, set[str]]:
+    """
+    Returns the canonical names of the distributions installed on paths,
+    which defaults to sys.path, that provide each top-level module.
+    """
+    if paths is None:
+        paths = sys.path
+
+    index: dict[str, set[str]] = {}
+    for entry in paths:
+        directory = os.path.abspath(entry or os.curdir)
+        for child in metadata_entries(directory) or ():
+            name = _distribution_name(child.path)
+            for module in _provided_modules(child.path):
+                index.setdefault(module, set()).add(name)
+    return index
+
+
+def imported_modules(source: bytes) -> list[str]:
+    """
+    Returns the sorted top-level modules source imports, absolutely, at
+    any depth.
+    """
+    if b"import" not in source:
+        return []
+    modules = set()
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        for match in _IMPORT.finditer(source):
+            if match[1]:
+                modules.add(match[1].decode())
+            else:
+                for name in match[2].decode().split(","):
+                    modules.add(name.split()[0].partition(".")[0])
+        return sorted(module for module in modules if module)
+
+    # Imports are statements, so expressions, most of the tree, are never
+    # visited.
+    pending = list(tree.body)
+    while pending:
+        node = pending.pop()
+        for field in _BODIES:
+            pending.extend(getattr(node, field, ()))
+        if isinstance(node, ast.Import):
+            modules.update(
+                alias.name.partition(".")[0] for alias in node.names
+            )
+        elif isinstance(node, ast.ImportFrom) and not node.level:
+            modules.add(node.module.partition(".")[0])
+    return sorted(modules)
+
+
+def _read_imports(path: str) -> list[str]:
+    try:
+        with open(path, "rb") as source:
+            return imported_modules(source.read())
+    except OSError:
+        return []
+
+
+def _digest(path: str) -> str | None:
+    try:
+        with open(path, "rb") as source:
+            return hashlib.blake2b(source.read(), digest_size=16).hexdigest()
+    except OSError:
+        return None
+
+
+def iter_sources(directory: str) -> Iterator[os.DirEntry]:
+    """
+    Yields the .py files in directory and below it, leaving out hidden
+    directories, virtualenvs and the ones in SKIPPED_DIRECTORIES.
+    """
+    pending = [directory]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as children:
+                children = list(children)
+        except OSError:
+            continue
+        if any(child.name == "pyvenv.cfg" for child in children):
+            continue
+        for child in children:
+            if child.name.startswith("."):
+                continue
+            if child.is_dir(follow_symlinks=False):
+                if child.name not in SKIPPED_DIRECTORIES:
+                    pending.append(child.path)
+            elif child.name.endswith(".py") and child.is_file():
+                yield child
+
+
+class ImportCache:
+    """
+    Caches the modules each source file imports, keyed by a digest of its
+    contents, and the digest of each file, keyed by its path, size and
+    modification time, so that unchanged files aren't read again and
+    files whose contents didn't change, as after a fresh checkout, aren't
+    parsed again.
+    """
+
+    filename = "imports.json"
+    format_version = 1
+
+    def __init__(self, directory: str | os.PathLike):
+        import json
+
+        self.directory = os.path.expanduser(os.fspath(directory))
+        self.path = os.path.join(self.directory, self.filename)
+        try:
+            with open(self.path, encoding="utf-8") as cache_file:
+                contents = json.load(cache_file)
+            if contents.get("version") != self.format_version:
+                raise ValueError(self.path)
+            self.files: dict[str, list] = contents["files"]
+            self.imports: dict[str, list[str]] = contents["imports"]
+        except (OSError, ValueError, KeyError, AttributeError, TypeError):
+            self.files = {}
+            self.imports = {}
+
+    def save(self, files: dict[str, list]) -> None:
+        """
+        Writes the cache file, atomically, keeping the files and digests of
+        the last scan only.
+        """
+        import json
+        import tempfile
+
+        digests = {entry[2] for entry in files.values()}
+        os.makedirs(self.directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=self.directory,
+            prefix=".imports-",
+            suffix=".tmp",
+            delete=False,
+        ) as cache_file:
+            json.dump(
+                {
+                    "version": self.format_version,
+                    "files": files,
+                    "imports": {
+                        digest: modules
+                        for digest, modules in self.imports.items()
+                        if digest in digests
+                    },
+                },
+                cache_file,
+            )
+        os.replace(cache_file.name, self.path)
+        self.files = files
+
+
+def scan_imports(
+    directory: str | os.PathLike,
+    cache: "str | os.PathLike | ImportCache | None" = None,
+    processes: int | None = None,
+) -> set[str]:
+    """
+    Returns the top-level modules the .py files in directory, as
+    iter_sources finds them, import.
+
+    Files are parsed by processes worker processes (as many as
+    ProcessPoolExecutor picks if None, in this process if 1). With a
+    cache, a directory or an ImportCache, only files whose contents
+    weren't seen before are parsed.
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    directory = os.fspath(directory)
+    if cache is not None and not isinstance(cache, ImportCache):
+        cache = ImportCache(cache)
+
+    sources = list(iter_sources(directory))
+    modules: set[str] = set()
+    if cache is None:
+        pending = [source.path for source in sources]
+    else:
+        files = {}
+        changed = []
+        for source in sources:
+            try:
+                stat = source.stat()
+            except OSError:
+                continue
+            entry = cache.files.get(source.path)
+            if entry is not None and entry[:2] == [
+                stat.st_mtime_ns,
+                stat.st_size,
+            ]:
+                files[source.path] = entry
+            else:
+                changed.append((source.path, stat))
+        # Hashing releases the GIL, so threads read and hash in parallel.
+        with ThreadPoolExecutor() as executor:
+            digests = executor.map(_digest, [path for path, _ in changed])
+            for (path, stat), digest in zip(changed, digests):
+                if digest is not None:
+                    files[path] = [stat.st_mtime_ns, stat.st_size, digest]
+        pending = []
+        for path, entry in files.items():
+            if entry[2] in cache.imports:
+                modules.update(cache.imports[entry[2]])
+            else:
+                pending.append(path)
+
+    if processes == 1 or len(pending) < PARALLEL_THRESHOLD:
+        parsed = list(map(_read_imports, pending))
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            parsed = list(
+                executor.map(_read_imports, pending, chunksize=CHUNK_SIZE)
+            )
+    for path, found in zip(pending, parsed):
+        modules.update(found)
+        if cache is not None:
+            cache.imports[files[path][2]] = found
+
+    if cache is not None:
+        cache.save(files)
+    return modules
+
+
+def used_distributions(
+    modules: Iterable[str], index: dict[str, set[str]]
+) -> set[str]:
+    """
+    Returns the canonical names of the distributions that provide modules,
+    given the index module_index returns.
+    """
+    return {name for module in modules for name in index.get(module, ())}
+
+
+def mark_used(
+    distributions: Iterable["Distribution"], used: set[str]
+) -> Iterator["Distribution"]:
+    """
+    Yields distributions, the ones chill lists marked as used or not,
+    depending on whether their canonical name is in used.
+    """
+    for distribution in distributions:
+        if not distribution.required_by:
+            distribution.used = canonicalize_name(distribution.name) in used
+        yield distribution
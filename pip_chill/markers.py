@@ -0,0 +1,303 @@
+"""Compiles and evaluates PEP 508 environment markers"""
+
+import functools
+import os
+import re
+import sys
+from collections.abc import Callable, Mapping
+
+from .requirements import canonicalize_name
+from .versions import parse_specifier
+
+_token = re.compile(
+    r"""
+    \s*(?:
+        (?P<string>'[^']*'|"[^"]*")
+        |(?P<operator>===|==|!=|<=|>=|~=|<|>|not\s+in\b|in\b)
+        |(?P<keyword>and\b|or\b)
+        |(?P<paren>[()])
+        |(?P<variable>[a-z_][a-z0-9_.]*)
+    )
+    """,
+    re.VERBOSE,
+)
+
+# Old spellings some packages still use.
+_aliases = {
+    "os.name": "os_name",
+    "sys.platform": "sys_platform",
+    "platform.version": "platform_version",
+    "platform.machine": "platform_machine",
+    "platform.python_implementation": "platform_python_implementation",
+    "python_implementation": "platform_python_implementation",
+}
+
+_variables = {
+    "implementation_name",
+    "implementation_version",
+    "os_name",
+    "platform_machine",
+    "platform_python_implementation",
+    "platform_release",
+    "platform_system",
+    "platform_version",
+    "python_full_version",
+    "python_version",
+    "sys_platform",
+    "extra",
+}
+
+Environment = Mapping[str, str]
+
+
+class InvalidMarker(ValueError):
+    """
+    Raised when a marker can't be parsed.
+    """
+
+
+class Marker:
+    """
+    An environment marker compiled into a predicate over an environment
+    mapping, like the one default_environment returns.
+    """
+
+    __slots__ = ("text", "extras", "_predicate")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.extras: set[str] = set()
+        self._predicate = _Parser(text, self.extras).parse()
+
+    def __repr__(self) -> str:
+        return f"<{self.__module__}.{self.__class__.__name__} '{self.text}'>"
+
+    def evaluate(self, environment: Environment, extra: str = "") -> bool:
+        """
+        Returns whether the marker holds in environment when extra is the
+        extra being installed.
+        """
+        return self._predicate(environment, canonicalize_name(extra))
+
+
+def _format_full_version(info) -> str:
+    version = f"{info.major}.{info.minor}.{info.micro}"
+    if info.releaselevel != "final":
+        version += info.releaselevel[0] + str(info.serial)
+    return version
+
+
+@functools.cache
+def default_environment() -> dict[str, str]:
+    """
+    Returns the marker variables of the running interpreter.
+    """
+    import platform
+
+    return {
+        "implementation_name": sys.implementation.name,
+        "implementation_version": _format_full_version(
+            sys.implementation.version
+        ),
+        "os_name": os.name,
+        "platform_machine": platform.machine(),
+        "platform_python_implementation": platform.python_implementation(),
+        "platform_release": platform.release(),
+        "platform_system": platform.system(),
+        "platform_version": platform.version(),
+        "python_full_version": platform.python_version(),
+        "python_version": ".".join(platform.python_version_tuple()[:2]),
+        "sys_platform": sys.platform,
+    }
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_marker(text: str) -> Marker:
+    """
+    Compiles a marker. Each distinct marker string is compiled only once.
+    """
+    return Marker(text)
+
+
+def marker_holds(
+    marker: str | None, environment: Environment, extra: str = ""
+) -> bool:
+    """
+    Returns whether marker, which may be None, holds in environment with
+    extra installed. Markers that can't be parsed count as always holding
+    when no extra is installed.
+    """
+    if marker is None:
+        return True
+    try:
+        return compile_marker(marker).evaluate(environment, extra)
+    except InvalidMarker:
+        return not extra
+
+
+def marker_extras(marker: str | None) -> set[str]:
+    """
+    Returns the (normalised) extras marker, which may be None, mentions.
+    """
+    if marker is None:
+        return set()
+    try:
+        return compile_marker(marker).extras
+    except InvalidMarker:
+        return set()
+
+
+_string_operators = {
+    "==": lambda left, right: left == right,
+    "!=": lambda left, right: left != right,
+    "<": lambda left, right: left < right,
+    "<=": lambda left, right: left <= right,
+    ">": lambda left, right: left > right,
+    ">=": lambda left, right: left >= right,
+    "in": lambda left, right: left in right,
+    "not in": lambda left, right: left not in right,
+}
+
+
+def _compare(operator: str, left: str, right: str) -> bool:
+    """
+    Compares two marker values. When the right hand side makes a valid
+    version specifier, left is compared as a version, otherwise as a
+    string. Comparisons that make sense for neither are false.
+    """
+    if operator not in ("in", "not in"):
+        specifier = parse_specifier(operator + right)
+        if specifier is not None:
+            return specifier.contains(left)
+
+    compare = _string_operators.get(operator)
+    return compare is not None and compare(left, right)
+
+
+class _Parser:
+    """
+    Recursive descent parser turning a marker into nested closures.
+    """
+
+    def __init__(self, text: str, extras: set[str]):
+        self.text = text
+        self.extras = extras
+        self.tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = _token.match(text, position)
+            if match is None or match.end() == position:
+                raise InvalidMarker(f"Invalid marker: {self.text!r}")
+            self.tokens.append((match.lastgroup, match[match.lastgroup]))
+            position = match.end()
+        self.position = 0
+
+    def parse(self) -> Callable[[Environment, str], bool]:
+        predicate = self._or()
+        if self.position != len(self.tokens):
+            raise InvalidMarker(f"Invalid marker: {self.text!r}")
+        return predicate
+
+    def _next(self, kind: str | None = None) -> str:
+        if self.position >= len(self.tokens):
+            raise InvalidMarker(f"Invalid marker: {self.text!r}")
+        token_kind, value = self.tokens[self.position]
+        if kind is not None and token_kind != kind:
+            raise InvalidMarker(f"Invalid marker: {self.text!r}")
+        self.position += 1
+        return value
+
+    def _peek(self) -> tuple[str, str] | None:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def _or(self):
+        left = self._and()
+        while self._peek() == ("keyword", "or"):
+            self._next()
+            right = self._and()
+            left = _either(left, right)
+        return left
+
+    def _and(self):
+        left = self._expression()
+        while self._peek() == ("keyword", "and"):
+            self._next()
+            right = self._expression()
+            left = _both(left, right)
+        return left
+
+    def _expression(self):
+        if self._peek() == ("paren", "("):
+            self._next()
+            predicate = self._or()
+            if self._next("paren") != ")":
+                raise InvalidMarker(f"Invalid marker: {self.text!r}")
+            return predicate
+
+        left = self._value()
+        operator = " ".join(self._next("operator").split())
+        right = self._value()
+
+        if left == ("variable", "extra") or right == ("variable", "extra"):
+            # Extra names are compared in their normalised form.
+            if left[0] == "string":
+                left = ("string", canonicalize_name(left[1]))
+                self.extras.add(left[1])
+            if right[0] == "string":
+                right = ("string", canonicalize_name(right[1]))
+                self.extras.add(right[1])
+
+        return _comparison(left, operator, right)
+
+    def _value(self) -> tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise InvalidMarker(f"Invalid marker: {self.text!r}")
+        if token[0] == "string":
+            self._next()
+            return ("string", token[1][1:-1])
+        name = _aliases.get(token[1], token[1])
+        self._next("variable")
+        if name not in _variables:
+            raise InvalidMarker(f"Unknown marker variable {name!r}")
+        return ("variable", name)
+
+
+def _either(left, right):
+    def predicate(environment: Environment, extra: str) -> bool:
+        return left(environment, extra) or right(environment, extra)
+
+    return predicate
+
+
+def _both(left, right):
+    def predicate(environment: Environment, extra: str) -> bool:
+        return left(environment, extra) and right(environment, extra)
+
+    return predicate
+
+
+def _lookup(value: tuple[str, str]) -> Callable[[Environment, str], str]:
+    kind, name = value
+    if kind == "string":
+        return lambda environment, extra: name
+    if name == "extra":
+        return lambda environment, extra: extra
+    return lambda environment, extra: environment.get(name, "")
+
+
+def _comparison(left, operator, right):
+    left_value = _lookup(left)
+    right_value = _lookup(right)
+
+    def predicate(environment: Environment, extra: str) -> bool:
+        return _compare(
+            operator,
+            left_value(environment, extra),
+            right_value(environment, extra),
+        )
+
+    return predicate
@@ -1,35 +1,70 @@
 """Lists installed packages that are not dependencies of others"""
 
-import re
-from importlib import metadata
-from typing import Any, Set
+import os
+import time
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
 
-pattern = re.compile(r"[\s\(;=!<>]")
+from .discovery import (
+    DistributionMetadata,
+    environment_paths,
+    iter_metadata,
+    python_version,
+)
+from .graph import DependencyGraph
+from .requirements import Requirement, canonicalize_name, parse_requirement
+from .timings import Timings
+
+# The cache, environment markers and process pools are imported where used,
+# to keep the command line fast to start.
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
+
+    from .cache import MetadataCache
 
 
 class Distribution:
     """
     Represents a distribution package installed in the current environment.
+
+    A package in a dependency cycle nothing else requires has the names of
+    the other packages in the cycle in cycle. used tells whether the
+    sources of a project import the package, None if that wasn't checked.
     """
 
+    __slots__ = (
+        "name",
+        "version",
+        "required_by",
+        "hide_version",
+        "cycle",
+        "used",
+    )
+
     def __init__(
         self: str,
         name: str,
         version: str = None,
-        required_by: Set = None,
+        required_by: Iterable = None,
         hide_version: bool = False,
+        cycle: Iterable = None,
+        used: bool | None = None,
     ):
         self.name = name
         self.version = version
         self.required_by = (
-            set[Any](required_by) if required_by is not None else set[Any]()
+            set(required_by) if required_by is not None else set()
         )
         self.hide_version = hide_version
+        self.cycle = set(cycle) if cycle is not None else set()
+        self.used = used
 
     def __lt__(self, other):
         return self.name < other.name
 
-    def __eq__(self, other: Any) -> bool:
+    def __eq__(self, other: object) -> bool:
         if self is other:
             return True
         if isinstance(other, Distribution):
@@ -56,85 +91,470 @@ class Distribution:
                 f"# {self.name}=={self.version} # Installed as "
                 f"dependency for {', '.join(sorted(self.required_by))}"
             )
+        comment = ""
+        if self.cycle:
+            comment = (
+                f" # Installed in a cycle with {', '.join(sorted(self.cycle))}"
+            )
+        if self.used is False:
+            comment += " # Not imported"
         if self.hide_version:
-            return f"{self.name}"
+            return f"{self.name}{comment}"
 
-        return f"{self.name}=={self.version}"
+        return f"{self.name}=={self.version}{comment}"
 
 
-def chill(
-    show_all: bool = False, no_chill: bool = False, no_version: bool = False
-) -> tuple[list[Distribution], list[Distribution]]:
+def add_edges(
+    graph: DependencyGraph,
+    requirements: dict[int, list[Requirement]],
+    environment: Mapping[str, str] | None,
+    counted: list[tuple[int, Requirement]] | None = None,
+) -> None:
     """
-    Returns a tuple of dicts, one with the the packages, other with their
-    dependencies.
+    Adds to graph an edge for each requirement, in requirements by the node
+    requiring it, whose marker holds in the running interpreter's
+    environment, updated with environment.
+
+    Requirements that depend on an extra only count if the extra is
+    installed, that is, if another installed distribution requires it.
+    If counted is a list, each requirement that counts is appended to it,
+    with the node requiring it.
+    """
+    from .markers import default_environment, marker_extras, marker_holds
+
+    environment = {**default_environment(), **(environment or {})}
+    active_extras: dict[int, set[str]] = {}
+    pending: list[tuple[int, str]] = []
+
+    def require(node: int, requirement: Requirement) -> None:
+        target = graph.node(requirement.name)
+        # Packages requiring themselves with extras don't count.
+        if target != node:
+            graph.add_edge(node, target)
+            if counted is not None:
+                counted.append((node, requirement))
+        for extra in requirement.extras:
+            extras = active_extras.setdefault(target, set())
+            if extra not in extras:
+                extras.add(extra)
+                pending.append((target, extra))
+
+    for node, node_requirements in requirements.items():
+        for requirement in node_requirements:
+            if marker_holds(requirement.marker, environment):
+                require(node, requirement)
+
+    while pending:
+        node, extra = pending.pop()
+        for requirement in requirements.get(node, ()):
+            # Only the requirements the extra brings in.
+            if (
+                extra in marker_extras(requirement.marker)
+                and marker_holds(requirement.marker, environment, extra)
+                and not marker_holds(requirement.marker, environment)
+            ):
+                require(node, requirement)
+
+
+def ignored_packages(show_all: bool, no_chill: bool) -> set[str]:
+    """
+    Returns the canonical names of the packages left out of the graph.
     """
     if show_all:
-        ignored_packages: set[str] = set()
+        ignored: set[str] = set()
     else:
-        ignored_packages = {"pip", "wheel", "setuptools", "pkg-resources"}
+        ignored = {"pip", "wheel", "setuptools", "pkg-resources"}
 
     if no_chill:
-        ignored_packages.add("pip-chill")
+        ignored.add("pip-chill")
+    return ignored
 
-    # Gather all packages that are requirements and will be auto-installed.
-    distributions = {}
-    dependencies: dict[Distribution] = {}
 
-    for distribution in metadata.distributions():
-        # importlib.metadata.distributions returns() an iterable of
-        # importlib.metadata.PathDistribution objects. We'll be interested in
-        # the name, version and requires attributes. The requires attribute is
-        # a list of strings representing the requirement in requirements.txt
-        # syntax. If the package has no requirements, the requires attribute
-        # is None.
+def parse_requirements(
+    requires: Iterable[str], ignored: set[str]
+) -> list[Requirement]:
+    """
+    Parses requirement strings in requirements.txt syntax, leaving out the
+    ones for ignored packages.
+    """
+    return [
+        requirement
+        for requirement in map(parse_requirement, requires)
+        if requirement.key not in ignored
+    ]
+
+
+def dependency_graph(
+    show_all: bool = False,
+    no_chill: bool = False,
+    cache: "str | os.PathLike | MetadataCache | None" = None,
+    workers: int | None = None,
+    paths: Iterable[str] | None = None,
+    environment: Mapping[str, str] | None = None,
+    timings: Timings | None = None,
+    metadata: Iterable[DistributionMetadata] | None = None,
+    counted: list[tuple[int, Requirement]] | None = None,
+) -> DependencyGraph:
+    """
+    Builds the dependency graph of the distributions installed on paths,
+    which defaults to sys.path, so that any site-packages directory can be
+    analysed without activating its environment.
 
-        # Skip packages to be ignored.
+    If cache is a directory (or a MetadataCache), the metadata read from
+    installed distributions is kept there and reused on later calls for
+    distributions that did not change.
 
-        if distribution.name in ignored_packages:
+    With workers greater than one, metadata is read by that many threads.
+    The result is the same as the one of a serial scan.
+
+    Requirements only count if their environment markers hold for the
+    running interpreter. Marker variables given in environment, such as
+    python_version, override the ones of the running interpreter.
+
+    The time spent in each phase is added to timings. Without timings,
+    the phases are reported to the hooks of pip_chill.timings.
+
+    The graph can also be built from the metadata of distributions that
+    aren't installed, such as wheels, given as metadata. paths, cache and
+    workers are then ignored.
+
+    If counted is a list, each requirement that adds an edge is appended
+    to it, with the node requiring it, as add_edges does.
+    """
+    if timings is None:
+        timings = Timings()
+        try:
+            return dependency_graph(
+                show_all=show_all,
+                no_chill=no_chill,
+                cache=cache,
+                workers=workers,
+                paths=paths,
+                environment=environment,
+                timings=timings,
+                metadata=metadata,
+                counted=counted,
+            )
+        finally:
+            timings.close()
+
+    ignored = ignored_packages(show_all, no_chill)
+
+    if metadata is not None:
+        cache = None
+    if cache is not None:
+        from .cache import MetadataCache
+
+        if not isinstance(cache, MetadataCache):
+            cache = MetadataCache(cache)
+
+    graph = DependencyGraph()
+    requirements: dict[int, list[Requirement]] = {}
+
+    # Reading, parsing and adding distributions to the graph interleave, so
+    # the time of each is added up as we go.
+    clock = time.perf_counter
+    discovered = timings.seconds("discovery")
+    reading = parsing = building = 0.0
+    parsed = 0
+    start = clock()
+
+    if metadata is None:
+        metadata = iter_metadata(
+            paths, cache=cache, workers=workers, timings=timings
+        )
+    for distribution in metadata:
+        # iter_metadata yields a DistributionMetadata for every installed
+        # distribution. We'll be interested in the name, version and
+        # requires attributes. The requires attribute is a tuple of strings
+        # representing the requirement in requirements.txt syntax.
+        read = clock()
+        reading += read - start
+
+        # Skip packages to be ignored, and broken ones without a name.
+
+        if (
+            distribution.name is None
+            or canonicalize_name(distribution.name) in ignored
+        ):
+            start = clock()
+            building += start - read
             continue
 
-        # Populate the distributions dict.
-        if distribution.name in dependencies:
-            # If it is an already know dependency, we add the version.
-            dependencies[distribution.name].version = distribution.version
-        else:
-            distributions[distribution.name] = Distribution(
-                distribution.name,
-                distribution.version,
+        node = graph.add_distribution(distribution.name, distribution.version)
+        added = clock()
+
+        # Parse the requirements of this package, which are strings in
+        # requirements.txt syntax. Edges are added once we know all the
+        # installed packages, as that decides which extras are installed.
+        requirements[node] = parse_requirements(
+            distribution.requires, ignored
+        )
+        parsed += len(distribution.requires)
+
+        start = clock()
+        building += added - read
+        parsing += start - added
+
+    if cache is not None:
+        cache.save()
+    # The discovery phase was timed while reading.
+    reading += clock() - start - (timings.seconds("discovery") - discovered)
+    timings.add("metadata", reading, len(graph))
+    timings.count("metadata", "distributions", len(graph))
+    timings.add("parsing", parsing, len(requirements))
+    timings.count("parsing", "requirements", parsed)
+
+    with timings.phase("graph"):
+        add_edges(graph, requirements, environment, counted)
+        timings.count("graph", "edges", graph.edge_count)
+    # Distributions were added to the graph while reading.
+    timings.add("graph", building, 0)
+
+    return graph
+
+
+def iter_distributions(
+    graph: DependencyGraph,
+    dependencies: bool = False,
+    no_version: bool = False,
+    sort: bool = True,
+    timings: Timings | None = None,
+    top_level: list[list[int]] | None = None,
+) -> Iterator[Distribution]:
+    """
+    Yields a Distribution for each installed package of graph nothing
+    requires, counting packages in a dependency cycle nothing else requires
+    as not required, or, if dependencies is true, for each other package
+    something requires, installed or not.
+
+    Distributions are yielded by name or, if sort is false, in the order
+    they were found. Either way, only one Distribution is alive at a time.
+    The time spent sorting, and finding the packages nothing requires, is
+    added to timings, if given. Pass what graph.top_level() returns as
+    top_level to avoid finding them again on each call.
+    """
+    if top_level is None:
+        start = time.perf_counter()
+        top_level = graph.top_level()
+        if timings is not None:
+            timings.add("graph", time.perf_counter() - start)
+    # The top-level group of each package, if any.
+    groups = array("l", [-1]) * len(graph)
+    for number, group in enumerate(top_level):
+        for node in group:
+            groups[node] = number
+
+    nodes: Iterable[int] = graph
+    if sort:
+        start = time.perf_counter()
+        nodes = sorted(graph, key=graph.names.__getitem__)
+        if timings is not None:
+            timings.add("sorting", time.perf_counter() - start)
+
+    for node in nodes:
+        group = groups[node]
+        if dependencies and group == -1 and graph.in_degree(node):
+            yield Distribution(
+                graph.names[node],
+                graph.versions[node],
+                required_by=(graph.names[n] for n in graph.required_by(node)),
+                hide_version=no_version,
+            )
+        elif not dependencies and group != -1:
+            yield Distribution(
+                graph.names[node],
+                graph.versions[node],
                 hide_version=no_version,
+                cycle=(graph.names[n] for n in top_level[group] if n != node),
+            )
+
+
+def iter_chill(
+    show_all: bool = False,
+    no_chill: bool = False,
+    no_version: bool = False,
+    cache: "str | os.PathLike | MetadataCache | None" = None,
+    workers: int | None = None,
+    paths: Iterable[str] | None = None,
+    environment: Mapping[str, str] | None = None,
+    dependencies: bool = False,
+    sort: bool = True,
+    timings: Timings | None = None,
+    metadata: Iterable[DistributionMetadata] | None = None,
+) -> Iterator[Distribution]:
+    """
+    Yields the packages chill would return then, if dependencies is true,
+    their dependencies, one at a time.
+
+    Whether a package is a dependency is only known once every installed
+    distribution was read, so nothing is yielded before that. After that,
+    no lists of results are built, which keeps memory bounded by the size
+    of the dependency graph. With sort false, packages are yielded in the
+    order they were found instead of by name.
+
+    See dependency_graph for the meaning of the other arguments.
+    """
+    if timings is None:
+        timings = Timings()
+        try:
+            yield from iter_chill(
+                show_all=show_all,
+                no_chill=no_chill,
+                no_version=no_version,
+                cache=cache,
+                workers=workers,
+                paths=paths,
+                environment=environment,
+                dependencies=dependencies,
+                sort=sort,
+                timings=timings,
+                metadata=metadata,
             )
+        finally:
+            timings.close()
+        return
+
+    graph = dependency_graph(
+        show_all=show_all,
+        no_chill=no_chill,
+        cache=cache,
+        workers=workers,
+        paths=paths,
+        environment=environment,
+        timings=timings,
+        metadata=metadata,
+    )
+
+    # Installed packages nothing requires are the ones we list. Everything
+    # else, installed or not, is a dependency of something.
+    start = time.perf_counter()
+    top_level = graph.top_level()
+    timings.add("graph", time.perf_counter() - start)
+    yield from iter_distributions(
+        graph,
+        no_version=no_version,
+        sort=sort,
+        timings=timings,
+        top_level=top_level,
+    )
+    if dependencies:
+        yield from iter_distributions(
+            graph,
+            dependencies=True,
+            no_version=no_version,
+            sort=sort,
+            timings=timings,
+            top_level=top_level,
+        )
+
+
+def chill(
+    show_all: bool = False,
+    no_chill: bool = False,
+    no_version: bool = False,
+    cache: "str | os.PathLike | MetadataCache | None" = None,
+    workers: int | None = None,
+    paths: Iterable[str] | None = None,
+    environment: Mapping[str, str] | None = None,
+    sort: bool = True,
+    timings: Timings | None = None,
+    metadata: Iterable[DistributionMetadata] | None = None,
+) -> tuple[list[Distribution], list[Distribution]]:
+    """
+    Returns a tuple of lists, one with the the packages, other with their
+    dependencies.
+
+    See dependency_graph for the meaning of the other arguments.
+    """
+    distributions = iter_chill(
+        show_all=show_all,
+        no_chill=no_chill,
+        no_version=no_version,
+        cache=cache,
+        workers=workers,
+        paths=paths,
+        environment=environment,
+        dependencies=True,
+        sort=sort,
+        timings=timings,
+        metadata=metadata,
+    )
+    packages = []
+    dependencies = []
+    for distribution in distributions:
+        if distribution.required_by:
+            dependencies.append(distribution)
+        else:
+            packages.append(distribution)
+    return packages, dependencies
+
+
+def environment_markers(
+    paths: list[str], environment: Mapping[str, str] | None = None
+) -> dict[str, str]:
+    """
+    Returns the marker variables to evaluate the requirements of the
+    distributions installed on paths with: python_version is the version
+    in the name of their site-packages directory (lib/pythonX.Y), if any,
+    and the ones given in environment override it.
+
+    The directory name doesn't tell python_full_version, which is left to
+    the running interpreter unless given in environment.
+    """
+    version = python_version(paths)
+    if version is None:
+        return dict(environment or {})
+    return {"python_version": version, **(environment or {})}
 
-        requirements = distribution.requires
-        if requirements is not None:
-            # Go over the requirements of this package and add any missing
-            # dependencies.
-            for requirement in requirements:
-                # requirement is a string representing the requirement in
-                # requirements.txt syntax. We'll need to parse it.
-                requirement_name = re.split(pattern, requirement)[0]
-                if requirement_name not in ignored_packages:
-                    # We should not ignore this one
-                    if requirement_name in dependencies:
-                        # This is an already known dependency, we add the
-                        # distribution to its required_by set.
-                        dependencies[requirement_name].required_by.add(
-                            distribution.name
-                        )
-                    else:
-                        # This is a new dependency, we create a new
-                        # Distribution object for it.
-                        dependencies[requirement_name] = Distribution(
-                            requirement_name,
-                            required_by=(distribution.name,),
-                            hide_version=no_version,
-                        )
-
-                # If the requirement is in the distributions list, remove it.
-                # Add the distribution version to the dependency.
-                if requirement_name in distributions:
-                    dependencies[requirement_name].version = distributions.pop(
-                        requirement_name
-                    ).version
-
-    return sorted(distributions.values()), sorted(dependencies.values())
+
+def _chill_environment(
+    environment: str, options: "dict[str, Any]"
+) -> tuple[list[Distribution], list[Distribution]]:
+    paths = environment_paths(environment)
+    # Evaluate markers for the Python version the environment was made for.
+    options = {
+        **options,
+        "environment": environment_markers(
+            paths, options.get("environment")
+        ),
+    }
+    return chill(paths=paths, **options)
+
+
+def chill_environments(
+    environments: Iterable[str],
+    processes: int | None = None,
+    **options: "Any",
+) -> Iterator[tuple[str, tuple[list[Distribution], list[Distribution]]]]:
+    """
+    Runs chill on each environment, given as the prefix of a virtualenv or
+    as a site-packages directory, and yields (environment, result) pairs in
+    the order the environments were given. Other keyword arguments are
+    passed on to chill.
+
+    With processes greater than one, environments are analysed by that
+    many worker processes at once. Timings can't be collected from other
+    processes, so the timings option only works without them.
+
+    Markers are evaluated for the Python version in the name of each
+    environment's site-packages directory (lib/pythonX.Y/site-packages),
+    unless python_version is given in the environment option.
+    """
+    environments = list(environments)
+    if processes is None or processes <= 1:
+        for environment in environments:
+            yield environment, _chill_environment(environment, options)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(processes) as executor:
+        yield from zip(
+            environments,
+            executor.map(
+                _chill_environment,
+                environments,
+                [options] * len(environments),
+            ),
+        )
@@ -0,0 +1,175 @@
+"""Writes the results of chill as text, JSON or JSON Lines"""
+
+import time
+from collections.abc import Callable, Iterable
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import TextIO
+
+    from .pip_chill import Distribution
+    from .timings import Timings
+
+FORMATS = ("text", "json", "jsonl")
+
+# Version of the JSON and JSON Lines schemas. Fields may be added without
+# changing it, but never removed or changed in meaning.
+FORMAT_VERSION = 1
+
+BUFFER_SIZE = 64 * 1024
+
+Results = Iterable[tuple[str | None, Iterable["Distribution"]]]
+
+
+def distribution_record(distribution: "Distribution") -> dict:
+    """
+    Returns the fields of distribution in the JSON schemas: its name, its
+    version (None if hidden or not installed) and the sorted names of the
+    packages requiring it, empty for the packages chill lists. Packages in
+    a dependency cycle nothing else requires also have the sorted names of
+    the others in the cycle as "cycle", and packages checked against the
+    imports of a project have "used".
+    """
+    record = {
+        "name": distribution.name,
+        "version": None
+        if distribution.hide_version
+        else distribution.version,
+        "required_by": sorted(distribution.required_by),
+    }
+    if distribution.cycle:
+        record["cycle"] = sorted(distribution.cycle)
+    if distribution.used is not None:
+        record["used"] = distribution.used
+    return record
+
+
+class _Buffer:
+    """
+    Collects text and writes it to stream in large blocks, adding the time
+    spent formatting and writing to the rendering phase of timings.
+    """
+
+    __slots__ = ("stream", "timings", "parts", "size", "seconds", "calls")
+
+    def __init__(self, stream: "TextIO", timings: "Timings | None"):
+        self.stream = stream
+        self.timings = timings
+        self.parts: list[str] = []
+        self.size = 0
+        self.seconds = 0.0
+        self.calls = 0
+
+    def write(self, text: str) -> None:
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= BUFFER_SIZE:
+            self.flush()
+
+    def format(self, function: Callable, *args) -> None:
+        """
+        Writes what function returns when called with args.
+        """
+        if self.timings is None:
+            self.write(function(*args))
+            return
+        start = time.perf_counter()
+        self.write(function(*args))
+        self.seconds += time.perf_counter() - start
+        self.calls += 1
+
+    def flush(self) -> None:
+        start = time.perf_counter()
+        self.stream.write("".join(self.parts))
+        self.stream.flush()
+        self.parts.clear()
+        self.size = 0
+        self.seconds += time.perf_counter() - start
+
+    def close(self) -> None:
+        self.flush()
+        if self.timings is not None:
+            self.timings.add("rendering", self.seconds, self.calls)
+            self.timings.count("rendering", "distributions", self.calls)
+
+
+def _text(buffer: _Buffer, results: Results, tagged: bool) -> None:
+    for environment, distributions in results:
+        if tagged:
+            buffer.write(f"# Environment: {environment}\n")
+        for distribution in distributions:
+            buffer.format("{}\n".format, distribution)
+
+
+def _json_lines(buffer: _Buffer, results: Results, encode: Callable) -> None:
+    def line(distribution: "Distribution", environment: str | None) -> str:
+        record = distribution_record(distribution)
+        record["environment"] = environment
+        return encode(record) + "\n"
+
+    for environment, distributions in results:
+        for distribution in distributions:
+            buffer.format(line, distribution, environment)
+
+
+def _json(buffer: _Buffer, results: Results, encode: Callable) -> None:
+    def item(distribution: "Distribution", separator: str) -> str:
+        return separator + encode(distribution_record(distribution))
+
+    # Written piece by piece, so that nothing but the output buffer is
+    # held in memory.
+    buffer.write(f'{{"format_version":{FORMAT_VERSION},"environments":[')
+    for index, (environment, distributions) in enumerate(results):
+        buffer.write(
+            f'{"," if index else ""}{{"environment":{encode(environment)},'
+            '"distributions":['
+        )
+        separator = ""
+        for distribution in distributions:
+            buffer.format(item, distribution, separator)
+            separator = ","
+        buffer.write("]}")
+    buffer.write("]}\n")
+
+
+def render(
+    results: Results,
+    stream: "TextIO",
+    output_format: str = "text",
+    tagged: bool = False,
+    timings: "Timings | None" = None,
+) -> None:
+    """
+    Writes results, pairs of an environment (None for the running one) and
+    its distributions, to stream in output_format, one of FORMATS.
+
+    text
+        One distribution per line, as Distribution prints itself, with a
+        comment naming each environment before its distributions if
+        tagged is true.
+    jsonl
+        One JSON object per line per distribution, with the fields
+        distribution_record returns and its "environment".
+    json
+        A single JSON object with the "format_version" of the schema and
+        a list of "environments", each with its "environment" and a list
+        of "distributions" as distribution_record returns them.
+
+    Output is written in large blocks. The time spent formatting and
+    writing it is added to the rendering phase of timings, if given.
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}")
+
+    buffer = _Buffer(stream, timings)
+    if output_format == "text":
+        _text(buffer, results, tagged)
+    else:
+        import json
+
+        encode = json.JSONEncoder(separators=(",", ":")).encode
+        if output_format == "jsonl":
+            _json_lines(buffer, results, encode)
+        else:
+            _json(buffer, results, encode)
+    buffer.close()
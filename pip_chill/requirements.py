@@ -0,0 +1,84 @@
+"""Parses requirement strings from distribution metadata"""
+
+import functools
+import re
+from collections import namedtuple
+
+# The names of a distribution pip would treat as the same, according to
+# PEP 503, map to the same canonical name.
+_separators = re.compile(r"[-_.]+")
+
+_requirement = re.compile(
+    r"""
+    \s*(?P<name>[A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)
+    \s*(?:\[(?P<extras>[^\]]*)\])?
+    \s*(?:@\s*(?P<url>[^\s;]+)|(?P<specifier>[^;]*?))
+    \s*(?:;\s*(?P<marker>.*?)\s*)?$
+    """,
+    re.VERBOSE,
+)
+
+# Used on requirements too broken for the above.
+_name_end = re.compile(r"[\s\[\(;=!<>~@]")
+
+
+class Requirement(
+    namedtuple(
+        "Requirement",
+        ("name", "extras", "specifier", "marker", "url"),
+        defaults=((), "", None, None),
+    )
+):
+    """
+    A requirement string split into its parts: the name as written, a
+    sorted tuple of normalised extras, the version specifier (without
+    parentheses), the environment marker and the URL, if any.
+    """
+
+    __slots__ = ()
+
+    @property
+    def key(self) -> str:
+        """
+        The canonical name of the required distribution.
+        """
+        return canonicalize_name(self.name)
+
+
+@functools.lru_cache(maxsize=8192)
+def canonicalize_name(name: str) -> str:
+    """
+    Returns the PEP 503 normalised form of a distribution name.
+    """
+    return _separators.sub("-", name).lower()
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_requirement(requirement: str) -> Requirement:
+    """
+    Splits a requirement string in requirements.txt syntax into name,
+    extras, version specifier, environment marker and URL.
+
+    Environments often have the same requirement string in many packages,
+    so results are memoised.
+    """
+    match = _requirement.match(requirement)
+    if match is None:
+        return Requirement(_name_end.split(requirement.strip(), 1)[0])
+
+    extras = {
+        canonicalize_name(extra.strip())
+        for extra in (match["extras"] or "").split(",")
+        if extra.strip()
+    }
+    specifier = match["specifier"] or ""
+    if specifier.startswith("(") and specifier.endswith(")"):
+        specifier = specifier[1:-1].strip()
+
+    return Requirement(
+        match["name"],
+        tuple(sorted(extras)),
+        specifier,
+        match["marker"] or None,
+        match["url"],
+    )
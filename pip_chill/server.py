@@ -0,0 +1,588 @@
+"""Keeps the dependency graph of an environment up to date and serves it"""
+
+import errno
+import json
+import os
+import selectors
+import socket
+import stat
+import struct
+import sys
+import time
+from collections.abc import Callable, Iterable, Mapping
+
+from .discovery import (
+    METADATA_SUFFIXES,
+    DistributionMetadata,
+    load_directory,
+    metadata_entries,
+    read_metadata,
+)
+from .graph import DependencyGraph
+from .markers import marker_extras
+from .pip_chill import (
+    add_edges,
+    ignored_packages,
+    iter_distributions,
+    parse_requirements,
+)
+from .render import FORMAT_VERSION, distribution_record
+from .requirements import Requirement, canonicalize_name
+
+# Seconds to wait after a change is noticed before reading it, as pip
+# writes a distribution's metadata after creating its directory.
+SETTLE_TIME = 0.1
+
+
+class LiveGraph:
+    """
+    The dependency graph of the distributions on paths, updated as they are
+    installed and removed.
+
+    Only the metadata directories that changed are read again, and the
+    graph is updated in place: new distributions get their edges added and
+    removed ones lose theirs. When extras are involved, which can change
+    the requirements of other distributions, all edges are worked out again
+    from the requirements kept in memory, without reading anything.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[str] | None = None,
+        show_all: bool = False,
+        no_chill: bool = False,
+        environment: Mapping[str, str] | None = None,
+    ):
+        if paths is None:
+            paths = sys.path
+        self.entries = list(paths)
+        self.directories = [
+            os.path.abspath(entry or os.curdir) for entry in self.entries
+        ]
+        self.ignored_packages = ignored_packages(show_all, no_chill)
+        self.environment = environment
+        self.graph = DependencyGraph()
+        self.generation = 0
+        self.updated = time.time()
+
+        self._requirements: dict[int, list[Requirement]] = {}
+        # The metadata directories found on each directory, by inode, and
+        # the metadata read from each.
+        self._found: dict[str, dict[str, int]] = {}
+        self._records: dict[str, DistributionMetadata] = {}
+        # The metadata directories each node was installed from.
+        self._providers: dict[int, list[str]] = {}
+        self._mtimes: dict[str, int | None] = {}
+        # Directories whose metadata couldn't be read yet.
+        self._retry: set[str] = set()
+        self._responses: dict[tuple, bytes] = {}
+
+        added = []
+        for entry, directory in zip(self.entries, self.directories):
+            entries = metadata_entries(directory)
+            if entries is None:
+                # Zip files and the like don't change while we run.
+                added.extend(load_directory(entry, directory, None, None))
+            else:
+                self._mtimes[directory] = self._mtime(directory)
+                added.extend(self._scan(directory, entries)[1])
+        self._update([], added)
+
+    @property
+    def watched(self) -> list[str]:
+        """
+        The directories checked for changes.
+        """
+        return list(self._mtimes)
+
+    @staticmethod
+    def _mtime(directory: str) -> int | None:
+        try:
+            return os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def _scan(
+        self, directory: str, entries: list[os.DirEntry] | None = None
+    ) -> tuple[list[str], list[DistributionMetadata]]:
+        """
+        Lists directory, unless its entries are given, and returns the
+        metadata directories that went away since the last scan, and the
+        metadata of the new ones.
+        """
+        if entries is None:
+            entries = metadata_entries(directory) or []
+        found = self._found.setdefault(directory, {})
+        current = {entry.path: entry.inode() for entry in entries}
+        removed = [
+            path for path, inode in found.items() if current.get(path) != inode
+        ]
+        for path in removed:
+            del found[path]
+
+        added = []
+        self._retry.discard(directory)
+        for path, inode in current.items():
+            if path in found:
+                continue
+            record = read_metadata(path)
+            if record.name is None or record.version is None:
+                # Probably still being written.
+                self._retry.add(directory)
+                continue
+            found[path] = inode
+            added.append(record)
+        return removed, added
+
+    def _uses_extras(self, node: int) -> bool:
+        return any(
+            requirement.extras or marker_extras(requirement.marker)
+            for requirement in self._requirements.get(node, ())
+        )
+
+    def _update(
+        self, removed: list[str], added: list[DistributionMetadata]
+    ) -> None:
+        graph = self.graph
+        rebuild = False
+        # Nodes whose distributions went away.
+        touched: set[int] = set()
+
+        for path in removed:
+            record = self._records.pop(path, None)
+            if record is None:
+                continue
+            node = graph.get(record.name)
+            providers = self._providers.get(node)
+            if node is None or providers is None:
+                continue
+            providers.remove(path)
+            rebuild = rebuild or self._uses_extras(node)
+            touched.add(node)
+            if providers:
+                # Another copy of the distribution is still installed, so
+                # it's added back.
+                added.append(self._records[providers.pop()])
+            else:
+                del self._providers[node]
+                self._requirements.pop(node, None)
+
+        graph.remove_distributions(touched)
+
+        new: dict[int, list[Requirement]] = {}
+        for record in added:
+            if canonicalize_name(record.name) in self.ignored_packages:
+                continue
+            node = graph.add_distribution(record.name, record.version)
+            if record.path is not None:
+                # Distributions in zip files have no path, and never go.
+                self._records[record.path] = record
+                self._providers.setdefault(node, []).append(record.path)
+            new[node] = self._requirements[node] = parse_requirements(
+                record.requires, self.ignored_packages
+            )
+            rebuild = rebuild or self._uses_extras(node)
+
+        if rebuild:
+            graph.clear_edges()
+            add_edges(graph, self._requirements, self.environment)
+        else:
+            add_edges(graph, new, self.environment)
+
+        self.generation += 1
+        self.updated = time.time()
+        self._responses.clear()
+
+    def refresh(self, directories: Iterable[str] | None = None) -> bool:
+        """
+        Scans directories again or, if None, the directories that changed
+        since they were last scanned, and updates the graph. Returns whether
+        anything changed.
+        """
+        if directories is None:
+            directories = [
+                directory
+                for directory, mtime in self._mtimes.items()
+                if self._mtime(directory) != mtime
+            ]
+        directories = {*directories, *self._retry}
+
+        removed: list[str] = []
+        added: list[DistributionMetadata] = []
+        for directory in directories:
+            if directory not in self._mtimes:
+                continue
+            self._mtimes[directory] = self._mtime(directory)
+            gone, new = self._scan(directory)
+            removed.extend(gone)
+            added.extend(new)
+
+        if not removed and not added:
+            return False
+        self._update(removed, added)
+        return True
+
+    def response(
+        self, dependencies: bool = False, no_version: bool = False
+    ) -> bytes:
+        """
+        Returns the answer to a chill query, encoded as a line of JSON.
+        Answers are kept until the graph changes.
+        """
+        key = (dependencies, no_version)
+        encoded = self._responses.get(key)
+        if encoded is None:
+            top_level = self.graph.top_level()
+            records = [
+                distribution_record(distribution)
+                for distribution in iter_distributions(
+                    self.graph, no_version=no_version, top_level=top_level
+                )
+            ]
+            if dependencies:
+                records.extend(
+                    distribution_record(distribution)
+                    for distribution in iter_distributions(
+                        self.graph,
+                        dependencies=True,
+                        no_version=no_version,
+                        top_level=top_level,
+                    )
+                )
+            encoded = self._responses[key] = _encode(
+                {
+                    "format_version": FORMAT_VERSION,
+                    "generation": self.generation,
+                    "distributions": records,
+                }
+            )
+        return encoded
+
+
+def _encode(message: dict) -> bytes:
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+
+class _Inotify:
+    """
+    Tells which of a set of directories had entries created, deleted or
+    moved, using Linux's inotify.
+    """
+
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_Q_OVERFLOW = 0x4000
+    _event = struct.Struct("iIII")
+
+    def __init__(self, directories: Iterable[str]):
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches: dict[int, str] = {}
+        mask = (
+            self.IN_CREATE
+            | self.IN_DELETE
+            | self.IN_MOVED_FROM
+            | self.IN_MOVED_TO
+        )
+        for directory in directories:
+            watch = libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), mask
+            )
+            if watch >= 0:
+                self._watches[watch] = directory
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def read(self) -> set[str]:
+        """
+        Returns the directories where metadata directories came or went
+        since the last call.
+        """
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                watch, mask, _, length = self._event.unpack_from(data, offset)
+                offset += self._event.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    changed.update(self._watches.values())
+                elif name.lower().endswith(
+                    tuple(suffix.encode() for suffix in METADATA_SUFFIXES)
+                ):
+                    changed.add(self._watches.get(watch))
+            changed.discard(None)
+
+
+def _watcher(directories: Iterable[str]) -> "_Inotify | None":
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return _Inotify(directories)
+    except (OSError, AttributeError):
+        return None
+
+
+def _handle(live: LiveGraph, line: bytes, watcher: str) -> tuple[bytes, bool]:
+    """
+    Returns the response to a request and whether the server should stop.
+    """
+    try:
+        request = json.loads(line)
+        command = request.get("command", "chill")
+    except (ValueError, AttributeError):
+        return _encode({"error": "requests must be JSON objects"}), False
+
+    if command == "chill":
+        return (
+            live.response(
+                bool(request.get("dependencies")),
+                bool(request.get("no_version")),
+            ),
+            False,
+        )
+    if command == "status":
+        return (
+            _encode(
+                {
+                    "generation": live.generation,
+                    "updated": live.updated,
+                    "distributions": sum(
+                        map(live.graph.is_installed, live.graph)
+                    ),
+                    "watcher": watcher,
+                }
+            ),
+            False,
+        )
+    if command == "stop":
+        return _encode({"stopped": True}), True
+    return _encode({"error": f"unknown command {command!r}"}), False
+
+
+class _Connection:
+    """
+    What a client sent that doesn't make a full line yet, and the
+    responses it hasn't read yet.
+    """
+
+    __slots__ = ("input", "output")
+
+    def __init__(self) -> None:
+        self.input = b""
+        self.output = bytearray()
+
+    def lines(self, data: bytes) -> list[bytes]:
+        *lines, self.input = (self.input + data).split(b"\n")
+        return lines
+
+
+def _listen(socket_path: str) -> socket.socket:
+    """
+    Returns a socket listening at socket_path, readable and writable only
+    by its owner. A stale socket left at socket_path by a server that is
+    gone is replaced, but not a live one, nor anything that isn't a socket.
+    """
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        pass
+    else:
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(
+                errno.EEXIST, "Not a socket, won't replace it", socket_path
+            )
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(socket_path)
+            except OSError:
+                os.unlink(socket_path)
+            else:
+                raise OSError(
+                    errno.EADDRINUSE,
+                    "Another server is listening",
+                    socket_path,
+                )
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)
+    try:
+        listener.bind(socket_path)
+    except OSError:
+        listener.close()
+        raise
+    finally:
+        os.umask(umask)
+    listener.listen()
+    return listener
+
+
+def serve(
+    socket_path: str,
+    paths: Iterable[str] | None = None,
+    show_all: bool = False,
+    no_chill: bool = False,
+    environment: Mapping[str, str] | None = None,
+    interval: float = 1.0,
+    ready: Callable[[], None] | None = None,
+) -> None:
+    """
+    Builds the dependency graph of the distributions on paths (sys.path by
+    default) and answers queries about it on a Unix socket at socket_path
+    until asked to stop.
+
+    Directories are watched with inotify where available and, as a
+    fallback and safety net, checked for changes every interval seconds.
+    Changes update the graph in place.
+
+    Clients send requests as JSON objects, one per line, and get a line of
+    JSON back for each:
+
+    {"command": "chill", "dependencies": false, "no_version": false}
+        The packages chill lists (and, with dependencies, their
+        dependencies) as "distributions", in the JSON schema of --format
+        json, with the "generation" of the graph, which grows every time
+        it changes. This is the default command.
+    {"command": "status"}
+        The "generation" of the graph, when it was "updated", how many
+        "distributions" are installed and the "watcher" in use.
+    {"command": "stop"}
+        Stops the server.
+
+    ready, if given, is called once the socket accepts connections.
+    """
+    live = LiveGraph(paths, show_all, no_chill, environment)
+    inotify = _watcher(live.watched)
+    watcher = "polling" if inotify is None else "inotify"
+    selector = selectors.DefaultSelector()
+
+    listener = _listen(socket_path)
+    bound = os.stat(socket_path)
+    listener.setblocking(False)
+    selector.register(listener, selectors.EVENT_READ)
+    if inotify is not None:
+        selector.register(inotify, selectors.EVENT_READ)
+    if ready is not None:
+        ready()
+
+    connections: dict[socket.socket, _Connection] = {}
+
+    def close(connection: socket.socket) -> None:
+        selector.unregister(connection)
+        connection.close()
+        del connections[connection]
+
+    changed: set[str] = set()
+    settled: float | None = None
+    next_check = time.monotonic() + interval
+    running = True
+    try:
+        while running:
+            deadline = next_check if settled is None else settled
+            timeout = max(deadline - time.monotonic(), 0)
+            for key, events in selector.select(timeout):
+                if key.fileobj is listener:
+                    try:
+                        connection, _ = listener.accept()
+                    except OSError:
+                        continue
+                    connection.setblocking(False)
+                    selector.register(connection, selectors.EVENT_READ)
+                    connections[connection] = _Connection()
+                    continue
+                if key.fileobj is inotify:
+                    changed.update(inotify.read())
+                    settled = time.monotonic() + SETTLE_TIME
+                    continue
+
+                # A client. A client that goes away, or misbehaves, only
+                # loses its own connection.
+                connection = key.fileobj
+                state = connections[connection]
+                try:
+                    if events & selectors.EVENT_READ:
+                        data = connection.recv(64 * 1024)
+                        if not data:
+                            close(connection)
+                            continue
+                        for line in state.lines(data):
+                            response, stop = _handle(live, line, watcher)
+                            state.output += response
+                            running = running and not stop
+                    if state.output:
+                        sent = connection.send(state.output)
+                        del state.output[:sent]
+                except BlockingIOError:
+                    pass
+                except OSError:
+                    close(connection)
+                    continue
+                selector.modify(
+                    connection,
+                    selectors.EVENT_READ | selectors.EVENT_WRITE
+                    if state.output
+                    else selectors.EVENT_READ,
+                )
+
+            now = time.monotonic()
+            if settled is not None and now >= settled:
+                live.refresh(changed)
+                changed.clear()
+                settled = None
+            if now >= next_check:
+                live.refresh()
+                next_check = now + interval
+    finally:
+        for connection, state in connections.items():
+            # Answer what was asked before stopping, if the client reads.
+            if state.output:
+                connection.settimeout(1.0)
+                try:
+                    connection.sendall(state.output)
+                except OSError:
+                    pass
+            connection.close()
+        selector.close()
+        listener.close()
+        if inotify is not None:
+            inotify.close()
+        # Leave alone whatever replaced our socket.
+        try:
+            current = os.stat(socket_path)
+        except OSError:
+            pass
+        else:
+            if os.path.samestat(current, bound):
+                os.unlink(socket_path)
+
+
+def query(socket_path: str, command: str = "chill", **arguments) -> dict:
+    """
+    Sends a request to the server listening at socket_path and returns its
+    response. See serve for the commands and their arguments.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(_encode({"command": command, **arguments}))
+        response = b""
+        while not response.endswith(b"\n"):
+            data = connection.recv(64 * 1024)
+            if not data:
+                break
+            response += data
+    return json.loads(response)
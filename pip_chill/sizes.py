@@ -0,0 +1,150 @@
+"""Measures the disk space packages take, and what removing one frees"""
+
+import os
+from collections import namedtuple
+from collections.abc import Iterable
+
+from .discovery import distribution_key, metadata_directories
+from .graph import DependencyGraph
+
+_UNITS = ("B", "KiB", "MiB", "GiB", "TiB")
+
+
+class Footprint(
+    namedtuple("Footprint", ("name", "version", "total", "exclusive"))
+):
+    """
+    The bytes a top-level package takes with everything it needs (total)
+    and with what only it needs (exclusive), which removing it would free.
+    """
+
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name}=={self.version} # {format_size(self.exclusive)} "
+            f"exclusive, {format_size(self.total)} total"
+        )
+
+
+def format_size(size: int) -> str:
+    """
+    Returns size, in bytes, in the largest binary unit it has one of.
+    """
+    value = float(size)
+    for unit in _UNITS:
+        if value < 1024 or unit == _UNITS[-1]:
+            break
+        value /= 1024
+    return f"{size} B" if unit == "B" else f"{value:.1f} {unit}"
+
+
+def _listed_files(metadata_directory: str) -> tuple[int, list[str]]:
+    """
+    Returns the bytes of the files the RECORD of a distribution gives the
+    size of, and the paths of the files it lists without one, such as
+    bytecode compiled on install. Egg-info directories without RECORD
+    list their files, without sizes, in installed-files.txt.
+    """
+    import csv
+
+    size = 0
+    unsized = []
+    try:
+        base = os.path.dirname(metadata_directory)
+        with open(
+            os.path.join(metadata_directory, "RECORD"),
+            encoding="utf-8",
+            newline="",
+        ) as record:
+            for row in csv.reader(record):
+                if not row:
+                    continue
+                if len(row) > 2 and row[2].isdigit():
+                    size += int(row[2])
+                else:
+                    unsized.append(os.path.join(base, row[0]))
+        return size, unsized
+    except (OSError, csv.Error, UnicodeDecodeError):
+        pass
+
+    try:
+        with open(
+            os.path.join(metadata_directory, "installed-files.txt"),
+            encoding="utf-8",
+        ) as installed_files:
+            for line in installed_files:
+                if line.strip():
+                    unsized.append(
+                        os.path.join(metadata_directory, line.strip())
+                    )
+    except (OSError, UnicodeDecodeError):
+        pass
+    return size, unsized
+
+
+def _file_size(path: str) -> int:
+    try:
+        # Links count for themselves, not for what they point to.
+        return os.lstat(path).st_size
+    except OSError:
+        return 0
+
+
+def distribution_sizes(
+    paths: Iterable[str] | None = None, workers: int | None = None
+) -> dict[tuple[str, str], int]:
+    """
+    Returns the bytes each distribution installed on paths, which defaults
+    to sys.path, takes, by distribution_key of its name and version.
+
+    Sizes come from RECORD files. Only the files they list without a size
+    are looked at, by workers threads (as many as ThreadPoolExecutor picks
+    if None, serially if 1), as are RECORD files themselves.
+    """
+    directories = metadata_directories(paths)
+
+    def measure(map_function) -> dict[tuple[str, str], int]:
+        listed = list(map_function(_listed_files, directories.values()))
+        unsized = [path for _, files in listed for path in files]
+        sizes = iter(list(map_function(_file_size, unsized)))
+        return {
+            key: size + sum(next(sizes) for _ in files)
+            for key, (size, files) in zip(directories, listed)
+        }
+
+    if workers == 1:
+        return measure(map)
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(workers) as executor:
+        return measure(executor.map)
+
+
+def footprints(
+    graph: DependencyGraph, sizes: dict[tuple[str, str], int]
+) -> tuple[list[Footprint], int]:
+    """
+    Returns the Footprint of each top-level package of graph, by name,
+    given the sizes distribution_sizes returns, and the bytes of the
+    packages several of them need, which removing any one wouldn't free.
+
+    What only one top-level package needs is found with the dominator tree
+    of the graph: the packages it dominates are the ones it alone needs.
+    """
+    from .closure import ClosureIndex
+
+    weights = [
+        sizes.get(distribution_key(graph.names[node], graph.versions[node]), 0)
+        if graph.is_installed(node)
+        else 0
+        for node in graph
+    ]
+    index = ClosureIndex(graph)
+    totals, exclusive, shared = index.weigh(weights)
+    found = [
+        Footprint(graph.names[root], graph.versions[root], total, only)
+        for root, total, only in zip(index.roots, totals, exclusive)
+    ]
+    return sorted(found, key=lambda footprint: footprint.name), shared
@@ -0,0 +1,127 @@
+"""Compares an environment with saved pip-chill output"""
+
+from collections import namedtuple
+from collections.abc import Iterable, Iterator
+
+from .requirements import canonicalize_name, parse_requirement
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from .pip_chill import Distribution
+
+# What pip-chill writes after the requirement of a dependency.
+_DEPENDENCY_COMMENT = "# Installed as dependency for"
+
+
+class Entry(
+    namedtuple("Entry", ("name", "version", "dependency"), defaults=(False,))
+):
+    """
+    A package of a snapshot or of an environment: its name, its version
+    (None if unknown) and whether it's a dependency of another package.
+    """
+
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        text = self.name
+        if self.version is not None:
+            text = f"{text}=={self.version}"
+        return f"{text} (dependency)" if self.dependency else text
+
+
+class Change(namedtuple("Change", ("change", "name", "old", "new"))):
+    """
+    A difference between a snapshot and an environment: a package that was
+    "added", "removed" or "changed", with its Entry in the snapshot (old)
+    and in the environment (new), None where it's missing.
+    """
+
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        if self.change == "added":
+            return f"+ {self.new}"
+        if self.change == "removed":
+            return f"- {self.old}"
+        return f"~ {self.old} -> {self.new}"
+
+
+class Snapshot:
+    """
+    The packages listed in saved pip-chill output, indexed by canonical
+    name. It understands plain and --verbose output, with or without
+    versions, and requirements.txt lines in general. Comments other than
+    pip-chill's own, options and blank lines are skipped.
+    """
+
+    __slots__ = ("entries", "dependencies")
+
+    def __init__(self, lines: Iterable[str]):
+        self.entries: dict[str, Entry] = {}
+        # Whether the snapshot lists dependencies, as --verbose does.
+        self.dependencies = False
+        for line in lines:
+            entry = self._parse(line.strip())
+            if entry is not None:
+                self.entries[canonicalize_name(entry.name)] = entry
+                self.dependencies = self.dependencies or entry.dependency
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def _parse(line: str) -> Entry | None:
+        dependency = line.startswith("#")
+        if dependency:
+            line, separator, _ = line[1:].partition(_DEPENDENCY_COMMENT)
+            if not separator:
+                # Any other comment.
+                return None
+        if not line or line.startswith("-"):
+            return None
+        # Drop trailing comments, such as the one of packages in a cycle.
+        line = line.partition(" #")[0].strip()
+        requirement = parse_requirement(line)
+        version = None
+        if requirement.specifier.startswith("==") and not (
+            requirement.specifier.startswith("===")
+        ):
+            version = requirement.specifier[2:].strip()
+        return Entry(requirement.name, version, dependency)
+
+    def diff(
+        self, distributions: Iterable["Distribution"]
+    ) -> Iterator[Change]:
+        """
+        Yields the changes from the snapshot to distributions, as chill
+        yields them, as they are found, then the packages that were
+        removed, by name.
+
+        Dependencies are only compared if the snapshot lists them, and
+        versions only where both sides have them.
+        """
+        seen = set()
+        for distribution in distributions:
+            key = canonicalize_name(distribution.name)
+            old = self.entries.get(key)
+            dependency = bool(distribution.required_by)
+            if dependency and old is None and not self.dependencies:
+                continue
+            seen.add(key)
+            new = Entry(
+                distribution.name,
+                None if distribution.hide_version else distribution.version,
+                dependency,
+            )
+            if old is None:
+                yield Change("added", new.name, None, new)
+            elif old.dependency != dependency or (
+                None not in (old.version, new.version)
+                and old.version != new.version
+            ):
+                yield Change("changed", new.name, old, new)
+
+        for key in sorted(self.entries.keys() - seen):
+            old = self.entries[key]
+            yield Change("removed", old.name, old, None)
@@ -0,0 +1,163 @@
+"""Times the phases of a run and counts what each of them processed"""
+
+import time
+from _thread import allocate_lock
+from collections import namedtuple
+from collections.abc import Callable, Iterator
+
+# The phases of a run, in the order they happen.
+PHASES = (
+    "discovery",
+    "metadata",
+    "parsing",
+    "graph",
+    "sorting",
+    "rendering",
+)
+
+
+class Span(namedtuple("Span", ("name", "seconds", "calls", "counts"))):
+    """
+    The time spent in a phase of a run, how many times the phase was
+    entered and a dictionary of what it counted, such as distributions
+    read or bytes read.
+    """
+
+    __slots__ = ()
+
+
+# Callables that get every Span of every finished run.
+_hooks: list[Callable[[Span], None]] = []
+
+
+def add_hook(hook: Callable[[Span], None]) -> None:
+    """
+    Calls hook with a Span for each phase of every run that finishes from
+    now on, for instance to forward it to a metrics system. Hooks are
+    called from the thread that ran pip-chill.
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[Span], None]) -> None:
+    """
+    Stops calling a hook added with add_hook.
+    """
+    _hooks.remove(hook)
+
+
+class _Phase:
+    """
+    Times the block it wraps, adding to the time of its phase.
+    """
+
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings: "Timings", name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self) -> "_Phase":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.timings.add(self.name, time.perf_counter() - self.start)
+
+
+class Timings:
+    """
+    Collects the time spent in the phases of a run of pip-chill, and
+    counters such as the number of distributions scanned.
+
+    A phase can be entered many times, as phases interleave while
+    distributions are read. Counting is thread safe.
+    """
+
+    __slots__ = ("_seconds", "_calls", "_counts", "_lock", "closed")
+
+    def __init__(self):
+        self._seconds: dict[str, float] = {}
+        self._calls: dict[str, int] = {}
+        self._counts: dict[str, dict[str, int]] = {}
+        self._lock = allocate_lock()
+        self.closed = False
+
+    def phase(self, name: str) -> _Phase:
+        """
+        Returns a context manager that times the block it wraps as part of
+        the named phase.
+        """
+        return _Phase(self, name)
+
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        """
+        Adds seconds, spent in calls runs of the named phase.
+        """
+        with self._lock:
+            self._seconds[name] = self._seconds.get(name, 0.0) + seconds
+            self._calls[name] = self._calls.get(name, 0) + calls
+
+    def seconds(self, name: str) -> float:
+        """
+        Returns the time spent so far in the named phase.
+        """
+        return self._seconds.get(name, 0.0)
+
+    def count(self, phase: str, name: str, amount: int = 1) -> None:
+        """
+        Adds amount to the named counter of phase.
+        """
+        with self._lock:
+            counts = self._counts.setdefault(phase, {})
+            counts[name] = counts.get(name, 0) + amount
+
+    def __iter__(self) -> Iterator[Span]:
+        """
+        Yields a Span for each phase that ran or counted anything, known
+        phases first, in the order they happen.
+        """
+        used = {**self._seconds, **self._counts}
+        names = [name for name in PHASES if name in used]
+        names.extend(name for name in used if name not in names)
+        for name in names:
+            yield Span(
+                name,
+                self._seconds.get(name, 0.0),
+                self._calls.get(name, 0),
+                dict(self._counts.get(name, {})),
+            )
+
+    def close(self) -> None:
+        """
+        Marks the run as finished and calls the hooks with its spans. Only
+        the first call does anything.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if _hooks:
+            for span in self:
+                for hook in list(_hooks):
+                    hook(span)
+
+    def report(self) -> str:
+        """
+        Returns a table of the time spent in each phase, and what it
+        counted.
+        """
+        spans = list(self)
+        total = sum(span.seconds for span in spans)
+        lines = []
+        for span in spans:
+            counts = ", ".join(
+                f"{value} {name}" for name, value in span.counts.items()
+            )
+            share = span.seconds / total * 100 if total else 0.0
+            line = (
+                f"{span.name:<10} {span.seconds * 1000:10.2f} ms "
+                f"{share:5.1f}%"
+            )
+            lines.append(f"{line}  {counts}" if counts else line)
+        lines.append(f"{'total':<10} {total * 1000:10.2f} ms")
+        return "\n".join(lines)
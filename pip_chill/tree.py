@@ -0,0 +1,71 @@
+"""Draws the dependency graph as a tree below the top-level packages"""
+
+from collections.abc import Iterator
+
+from .graph import DependencyGraph
+
+INDENT = "  "
+
+
+def _label(graph: DependencyGraph, node: int, no_version: bool) -> str:
+    name = graph.names[node]
+    if not graph.is_installed(node):
+        return f"{name} # Not installed"
+    if no_version:
+        return name
+    return f"{name}=={graph.versions[node]}"
+
+
+def iter_tree(
+    graph: DependencyGraph,
+    depth: int | None = None,
+    no_version: bool = False,
+    top_level: list[list[int]] | None = None,
+) -> Iterator[str]:
+    """
+    Yields the lines of a tree of the packages of graph: each top-level
+    package, by name, followed by what it requires, indented and commented
+    out, down to depth levels below it (all if None).
+
+    A package shared by many others has its requirements shown only the
+    first time it's met. Later, it's marked "# See above" instead, so that
+    the tree has a line per edge of the graph at most, where expanding
+    every path could take exponentially many. With a depth limit, a package
+    met again closer to the top is shown again, to as many levels as it
+    gets there. Pass what graph.top_level() returns as top_level to avoid
+    finding the top-level packages again.
+    """
+    if top_level is None:
+        top_level = graph.top_level()
+    names = graph.names
+    roots = sorted(
+        (node for group in top_level for node in group),
+        key=names.__getitem__,
+    )
+
+    # How many levels below each package were shown, the first time or,
+    # with a depth limit, the time it got the most. Packages in a cycle
+    # are marked when first met, so they aren't expanded inside themselves.
+    shown: dict[int, float] = {}
+    unlimited = float("inf")
+    for root in roots:
+        stack = [(root, 0)]
+        while stack:
+            node, level = stack.pop()
+            prefix = f"#{INDENT * level} " if level else ""
+            label = _label(graph, node, no_version)
+            requires = graph.requires(node)
+            below = unlimited if depth is None else depth - level
+            if not requires or below <= 0:
+                yield prefix + label
+            elif shown.get(node, 0) >= below:
+                yield f"{prefix}{label} # See above"
+            else:
+                shown[node] = below
+                yield prefix + label
+                stack.extend(
+                    (child, level + 1)
+                    for child in sorted(
+                        requires, key=names.__getitem__, reverse=True
+                    )
+                )
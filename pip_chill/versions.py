@@ -0,0 +1,341 @@
+"""PEP 440 versions and version specifiers"""
+
+import functools
+import math
+import re
+from collections import namedtuple
+
+_version = re.compile(
+    r"""
+    ^\s*v?
+    (?:(?P<epoch>[0-9]+)!)?
+    (?P<release>[0-9]+(?:\.[0-9]+)*)
+    (?:
+        [-_.]?(?P<pre_label>alpha|a|beta|b|preview|pre|c|rc)
+        [-_.]?(?P<pre_number>[0-9]+)?
+    )?
+    (?:
+        -(?P<post_implicit>[0-9]+)
+        |
+        [-_.]?(?P<post_label>post|rev|r)[-_.]?(?P<post_number>[0-9]+)?
+    )?
+    (?:[-_.]?(?P<dev_label>dev)[-_.]?(?P<dev_number>[0-9]+)?)?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    \s*$
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+_specifier = re.compile(r"^\s*(~=|===|==|!=|<=|>=|<|>)\s*(\S+)\s*$")
+
+# Pre-release labels in their normal form, and how they sort.
+_pre_labels = {
+    "a": "a",
+    "alpha": "a",
+    "b": "b",
+    "beta": "b",
+    "c": "rc",
+    "pre": "rc",
+    "preview": "rc",
+    "rc": "rc",
+}
+_pre_order = {"a": 0, "b": 1, "rc": 2}
+
+
+@functools.total_ordering
+class Version:
+    """
+    A parsed PEP 440 version. Versions compare as PEP 440 says they
+    should, so 1.0 == 1.0.0 and 1.0.dev1 < 1.0a1 < 1.0 < 1.0.post1.
+    """
+
+    __slots__ = ("epoch", "release", "pre", "post", "dev", "local", "_key")
+
+    def __init__(
+        self,
+        epoch: int = 0,
+        release: tuple[int, ...] = (0,),
+        pre: tuple[str, int] | None = None,
+        post: int | None = None,
+        dev: int | None = None,
+        local: tuple[int | str, ...] | None = None,
+    ):
+        self.epoch = epoch
+        self.release = release
+        self.pre = pre
+        self.post = post
+        self.dev = dev
+        self.local = local
+
+        stripped = release
+        while len(stripped) > 1 and stripped[-1] == 0:
+            stripped = stripped[:-1]
+        if pre is None and post is None and dev is not None:
+            # 1.0.dev1 sorts before 1.0a1.
+            pre_key = (-1, 0)
+        elif pre is None:
+            pre_key = (len(_pre_order), 0)
+        else:
+            pre_key = (_pre_order[pre[0]], pre[1])
+        self._key = (
+            epoch,
+            stripped,
+            pre_key,
+            -1 if post is None else post,
+            math.inf if dev is None else dev,
+            ()
+            if local is None
+            else tuple(
+                (1, part, "") if isinstance(part, int) else (0, 0, part)
+                for part in local
+            ),
+        )
+
+    def __repr__(self) -> str:
+        return f"<{self.__module__}.{self.__class__.__name__} '{self}'>"
+
+    def __str__(self) -> str:
+        text = ".".join(str(part) for part in self.release)
+        if self.epoch:
+            text = f"{self.epoch}!{text}"
+        if self.pre is not None:
+            text += f"{self.pre[0]}{self.pre[1]}"
+        if self.post is not None:
+            text += f".post{self.post}"
+        if self.dev is not None:
+            text += f".dev{self.dev}"
+        if self.local is not None:
+            text += "+" + ".".join(str(part) for part in self.local)
+        return text
+
+    def __hash__(self) -> int:
+        return hash(self._key)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self._key == other._key
+
+    def __lt__(self, other: "Version") -> bool:
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self._key < other._key
+
+    @property
+    def public(self) -> "Version":
+        """
+        This version without its local part.
+        """
+        if self.local is None:
+            return self
+        return self.without()
+
+    def without(
+        self, pre: bool = False, post: bool = False, dev: bool = False
+    ) -> "Version":
+        """
+        Returns this version, without its local part and, optionally,
+        without its pre-release, post-release or development parts.
+        """
+        return Version(
+            self.epoch,
+            self.release,
+            None if pre else self.pre,
+            None if post else self.post,
+            None if dev else self.dev,
+        )
+
+    @property
+    def is_prerelease(self) -> bool:
+        return self.pre is not None or self.dev is not None
+
+    @property
+    def is_postrelease(self) -> bool:
+        return self.post is not None
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_version(text: str) -> Version | None:
+    """
+    Parses a PEP 440 version, returning None if text isn't one. Results are
+    memoised, as the same versions show up again and again.
+    """
+    match = _version.match(text)
+    if match is None:
+        return None
+
+    pre = None
+    if match["pre_label"]:
+        pre = (
+            _pre_labels[match["pre_label"].lower()],
+            int(match["pre_number"] or 0),
+        )
+    post = None
+    if match["post_implicit"]:
+        post = int(match["post_implicit"])
+    elif match["post_label"]:
+        post = int(match["post_number"] or 0)
+    dev = None
+    if match["dev_label"]:
+        dev = int(match["dev_number"] or 0)
+    local = None
+    if match["local"]:
+        local = tuple(
+            int(part) if part.isdigit() else part.lower()
+            for part in re.split(r"[-_.]", match["local"])
+        )
+
+    return Version(
+        int(match["epoch"] or 0),
+        tuple(int(part) for part in match["release"].split(".")),
+        pre,
+        post,
+        dev,
+        local,
+    )
+
+
+def _prefix_match(prefix: Version, candidate: Version) -> bool:
+    """
+    Returns whether candidate matches the release prefix of a wildcard
+    specifier, like 1.2 in ==1.2.*.
+    """
+    size = len(prefix.release)
+    release = candidate.release + (0,) * (size - len(candidate.release))
+    return (
+        candidate.epoch == prefix.epoch and release[:size] == prefix.release
+    )
+
+
+def _is_prerelease_of(candidate: Version, version: Version) -> bool:
+    """
+    Returns whether candidate is a pre-release of the final release
+    version, like 1.0a1 is of 1.0 and 1.0.post1.dev1 is of 1.0.post1.
+    """
+    if version.is_prerelease or not candidate.is_prerelease:
+        return False
+    if candidate.without(pre=True, post=True, dev=True) != version.without(
+        post=True
+    ):
+        return False
+    return version.post is None or (
+        candidate.pre is None and candidate.post == version.post
+    )
+
+
+class Specifier(namedtuple("Specifier", ("operator", "version"))):
+    """
+    A single version specifier, like >=1.0 or ==2.*.
+    """
+
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        return f"{self.operator}{self.version}"
+
+    def contains(self, candidate: str | Version) -> bool:
+        """
+        Returns whether the candidate version satisfies this specifier.
+        Pre-releases are accepted, as they are for installed versions.
+        """
+        if self.operator == "===":
+            return str(candidate).lower() == self.version.lower()
+
+        if isinstance(candidate, str):
+            candidate = parse_version(candidate)
+        if candidate is None:
+            return False
+
+        if self.version.endswith(".*"):
+            prefix = parse_version(self.version[:-2])
+            if prefix is None or self.operator not in ("==", "!="):
+                return False
+            matches = _prefix_match(prefix, candidate.public)
+            return matches if self.operator == "==" else not matches
+
+        version = parse_version(self.version)
+        if version is None:
+            return False
+
+        if self.operator in ("==", "!="):
+            if version.local is None:
+                candidate = candidate.public
+            return (candidate == version) == (self.operator == "==")
+        if self.operator == "<=":
+            return candidate.public <= version
+        if self.operator == ">=":
+            return candidate.public >= version
+        if self.operator == "<":
+            # <1.0 doesn't let in pre-releases of 1.0 itself.
+            return candidate < version and not _is_prerelease_of(
+                candidate, version
+            )
+        if self.operator == ">":
+            # >1.0 doesn't let in post-releases or local versions of 1.0.
+            return candidate > version and not (
+                not version.is_postrelease
+                and candidate.is_postrelease
+                and candidate.without(post=True, dev=True) == version
+                or candidate.local is not None
+                and candidate.public == version
+            )
+        # ~=1.4.2 means >=1.4.2, ==1.4.*
+        if len(version.release) < 2:
+            return False
+        prefix = Version(version.epoch, version.release[:-1])
+        return candidate.public >= version and _prefix_match(
+            prefix, candidate.public
+        )
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_specifier(text: str) -> Specifier | None:
+    """
+    Parses a single version specifier, returning None if text isn't a
+    valid one.
+    """
+    match = _specifier.match(text)
+    if match is None:
+        return None
+    operator, version = match.groups()
+    if operator == "===":
+        return Specifier(operator, version)
+
+    if version.endswith(".*"):
+        # Wildcards are only allowed after the release part, in == and !=.
+        prefix = parse_version(version[:-2])
+        if (
+            operator not in ("==", "!=")
+            or prefix is None
+            or prefix.without(pre=True, post=True, dev=True) != prefix
+            or prefix.local is not None
+        ):
+            return None
+        return Specifier(operator, version)
+
+    parsed = parse_version(version)
+    if parsed is None:
+        return None
+    if parsed.local is not None and operator not in ("==", "!="):
+        return None
+    if operator == "~=" and len(parsed.release) < 2:
+        return None
+    return Specifier(operator, version)
+
+
+@functools.lru_cache(maxsize=8192)
+def satisfies(version: str, specifiers: str) -> bool:
+    """
+    Returns whether version satisfies all the comma separated specifiers,
+    as in >=1.0,!=1.3,<2. Invalid specifiers are left out.
+
+    The packages of an environment often require the same versions of the
+    same packages, so results are memoised.
+    """
+    for text in specifiers.split(","):
+        if not text.strip():
+            continue
+        specifier = parse_specifier(text)
+        if specifier is not None and not specifier.contains(version):
+            return False
+    return True
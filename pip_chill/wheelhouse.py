@@ -0,0 +1,106 @@
+"""Reads the metadata of wheels without installing them"""
+
+import os
+import zipfile
+from collections.abc import Iterator
+
+from .discovery import (
+    DistributionMetadata,
+    parse_headers,
+    parse_message,
+    read_headers,
+)
+from .requirements import canonicalize_name
+from .versions import parse_version
+
+
+def _metadata_member(wheel: zipfile.ZipFile, path: str) -> str | None:
+    """
+    Returns the name of the METADATA member of wheel, found at path.
+    """
+    # Wheels are named {name}-{version}(-{build})?-{python}-{abi}-{platform}
+    # and keep their metadata in {name}-{version}.dist-info.
+    name, _, rest = os.path.basename(path).partition("-")
+    version = rest.partition("-")[0]
+    expected = f"{name}-{version}.dist-info/METADATA"
+    try:
+        wheel.getinfo(expected)
+        return expected
+    except KeyError:
+        pass
+    for member in wheel.namelist():
+        directory, _, filename = member.partition("/")
+        if filename == "METADATA" and directory.endswith(".dist-info"):
+            return member
+    return None
+
+
+def read_wheel(path: str) -> DistributionMetadata | None:
+    """
+    Reads the name, version and requirements of the wheel at path from its
+    METADATA headers. Only that member is read: its position comes from
+    the central directory of the zip file, so nothing is extracted.
+
+    Returns None if path isn't a readable wheel.
+    """
+    try:
+        with zipfile.ZipFile(path) as wheel:
+            member = _metadata_member(wheel, path)
+            if member is None:
+                return None
+            with wheel.open(member) as metadata_file:
+                headers, _ = read_headers(metadata_file)
+            record = parse_headers(headers, path)
+            if record is None:
+                record = parse_message(wheel.read(member), path)
+            return record
+    except (OSError, zipfile.BadZipFile):
+        return None
+
+
+def _newest(records: list[DistributionMetadata]) -> DistributionMetadata:
+    def key(record: DistributionMetadata) -> tuple:
+        version = parse_version(record.version or "")
+        # Versions that can't be parsed sort before the others.
+        return (version is not None, version or 0)
+
+    return max(records, key=key)
+
+
+def iter_wheelhouse(
+    directory: str | os.PathLike, workers: int | None = None
+) -> Iterator[DistributionMetadata]:
+    """
+    Yields the metadata of the wheels in directory, by file name, reading
+    them with workers threads (as many as ThreadPoolExecutor picks if
+    None, serially if 1). Of several wheels of the same project, as built
+    for different platforms or versions, the one with the newest version
+    is yielded. Unreadable wheels are skipped.
+
+    The result can be given as metadata to dependency_graph and chill.
+    """
+    with os.scandir(directory) as children:
+        paths = sorted(
+            child.path
+            for child in children
+            if child.name.lower().endswith(".whl") and child.is_file()
+        )
+
+    if workers == 1:
+        records = list(map(read_wheel, paths))
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(workers) as executor:
+            records = list(executor.map(read_wheel, paths))
+
+    projects: dict[str, list[DistributionMetadata]] = {}
+    for record in records:
+        if record is not None and record.name:
+            projects.setdefault(canonicalize_name(record.name), []).append(
+                record
+            )
+    newest = {_newest(found).path for found in projects.values()}
+    for record in records:
+        if record is not None and record.path in newest:
+            yield record
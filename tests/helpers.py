@@ -0,0 +1,62 @@
+"""
+Helpers to build fake installed distributions for the tests.
+"""
+
+import os
+
+
+def make_dist_info(
+    directory: str,
+    name: str,
+    version: str = "1.0",
+    requires: tuple[str, ...] = (),
+    description: str = "",
+) -> str:
+    """
+    Creates a minimal dist-info directory in directory and returns its path.
+    """
+    path = os.path.join(
+        directory, f"{name.replace('-', '_')}-{version}.dist-info"
+    )
+    os.makedirs(path, exist_ok=True)
+    headers = [
+        "Metadata-Version: 2.1",
+        f"Name: {name}",
+        f"Version: {version}",
+    ]
+    headers.extend(f"Requires-Dist: {requirement}" for requirement in requires)
+    with open(
+        os.path.join(path, "METADATA"), "w", encoding="utf-8"
+    ) as metadata_file:
+        metadata_file.write("\n".join(headers) + "\n\n" + description)
+    return path
+
+
+def make_wheel(
+    directory: str,
+    name: str,
+    version: str = "1.0",
+    requires: tuple[str, ...] = (),
+    description: str = "",
+) -> str:
+    """
+    Creates a minimal wheel of name in directory and returns its path.
+    """
+    import zipfile
+
+    escaped = name.replace("-", "_")
+    path = os.path.join(directory, f"{escaped}-{version}-py3-none-any.whl")
+    headers = [
+        "Metadata-Version: 2.1",
+        f"Name: {name}",
+        f"Version: {version}",
+    ]
+    headers.extend(f"Requires-Dist: {requirement}" for requirement in requires)
+    dist_info = f"{escaped}-{version}.dist-info"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as wheel:
+        wheel.writestr(f"{escaped}/__init__.py", "")
+        wheel.writestr(
+            f"{dist_info}/METADATA", "\n".join(headers) + "\n\n" + description
+        )
+        wheel.writestr(f"{dist_info}/RECORD", "")
+    return path
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+
+"""
+test_aio
+----------------------------------
+
+Tests for `pip_chill.aio` module.
+"""
+
+import asyncio
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from pip_chill import aio, chill, chill_environments, discovery
+from pip_chill.aio import achill, achill_environments, aiter_metadata
+from pip_chill.cache import MetadataCache
+from tests.helpers import make_dist_info
+
+
+class TestAsyncChill(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.site_packages = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.site_packages)
+        for number in range(50):
+            make_dist_info(
+                self.site_packages,
+                f"package-{number}",
+                "1.0",
+                (f"package-{number + 1}",) if number % 5 else (),
+            )
+        self.executor = ThreadPoolExecutor(8)
+        self.addCleanup(self.executor.shutdown)
+
+    async def test_same_as_chill(self) -> None:
+        expected = chill(paths=[self.site_packages])
+        for options in ({}, {"concurrency": 1, "batch_size": 1}):
+            packages, dependencies = await achill(
+                paths=[self.site_packages], executor=self.executor, **options
+            )
+            self.assertEqual(
+                [str(package) for package in packages],
+                [str(package) for package in expected[0]],
+            )
+            self.assertEqual(
+                [str(dependency) for dependency in dependencies],
+                [str(dependency) for dependency in expected[1]],
+            )
+
+    async def test_metadata_order(self) -> None:
+        records = [
+            record
+            async for record in aiter_metadata(
+                [self.site_packages, self.site_packages], batch_size=7
+            )
+        ]
+        self.assertEqual(
+            records,
+            list(
+                discovery.iter_metadata(
+                    [self.site_packages, self.site_packages]
+                )
+            ),
+        )
+
+    async def test_concurrency_limit(self) -> None:
+        read_metadata = discovery.read_metadata
+        lock = threading.Lock()
+        running = []
+        most = 0
+
+        def slow_read(path: str) -> discovery.DistributionMetadata:
+            nonlocal most
+            with lock:
+                running.append(path)
+                most = max(most, len(running))
+            time.sleep(0.002)
+            with lock:
+                running.remove(path)
+            return read_metadata(path)
+
+        ticks = 0
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticker = asyncio.ensure_future(tick())
+        with mock.patch.object(discovery, "read_metadata", slow_read):
+            await achill(
+                paths=[self.site_packages],
+                concurrency=2,
+                batch_size=5,
+                executor=self.executor,
+            )
+        ticker.cancel()
+        self.assertEqual(most, 2)
+        # The loop kept running while metadata was read.
+        self.assertGreater(ticks, 10)
+
+    async def test_cache(self) -> None:
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        cold = await achill(paths=[self.site_packages], cache=cache_dir)
+        with mock.patch.object(aio, "read_metadata") as read_metadata:
+            warm = await achill(paths=[self.site_packages], cache=cache_dir)
+        read_metadata.assert_not_called()
+        self.assertEqual(
+            [list(map(str, result)) for result in warm],
+            [list(map(str, result)) for result in cold],
+        )
+
+    async def test_cache_on_loop_thread(self) -> None:
+        cache = MetadataCache(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, cache.directory)
+        threads = set()
+
+        def on_loop_thread(method):
+            def wrapper(*args, **kwargs):
+                threads.add(threading.get_ident())
+                return method(*args, **kwargs)
+
+            return wrapper
+
+        for name in ("get", "put", "mark_scanned"):
+            setattr(cache, name, on_loop_thread(getattr(cache, name)))
+        records = [
+            record
+            async for record in aiter_metadata(
+                [self.site_packages],
+                cache,
+                batch_size=4,
+                executor=self.executor,
+            )
+        ]
+        self.assertEqual(len(records), 50)
+        self.assertEqual(threads, {threading.get_ident()})
+
+    async def test_environments(self) -> None:
+        other = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other)
+        make_dist_info(other, "tool", "2.0")
+        environments = [self.site_packages, other]
+        results = await achill_environments(
+            environments, executor=self.executor
+        )
+        self.assertEqual(
+            [
+                (environment, [list(map(str, part)) for part in result])
+                for environment, result in results
+            ],
+            [
+                (environment, [list(map(str, part)) for part in result])
+                for environment, result in chill_environments(environments)
+            ],
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
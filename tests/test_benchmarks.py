@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+"""
+test_benchmarks
+----------------------------------
+
+Checks the synthetic environments the benchmarks run on against
+`pip_chill`.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from pip_chill import chill
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "benchmarks",
+    ),
+)
+
+from synthetic import Shape, make_environment  # noqa: E402
+
+
+class TestSyntheticEnvironments(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_top_level(self) -> None:
+        for shape in (
+            Shape(300),
+            Shape(300, fan_out=1, depth=50, cycles=0.1, extras=0.2, seed=1),
+        ):
+            with self.subTest(shape=shape):
+                path = os.path.join(self.directory, str(shape.seed))
+                environment = make_environment(path, shape)
+                distributions, _ = chill(paths=[path], show_all=True)
+                self.assertEqual(
+                    {distribution.name for distribution in distributions},
+                    environment.top_level,
+                )
+
+    @unittest.skipUnless(
+        os.environ.get("PIP_CHILL_SLOW_TESTS"),
+        "set PIP_CHILL_SLOW_TESTS=1 to run",
+    )
+    def test_top_level_large(self) -> None:
+        shape = Shape(50_000, huge=0)
+        environment = make_environment(self.directory, shape)
+        distributions, _ = chill(paths=[self.directory], show_all=True)
+        self.assertEqual(
+            {distribution.name for distribution in distributions},
+            environment.top_level,
+        )
+        # Some of them are cycles nothing else requires.
+        self.assertTrue(
+            any(distribution.cycle for distribution in distributions)
+        )
+
+    def test_reused(self) -> None:
+        shape = Shape(20, huge=1, metadata_size=1024)
+        make_environment(self.directory, shape)
+        metadata = os.path.join(
+            self.directory, "package_00000-1.0.dist-info", "METADATA"
+        )
+        self.assertGreater(os.path.getsize(metadata), 1024)
+        os.remove(metadata)
+        make_environment(self.directory, shape)
+        self.assertFalse(os.path.exists(metadata))
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+"""
+test_cache
+----------------------------------
+
+Tests for `pip_chill.cache` module.
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from pip_chill import chill, chill_environments, discovery
+from pip_chill.cache import MetadataCache
+from tests.helpers import make_dist_info
+
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.site_packages = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        make_dist_info(self.site_packages, "alpha", "1.0", ("beta>=2",))
+        make_dist_info(self.site_packages, "beta", "2.0")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.site_packages)
+        shutil.rmtree(self.cache_dir)
+
+    def scan(self) -> list[discovery.DistributionMetadata]:
+        cache = MetadataCache(self.cache_dir)
+        records = list(discovery.iter_metadata([self.site_packages], cache))
+        cache.save()
+        return records
+
+    def test_cold_and_warm_runs_agree(self) -> None:
+        cold = self.scan()
+        with mock.patch.object(discovery, "read_metadata") as read_metadata:
+            warm = self.scan()
+        read_metadata.assert_not_called()
+        self.assertEqual(cold, warm)
+        self.assertEqual(
+            [(r.name, r.version, r.requires) for r in warm],
+            [("alpha", "1.0", ("beta>=2",)), ("beta", "2.0", ())],
+        )
+
+    def test_changed_distribution_is_read_again(self) -> None:
+        self.scan()
+        shutil.rmtree(make_dist_info(self.site_packages, "beta", "2.0"))
+        make_dist_info(self.site_packages, "beta", "3.0")
+        versions = {record.name: record.version for record in self.scan()}
+        self.assertEqual(versions["beta"], "3.0")
+
+    def test_removed_distributions_are_evicted(self) -> None:
+        self.scan()
+        self.assertEqual(len(MetadataCache(self.cache_dir)), 2)
+        shutil.rmtree(make_dist_info(self.site_packages, "beta", "2.0"))
+        self.scan()
+        self.assertEqual(len(MetadataCache(self.cache_dir)), 1)
+
+    def test_corrupt_cache_is_ignored(self) -> None:
+        with open(
+            MetadataCache(self.cache_dir).path, "w", encoding="utf-8"
+        ) as cache_file:
+            cache_file.write("{not json")
+        self.assertEqual(len(self.scan()), 2)
+
+    def test_concurrent_saves_are_merged(self) -> None:
+        other = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other)
+        make_dist_info(other, "gamma", "1.0")
+        first = MetadataCache(self.cache_dir)
+        second = MetadataCache(self.cache_dir)
+        list(discovery.iter_metadata([self.site_packages], first))
+        list(discovery.iter_metadata([other], second))
+        first.save()
+        second.save()
+        self.assertEqual(len(MetadataCache(self.cache_dir)), 3)
+
+    def test_chill_environments_with_cache(self) -> None:
+        environments = []
+        for index in range(4):
+            environment = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, environment)
+            for package in range(5):
+                make_dist_info(environment, f"package-{index}-{package}")
+            environments.append(environment)
+        list(
+            chill_environments(
+                environments, processes=4, cache=self.cache_dir
+            )
+        )
+        self.assertEqual(len(MetadataCache(self.cache_dir)), 20)
+
+    def test_chill_with_cache(self) -> None:
+        uncached = chill(show_all=True)
+        for _ in range(2):
+            cached = chill(show_all=True, cache=self.cache_dir)
+            self.assertEqual(
+                [[str(p) for p in part] for part in uncached],
+                [[str(p) for p in part] for part in cached],
+            )
+        self.assertGreater(len(MetadataCache(self.cache_dir)), 0)
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+"""
+test_check
+----------------------------------
+
+Tests for `pip_chill.check` module.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from pip_chill.check import Problem, unmet_requirements
+from pip_chill.pip_chill import dependency_graph
+from tests.helpers import make_dist_info
+
+
+class TestCheck(unittest.TestCase):
+    def setUp(self) -> None:
+        self.site_packages = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.site_packages)
+        make_dist_info(
+            self.site_packages,
+            "app",
+            "1.0",
+            (
+                "lib (<3, >=2)",
+                "missing[extra]>=1",
+                "other; python_version < '3'",
+                "tool",
+                "data @ https://example.com/data.zip",
+            ),
+        )
+        make_dist_info(self.site_packages, "lib", "3.1")
+        make_dist_info(self.site_packages, "data", "0.1")
+        make_dist_info(self.site_packages, "tool", "1.0rc1", ("lib>=3.0",))
+        make_dist_info(self.site_packages, "Plugin", "1.0", ("setuptools>60",))
+        make_dist_info(self.site_packages, "setuptools", "50.0")
+        self.expected = [
+            "app 1.0 has requirement lib<3,>=2, but you have lib 3.1.",
+            "app 1.0 requires missing, which is not installed.",
+            "Plugin 1.0 has requirement setuptools>60, but you have "
+            "setuptools 50.0.",
+        ]
+
+    def test_unmet_requirements(self) -> None:
+        counted: list = []
+        graph = dependency_graph(
+            show_all=True, paths=[self.site_packages], counted=counted
+        )
+        problems = unmet_requirements(graph, counted)
+        self.assertEqual(
+            problems[1],
+            Problem("app", "1.0", "missing[extra]>=1", "missing", None),
+        )
+        self.assertEqual([str(problem) for problem in problems], self.expected)
+
+        # Requirements on packages chill leaves out aren't counted then.
+        counted.clear()
+        graph = dependency_graph(paths=[self.site_packages], counted=counted)
+        self.assertEqual(len(unmet_requirements(graph, counted)), 2)
+
+    def test_command_line_interface(self) -> None:
+        command = [sys.executable, "pip_chill/cli.py", "--check"]
+        result = subprocess.run(
+            command + ["--path", self.site_packages],
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(result.stdout.splitlines(), self.expected)
+
+        make_dist_info(self.site_packages, "lib", "2.5")
+        shutil.rmtree(os.path.join(self.site_packages, "lib-3.1.dist-info"))
+        make_dist_info(self.site_packages, "missing", "1.0")
+        make_dist_info(self.site_packages, "setuptools", "61.0")
+        shutil.rmtree(
+            os.path.join(self.site_packages, "setuptools-50.0.dist-info")
+        )
+        result = subprocess.run(
+            command + ["--path", self.site_packages],
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(
+            result.stdout.splitlines(),
+            ["tool 1.0rc1 has requirement lib>=3.0, but you have lib 2.5."],
+        )
+
+        make_dist_info(self.site_packages, "tool", "1.0rc1", ("lib>=2",))
+        result = subprocess.run(
+            command + ["--path", self.site_packages],
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual((result.returncode, result.stdout), (0, ""))
+
+        result = subprocess.run(
+            command + ["--tree"], capture_output=True, text=True
+        )
+        self.assertEqual(result.returncode, 2)
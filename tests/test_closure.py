@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+
+"""
+test_closure
+----------------------------------
+
+Tests for `pip_chill.closure` module.
+"""
+
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from pip_chill.closure import ClosureIndex
+from pip_chill.graph import DependencyGraph
+from tests.helpers import make_dist_info
+
+
+def _reachable(graph: DependencyGraph, roots, removed=None) -> set[int]:
+    """
+    Returns the nodes reachable from roots without going through removed.
+    """
+    seen = set()
+    stack = [root for root in roots if root != removed]
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        stack.extend(
+            child for child in graph.requires(node) if child != removed
+        )
+    return seen
+
+
+class TestClosureIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        # app -> lib -> deep, app -> shared <- other, and a cycle of two
+        # packages nothing else requires.
+        self.graph = DependencyGraph()
+        nodes = {
+            name: self.graph.add_distribution(name, "1.0")
+            for name in ("app", "lib", "deep", "shared", "other", "a", "b")
+        }
+        self.missing = self.graph.node("missing")
+        for source, target in (
+            ("app", "lib"),
+            ("lib", "deep"),
+            ("app", "shared"),
+            ("other", "shared"),
+            ("a", "b"),
+            ("b", "a"),
+        ):
+            self.graph.add_edge(nodes[source], nodes[target])
+        self.graph.add_edge(nodes["lib"], self.missing)
+        self.nodes = nodes
+        self.index = ClosureIndex(self.graph)
+
+    def names(self, nodes) -> list[str]:
+        return sorted(self.graph.names[node] for node in nodes)
+
+    def test_roots(self) -> None:
+        self.assertEqual(
+            self.names(self.index.roots), ["a", "app", "b", "other"]
+        )
+
+    def test_needed_by(self) -> None:
+        self.assertEqual(self.names(self.index.needed_by("deep")), ["app"])
+        self.assertEqual(
+            self.names(self.index.needed_by("shared")), ["app", "other"]
+        )
+        self.assertEqual(self.names(self.index.needed_by("app")), ["app"])
+        self.assertEqual(self.names(self.index.needed_by("a")), ["a", "b"])
+
+    def test_orphans_if_removed(self) -> None:
+        self.assertEqual(
+            self.names(self.index.orphans_if_removed("app")), ["deep", "lib"]
+        )
+        self.assertEqual(
+            self.names(self.index.orphans_if_removed("lib")), ["deep"]
+        )
+        self.assertEqual(self.index.orphans_if_removed("shared"), [])
+        self.assertEqual(self.index.orphans_if_removed("a"), [])
+
+    def test_weigh(self) -> None:
+        weights = [2**node for node in self.graph]
+        totals, exclusive, shared = self.index.weigh(weights)
+        by_name = {
+            self.graph.names[root]: (total, only)
+            for root, total, only in zip(self.index.roots, totals, exclusive)
+        }
+        nodes = self.nodes
+        self.assertEqual(
+            by_name["app"],
+            (
+                weights[nodes["app"]]
+                + weights[nodes["lib"]]
+                + weights[nodes["deep"]]
+                + weights[nodes["shared"]]
+                + weights[self.missing],
+                weights[nodes["app"]]
+                + weights[nodes["lib"]]
+                + weights[nodes["deep"]]
+                + weights[self.missing],
+            ),
+        )
+        self.assertEqual(
+            by_name["other"],
+            (
+                weights[nodes["other"]] + weights[nodes["shared"]],
+                weights[nodes["other"]],
+            ),
+        )
+        self.assertEqual(
+            shared,
+            sum(weights[nodes[name]] for name in ("shared", "a", "b")),
+        )
+
+    def test_not_installed(self) -> None:
+        for name in ("missing", "unknown"):
+            with self.assertRaises(KeyError):
+                self.index.needed_by(name)
+            with self.assertRaises(KeyError):
+                self.index.orphans_if_removed(name)
+
+    def test_random_graphs(self) -> None:
+        generator = random.Random(0)
+        for _ in range(100):
+            graph = DependencyGraph()
+            size = generator.randint(1, 30)
+            for node in range(size):
+                if generator.random() < 0.9:
+                    graph.add_distribution(f"p{node}", "1.0")
+                else:
+                    graph.node(f"p{node}")
+            for _ in range(generator.randint(0, 2 * size)):
+                source = generator.randrange(size)
+                if graph.is_installed(source):
+                    graph.add_edge(source, generator.randrange(size))
+            index = ClosureIndex(graph)
+
+            installed = [node for node in graph if graph.is_installed(node)]
+            needed = _reachable(graph, index.roots)
+            for node in installed:
+                name = graph.names[node]
+                self.assertEqual(
+                    sorted(index.needed_by(name)),
+                    sorted(
+                        root
+                        for root in index.roots
+                        if node in _reachable(graph, [root])
+                    ),
+                )
+                orphans = needed - _reachable(graph, index.roots, node)
+                orphans.discard(node)
+                self.assertEqual(
+                    sorted(index.orphans_if_removed(name)),
+                    sorted(n for n in orphans if graph.is_installed(n)),
+                )
+
+            weights = [
+                generator.randint(1, 100) if graph.is_installed(node) else 0
+                for node in graph
+            ]
+            reachable = [_reachable(graph, [root]) for root in index.roots]
+            self.assertEqual(
+                index.weigh(weights),
+                (
+                    [sum(weights[n] for n in nodes) for nodes in reachable],
+                    [
+                        sum(
+                            weights[n]
+                            for n in needed
+                            - _reachable(graph, index.roots, root)
+                        )
+                        for root in index.roots
+                    ],
+                    sum(
+                        weights[node]
+                        for node in needed
+                        if sum(node in nodes for nodes in reachable) > 1
+                    ),
+                ),
+            )
+
+
+class TestClosureCommandLine(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        make_dist_info(self.directory, "app", "1.0", ("lib", "shared"))
+        make_dist_info(self.directory, "other", "1.0", ("shared",))
+        make_dist_info(self.directory, "lib", "1.0", ("deep",))
+        make_dist_info(self.directory, "deep", "1.0")
+        make_dist_info(self.directory, "shared", "1.0")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_why(self) -> None:
+        command = f"pip_chill/cli.py --path {self.directory} --why shared"
+
+        result = os.popen(command).read()
+        self.assertEqual(
+            result.splitlines(),
+            [
+                "# shared==1.0 # Installed as dependency for app, other",
+                "app==1.0",
+                "other==1.0",
+            ],
+        )
+
+    def test_orphans_if_removed(self) -> None:
+        command = (
+            f"pip_chill/cli.py --path {self.directory} "
+            "--orphans-if-removed app"
+        )
+
+        result = os.popen(command).read()
+        self.assertEqual(
+            result.splitlines(),
+            [
+                "# deep==1.0 # Installed as dependency for lib",
+                "# lib==1.0 # Installed as dependency for app",
+            ],
+        )
+
+    def test_not_installed(self) -> None:
+        command = (
+            f"pip_chill/cli.py --path {self.directory} --why unknown "
+            "2> /dev/null"
+        )
+
+        self.assertEqual(os.system(command), 256)
+
+    def test_ignored(self) -> None:
+        make_dist_info(self.directory, "setuptools", "69.0")
+        make_dist_info(self.directory, "deep", "1.0", ("setuptools",))
+        command = [
+            sys.executable,
+            "pip_chill/cli.py",
+            "--path",
+            self.directory,
+            "--why",
+            "setuptools",
+        ]
+
+        result = subprocess.run(command, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn(
+            "setuptools is left out unless --all is given", result.stderr
+        )
+        result = subprocess.run(
+            command + ["--all"], capture_output=True, text=True
+        )
+        self.assertEqual(
+            result.stdout.splitlines(),
+            [
+                "# setuptools==69.0 # Installed as dependency for deep",
+                "app==1.0",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
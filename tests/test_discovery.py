@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+"""
+test_discovery
+----------------------------------
+
+Tests for `pip_chill.discovery` module.
+"""
+
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import unittest
+from importlib import metadata
+
+from pip_chill import discovery
+from pip_chill.cache import MetadataCache
+from tests.helpers import make_dist_info
+
+
+class TestDiscovery(unittest.TestCase):
+    def setUp(self) -> None:
+        self.site_packages = [tempfile.mkdtemp(), tempfile.mkdtemp()]
+        for index in range(40):
+            make_dist_info(
+                self.site_packages[index % 2],
+                f"package-{index}",
+                f"{index}.0",
+                (f"package-{index + 1}",),
+            )
+
+    def tearDown(self) -> None:
+        for directory in self.site_packages:
+            shutil.rmtree(directory)
+
+    def test_serial_scan(self) -> None:
+        records = list(discovery.iter_metadata(self.site_packages))
+        self.assertEqual(len(records), 40)
+        self.assertEqual(records[0].name, "package-0")
+        self.assertEqual(records[0].requires, ("package-1",))
+        self.assertTrue(records[0].path.endswith("package_0-0.0.dist-info"))
+
+    def test_parallel_scan_matches_serial(self) -> None:
+        serial = list(discovery.iter_metadata(self.site_packages))
+        parallel = list(
+            discovery.iter_metadata(self.site_packages, workers=8)
+        )
+        self.assertEqual(serial, parallel)
+
+    def test_parallel_scan_with_cache(self) -> None:
+        serial = list(discovery.iter_metadata(self.site_packages))
+        cache_dir = tempfile.mkdtemp()
+        try:
+            for _ in range(2):
+                cache = MetadataCache(cache_dir)
+                parallel = list(
+                    discovery.iter_metadata(
+                        self.site_packages, cache=cache, workers=4
+                    )
+                )
+                cache.save()
+                self.assertEqual(serial, parallel)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_missing_path_entry_is_skipped(self) -> None:
+        records = list(
+            discovery.iter_metadata(["/nonexistent/path", *self.site_packages])
+        )
+        self.assertEqual(len(records), 40)
+
+    def test_unzipped_egg(self) -> None:
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        egg = os.path.join(directory, "foo-1.0-py3.11.egg")
+        os.makedirs(os.path.join(egg, "EGG-INFO"))
+        with open(
+            os.path.join(egg, "EGG-INFO", "PKG-INFO"), "w", encoding="utf-8"
+        ) as pkg_info:
+            pkg_info.write("Metadata-Version: 1.1\nName: foo\nVersion: 1.0\n")
+        with open(
+            os.path.join(egg, "EGG-INFO", "requires.txt"),
+            "w",
+            encoding="utf-8",
+        ) as requires:
+            requires.write("bar>=1\n")
+        records = list(discovery.iter_metadata([egg]))
+        self.assertEqual(
+            [(r.name, r.version, r.requires) for r in records],
+            [("foo", "1.0", ("bar>=1",))],
+        )
+
+
+class TestReadDistInfo(unittest.TestCase):
+    def setUp(self) -> None:
+        self.site_packages = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.site_packages)
+
+    def importlib_metadata(self, path: str) -> discovery.DistributionMetadata:
+        return discovery.from_distribution(
+            metadata.PathDistribution(pathlib.Path(path)), path
+        )
+
+    def test_matches_importlib_with_large_description(self) -> None:
+        path = make_dist_info(
+            self.site_packages,
+            "big-package",
+            "1.2.3",
+            ("small-package>=1.0", 'extra-package; extra == "dev"'),
+            "Name: not-a-header\n" * 20000,
+        )
+        record = discovery.read_dist_info(path)
+        self.assertEqual(record, self.importlib_metadata(path))
+        self.assertEqual(record.name, "big-package")
+
+    def test_ignores_folded_description_header(self) -> None:
+        path = os.path.join(self.site_packages, "folded-1.0.dist-info")
+        os.makedirs(path)
+        with open(
+            os.path.join(path, "METADATA"), "w", encoding="utf-8"
+        ) as metadata_file:
+            metadata_file.write(
+                "Metadata-Version: 1.2\nName: folded\nVersion: 1.0\n"
+                "Description: first line\n        |second line\n"
+                "Requires-Dist: other\n"
+            )
+        record = discovery.read_dist_info(path)
+        self.assertEqual(record, self.importlib_metadata(path))
+        self.assertEqual(record.requires, ("other",))
+
+    def test_unusual_metadata_falls_back(self) -> None:
+        path = os.path.join(self.site_packages, "broken-1.0.dist-info")
+        os.makedirs(path)
+        self.assertIsNone(discovery.read_dist_info(path))
+        with open(os.path.join(path, "METADATA"), "wb") as metadata_file:
+            metadata_file.write(b"Name: broken\nVersion: \xff\n")
+        self.assertIsNone(discovery.read_dist_info(path))
+
+    def test_egg_info_uses_importlib(self) -> None:
+        path = os.path.join(self.site_packages, "old-1.0.egg-info")
+        os.makedirs(path)
+        with open(
+            os.path.join(path, "PKG-INFO"), "w", encoding="utf-8"
+        ) as pkg_info:
+            pkg_info.write("Name: old\nVersion: 1.0\n")
+        with open(
+            os.path.join(path, "requires.txt"), "w", encoding="utf-8"
+        ) as requires:
+            requires.write("newer\n")
+        record = discovery.read_metadata(path)
+        self.assertEqual(record, self.importlib_metadata(path))
+        self.assertEqual(record.requires, ("newer",))
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
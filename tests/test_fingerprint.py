@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+"""
+test_fingerprint
+----------------------------------
+
+Tests for `pip_chill.fingerprint` module.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from pip_chill.fingerprint import fingerprint, top_level_fingerprints
+from tests.helpers import make_dist_info
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.site_packages = os.path.join(self.directory, "one")
+        os.mkdir(self.site_packages)
+        make_dist_info(self.site_packages, "app", "1.0", ("lib",))
+        make_dist_info(self.site_packages, "lib", "1.0")
+        make_dist_info(self.site_packages, "tool", "1.0")
+
+    def test_stable_and_independent_of_location(self) -> None:
+        digest = fingerprint([self.site_packages])
+        self.assertEqual(fingerprint([self.site_packages]), digest)
+        copy = os.path.join(self.directory, "two")
+        shutil.copytree(self.site_packages, copy)
+        self.assertEqual(fingerprint([copy]), digest)
+
+    def test_changes(self) -> None:
+        digest = fingerprint([self.site_packages])
+        shutil.rmtree(make_dist_info(self.site_packages, "lib", "1.0"))
+        make_dist_info(self.site_packages, "lib", "2.0")
+        upgraded = fingerprint([self.site_packages])
+        self.assertNotEqual(upgraded, digest)
+        make_dist_info(self.site_packages, "new", "1.0")
+        self.assertNotEqual(fingerprint([self.site_packages]), upgraded)
+
+    def test_record_mtimes(self) -> None:
+        record = os.path.join(
+            self.site_packages, "app-1.0.dist-info", "RECORD"
+        )
+        with open(record, "w", encoding="utf-8"):
+            pass
+        os.utime(record, ns=(0, 0))
+        digest = fingerprint([self.site_packages], record_mtimes=True)
+        os.utime(record, ns=(10**9, 10**9))
+        self.assertNotEqual(
+            fingerprint([self.site_packages], record_mtimes=True), digest
+        )
+        self.assertEqual(
+            fingerprint([self.site_packages]),
+            fingerprint([self.site_packages]),
+        )
+
+    def test_top_level_fingerprints(self) -> None:
+        digests = top_level_fingerprints([self.site_packages])
+        self.assertEqual(list(digests), ["app", "tool"])
+        shutil.rmtree(make_dist_info(self.site_packages, "lib", "1.0"))
+        make_dist_info(self.site_packages, "lib", "2.0")
+        upgraded = top_level_fingerprints([self.site_packages])
+        self.assertNotEqual(upgraded["app"], digests["app"])
+        self.assertEqual(upgraded["tool"], digests["tool"])
+
+    def test_command_line_interface(self) -> None:
+        command = (
+            f"pip_chill/cli.py --fingerprint -v --path {self.site_packages}"
+        )
+
+        result = os.popen(command).read().splitlines()
+        self.assertEqual(
+            result[0],
+            f"{fingerprint([self.site_packages])}  {self.site_packages}",
+        )
+        self.assertEqual(
+            result[1:],
+            [
+                f"{digest}  {name}"
+                for name, digest in top_level_fingerprints(
+                    [self.site_packages]
+                ).items()
+            ],
+        )
+
+    def test_options_it_takes(self) -> None:
+        snapshot = os.path.join(self.site_packages, "snapshot.txt")
+        with open(snapshot, "w", encoding="utf-8"):
+            pass
+        for options in (
+            ["--fingerprint", "--why", "app"],
+            ["--fingerprint", "--orphans-if-removed", "app"],
+            ["--fingerprint", "--format", "json"],
+            ["--fingerprint", "--tree"],
+            ["--fingerprint", "--sizes"],
+            ["--fingerprint", "--diff", snapshot],
+            ["--fingerprint", "--used-by", self.site_packages],
+            ["--record-mtimes"],
+        ):
+            with self.subTest(options=options):
+                result = subprocess.run(
+                    [sys.executable, "pip_chill/cli.py", *options],
+                    capture_output=True,
+                    text=True,
+                )
+                self.assertEqual(result.returncode, 2)
+                self.assertEqual(result.stdout, "")
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+"""
+test_graph
+----------------------------------
+
+Tests for `pip_chill.graph` module.
+"""
+
+import pickle
+import sys
+import unittest
+
+from pip_chill.graph import DependencyGraph
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self) -> None:
+        self.graph = DependencyGraph()
+        self.app = self.graph.add_distribution("app", "1.0")
+        self.lib = self.graph.add_distribution("lib", "2.0")
+        self.missing = self.graph.node("missing")
+        self.graph.add_edge(self.app, self.lib)
+        self.graph.add_edge(self.app, self.lib)
+        self.graph.add_edge(self.app, self.missing)
+        self.graph.add_edge(self.lib, self.missing)
+
+    def test_interning(self) -> None:
+        self.assertEqual(len(self.graph), 3)
+        self.assertEqual(self.graph.node("lib"), self.lib)
+        self.assertEqual(self.graph.get("app"), self.app)
+        self.assertIsNone(self.graph.get("other"))
+        self.assertIn("missing", self.graph)
+        self.assertEqual(self.graph.names[self.lib], "lib")
+
+    def test_installed(self) -> None:
+        self.assertTrue(self.graph.is_installed(self.app))
+        self.assertFalse(self.graph.is_installed(self.missing))
+
+    def test_adjacency(self) -> None:
+        self.assertEqual(
+            list(self.graph.requires(self.app)), [self.lib, self.missing]
+        )
+        self.assertEqual(list(self.graph.requires(self.missing)), [])
+        self.assertEqual(
+            list(self.graph.required_by(self.missing)), [self.app, self.lib]
+        )
+        self.assertEqual(self.graph.in_degree(self.app), 0)
+        self.assertEqual(self.graph.in_degree(self.lib), 1)
+        self.assertEqual(self.graph.edge_count, 3)
+
+    def test_edges_added_after_query(self) -> None:
+        self.assertEqual(self.graph.in_degree(self.app), 0)
+        self.graph.add_edge(self.lib, self.app)
+        self.assertEqual(list(self.graph.required_by(self.app)), [self.lib])
+        other = self.graph.add_distribution("other", "1.0")
+        self.assertEqual(list(self.graph.required_by(other)), [])
+
+    def test_remove_distributions(self) -> None:
+        self.assertEqual(self.graph.in_degree(self.missing), 2)
+        self.graph.remove_distributions([self.lib])
+        self.assertFalse(self.graph.is_installed(self.lib))
+        self.assertEqual(list(self.graph.requires(self.lib)), [])
+        self.assertEqual(list(self.graph.required_by(self.lib)), [self.app])
+        self.assertEqual(
+            list(self.graph.required_by(self.missing)), [self.app]
+        )
+        self.graph.clear_edges()
+        self.assertEqual(self.graph.edge_count, 0)
+        self.assertEqual(len(self.graph), 3)
+
+    def test_top_level(self) -> None:
+        self.assertEqual(self.graph.top_level(), [[self.app]])
+
+    def test_top_level_cycles(self) -> None:
+        edges = [
+            ("a", "b"),
+            ("b", "a"),
+            ("b", "c"),
+            ("selfish", "selfish"),
+            ("x", "y"),
+            ("y", "x"),
+            ("user", "x"),
+        ]
+        names = sorted({name for edge in edges for name in edge})
+        results = []
+        # The same graph, with nodes and edges added in different orders.
+        for order in (names, names[::-1]):
+            graph = DependencyGraph()
+            for name in order:
+                graph.add_distribution(name, "1.0")
+            for source, target in edges if order is names else edges[::-1]:
+                graph.add_edge(graph.node(source), graph.node(target))
+            results.append(
+                sorted(
+                    sorted(graph.names[node] for node in group)
+                    for group in graph.top_level()
+                )
+            )
+        self.assertEqual(results[0], [["a", "b"], ["selfish"], ["user"]])
+        self.assertEqual(results[0], results[1])
+
+    def test_top_level_not_installed(self) -> None:
+        graph = DependencyGraph()
+        graph.node("missing")
+        self.assertEqual(graph.top_level(), [])
+
+    def test_pickle(self) -> None:
+        graph = pickle.loads(pickle.dumps(self.graph))
+        self.assertEqual(graph.names, self.graph.names)
+        self.assertEqual(
+            list(graph.required_by(self.missing)), [self.app, self.lib]
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+
+"""
+test_hashes
+----------------------------------
+
+Tests for `pip_chill.hashes` module.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from pip_chill import chill
+from pip_chill.hashes import (
+    HASH_BUFFER_SIZE,
+    archive_index,
+    file_hash,
+    find_hashes,
+    hashed_requirement,
+    recorded_hashes,
+)
+from tests.helpers import make_dist_info, make_wheel
+
+
+def _sha256(path: str) -> str:
+    with open(path, "rb") as archive:
+        return "sha256:" + hashlib.sha256(archive.read()).hexdigest()
+
+
+class TestHashes(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.site_packages = os.path.join(self.directory, "site-packages")
+        self.wheels = os.path.join(self.directory, "wheels")
+        os.makedirs(os.path.join(self.wheels, "ab", "cd"))
+
+        app = make_dist_info(self.site_packages, "app", "1.0", ("lib",))
+        with open(
+            os.path.join(app, "direct_url.json"), "w", encoding="utf-8"
+        ) as direct_url:
+            json.dump(
+                {
+                    "url": "file:///wheels/app-1.0-py3-none-any.whl",
+                    "archive_info": {"hashes": {"sha256": "a" * 64}},
+                },
+                direct_url,
+            )
+        make_dist_info(self.site_packages, "lib", "1.0")
+        make_dist_info(self.site_packages, "tool", "1.0")
+        # Wheel caches nest their wheels in subdirectories.
+        self.lib_wheel = make_wheel(
+            os.path.join(self.wheels, "ab", "cd"), "lib", "1.0"
+        )
+
+    def test_file_hash(self) -> None:
+        path = os.path.join(self.directory, "large")
+        with open(path, "wb") as large:
+            large.write(os.urandom(HASH_BUFFER_SIZE * 2 + 123))
+        self.assertEqual(file_hash(path), _sha256(path))
+
+    def test_recorded_hashes(self) -> None:
+        app = os.path.join(self.site_packages, "app-1.0.dist-info")
+        self.assertEqual(recorded_hashes(app), ["sha256:" + "a" * 64])
+        with open(
+            os.path.join(app, "direct_url.json"), "w", encoding="utf-8"
+        ) as direct_url:
+            json.dump(
+                {"archive_info": {"hash": "sha256=" + "b" * 64}}, direct_url
+            )
+        self.assertEqual(recorded_hashes(app), ["sha256:" + "b" * 64])
+        lib = os.path.join(self.site_packages, "lib-1.0.dist-info")
+        self.assertEqual(recorded_hashes(lib), [])
+
+    def test_archive_index(self) -> None:
+        for name in ("my-tool-2.0.tar.gz", "other-1.0.zip", "README"):
+            with open(os.path.join(self.wheels, name), "w"):
+                pass
+        self.assertEqual(
+            archive_index(self.wheels),
+            {
+                ("lib", "1.0"): [self.lib_wheel],
+                ("my-tool", "2.0"): [
+                    os.path.join(self.wheels, "my-tool-2.0.tar.gz")
+                ],
+                ("other", "1.0"): [os.path.join(self.wheels, "other-1.0.zip")],
+            },
+        )
+
+    def test_find_hashes(self) -> None:
+        packages, dependencies = chill(paths=[self.site_packages])
+        for workers in (1, None):
+            hashes = find_hashes(
+                packages + dependencies,
+                [self.site_packages],
+                self.wheels,
+                workers,
+            )
+            self.assertEqual(
+                hashes,
+                {
+                    ("app", "1.0"): ["sha256:" + "a" * 64],
+                    ("lib", "1.0"): [_sha256(self.lib_wheel)],
+                },
+            )
+        self.assertEqual(
+            [
+                hashed_requirement(distribution, hashes)
+                for distribution in packages + dependencies
+            ],
+            [
+                f"app==1.0 --hash=sha256:{'a' * 64}",
+                "tool==1.0",
+                f"lib==1.0 --hash={_sha256(self.lib_wheel)} # Installed as "
+                "dependency for app",
+            ],
+        )
+
+    def test_command_line_interface(self) -> None:
+        command = [
+            sys.executable,
+            "pip_chill/cli.py",
+            "--hashes",
+            "--path",
+            self.site_packages,
+            "--wheel-cache",
+            self.wheels,
+        ]
+        result = subprocess.run(command, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("no hash found for tool==1.0", result.stderr)
+        self.assertEqual(
+            result.stdout.splitlines(),
+            [
+                f"app==1.0 --hash=sha256:{'a' * 64}",
+                "tool==1.0",
+                f"lib==1.0 --hash={_sha256(self.lib_wheel)} # Installed as "
+                "dependency for app",
+            ],
+        )
+
+        make_wheel(self.wheels, "tool", "1.0")
+        result = subprocess.run(command, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+
+        result = subprocess.run(
+            [sys.executable, "pip_chill/cli.py", "--hashes", "--no-version"],
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 2)
+
+    def test_ignored_packages(self) -> None:
+        make_dist_info(self.site_packages, "tool", "1.0", ("setuptools>=40",))
+        make_dist_info(self.site_packages, "setuptools", "69.0")
+        # Nothing requires pip, which has no hash to pin it with.
+        make_dist_info(self.site_packages, "pip", "24.0")
+        make_wheel(self.wheels, "tool", "1.0")
+        setuptools = make_wheel(self.wheels, "setuptools", "69.0")
+        command = [
+            sys.executable,
+            "pip_chill/cli.py",
+            "--hashes",
+            "--path",
+            self.site_packages,
+            "--wheel-cache",
+            self.wheels,
+        ]
+        result = subprocess.run(command, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertIn(
+            f"setuptools==69.0 --hash={_sha256(setuptools)} # Installed as "
+            "dependency for tool",
+            result.stdout.splitlines(),
+        )
+        self.assertNotIn("pip==", result.stdout)
+
+        result = subprocess.run(
+            command + ["--all"], capture_output=True, text=True
+        )
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("no hash found for pip==24.0", result.stderr)
+
+    def test_wheelhouse(self) -> None:
+        tool = make_wheel(self.wheels, "tool", "1.0")
+        result = os.popen(
+            f"pip_chill/cli.py --hashes --wheelhouse {self.wheels}"
+        ).read()
+        self.assertEqual(
+            result.splitlines(), [f"tool==1.0 --hash={_sha256(tool)}"]
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+
+"""
+test_image
+----------------------------------
+
+Tests for `pip_chill.image` module.
+"""
+
+import gzip
+import io
+import json
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import unittest
+
+from pip_chill import chill
+from pip_chill.fingerprint import fingerprint
+from pip_chill.image import read_image_tar, rootfs_paths
+from tests.helpers import make_dist_info
+
+SITE_PACKAGES = "usr/lib/python3.11/site-packages"
+
+
+def _metadata(name: str, version: str, *requires: str) -> bytes:
+    headers = ["Metadata-Version: 2.1", f"Name: {name}", f"Version: {version}"]
+    headers.extend(f"Requires-Dist: {requirement}" for requirement in requires)
+    return ("\n".join(headers) + "\n\n" + "x" * 1000).encode()
+
+
+def _tar(files: dict[str, bytes], mode: str = "w") -> bytes:
+    """
+    Returns a tarball holding files, by path, in that order.
+    """
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        for path, contents in files.items():
+            member = tarfile.TarInfo(path)
+            member.size = len(contents)
+            archive.addfile(member, io.BytesIO(contents))
+    return buffer.getvalue()
+
+
+def _dist_info(name: str, version: str, *requires: str) -> dict[str, bytes]:
+    return {
+        f"{SITE_PACKAGES}/{name}-{version}.dist-info/METADATA": _metadata(
+            name, version, *requires
+        ),
+        f"{SITE_PACKAGES}/{name}-{version}.dist-info/RECORD": b"",
+    }
+
+
+class TestRootfs(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.root = os.path.join(self.directory, "root")
+        self.site_packages = os.path.join(self.root, SITE_PACKAGES)
+        os.makedirs(self.site_packages)
+        make_dist_info(self.site_packages, "app", "1.0", ("lib",))
+        make_dist_info(self.site_packages, "lib", "1.0")
+        make_dist_info(
+            self.site_packages,
+            "tool",
+            "1.0",
+            ("backport; python_version < '3.10'",),
+        )
+        make_dist_info(self.site_packages, "backport", "1.0")
+
+    def test_rootfs_paths(self) -> None:
+        debian = os.path.join(self.root, "usr/lib/python3/dist-packages")
+        os.makedirs(debian)
+        # A link inside the image is followed once...
+        os.symlink("lib", os.path.join(self.root, "usr", "lib64"))
+        # ...and one out of it, not at all.
+        outside = os.path.join(self.directory, "host", "python3.9")
+        os.makedirs(os.path.join(outside, "site-packages"))
+        os.makedirs(os.path.join(self.root, "usr", "local"))
+        os.symlink(
+            os.path.dirname(outside),
+            os.path.join(self.root, "usr", "local", "lib"),
+        )
+        self.assertEqual(
+            rootfs_paths(self.root), sorted([debian, self.site_packages])
+        )
+        with self.assertRaises(NotADirectoryError):
+            rootfs_paths(os.path.join(self.root, "missing"))
+
+    def test_command_line_interface(self) -> None:
+        command = f"pip_chill/cli.py --rootfs {self.root}"
+
+        result = os.popen(command).read()
+        # Markers are evaluated for the Python of the image, so backport
+        # isn't needed by tool.
+        self.assertEqual(
+            result.splitlines(), ["app==1.0", "backport==1.0", "tool==1.0"]
+        )
+
+    def test_fingerprint(self) -> None:
+        command = f"pip_chill/cli.py --fingerprint -v --rootfs {self.root}"
+
+        result = os.popen(command).read().splitlines()
+        paths = rootfs_paths(self.root)
+        self.assertEqual(result[0], f"{fingerprint(paths)}  {self.root}")
+        self.assertEqual(
+            [line.split()[1] for line in result[1:]],
+            ["app", "backport", "tool"],
+        )
+
+
+class TestImageTar(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.base = {
+            **_dist_info("app", "1.0", "lib>=1"),
+            **_dist_info("lib", "1.0"),
+            **_dist_info("old", "1.0"),
+            "usr/bin/python3": b"",
+        }
+        self.upper = {
+            f"{SITE_PACKAGES}/.wh.old-1.0.dist-info": b"",
+            f"{SITE_PACKAGES}/.wh.lib-1.0.dist-info": b"",
+            **_dist_info("lib", "2.0"),
+            **_dist_info("tool", "1.0", "backport; python_version < '3.10'"),
+            **_dist_info("backport", "1.0"),
+        }
+
+    def _save(self, files: dict[str, bytes], mode: str = "w") -> str:
+        path = os.path.join(self.directory, "image.tar")
+        with open(path, "wb") as image:
+            image.write(_tar(files, mode))
+        return path
+
+    def _names(self, path: str) -> list[tuple[str, str]]:
+        return [
+            (record.name, record.version) for record in read_image_tar(path)
+        ]
+
+    def test_docker_save(self) -> None:
+        # Layers come before the manifest that orders them, and not in
+        # that order.
+        path = self._save(
+            {
+                "b/layer.tar": _tar(self.upper),
+                "a/layer.tar": _tar(self.base),
+                "a/json": b"{}",
+                "manifest.json": json.dumps(
+                    [{"Layers": ["a/layer.tar", "b/layer.tar"]}]
+                ).encode(),
+            }
+        )
+        self.assertEqual(
+            self._names(path),
+            [
+                ("app", "1.0"),
+                ("backport", "1.0"),
+                ("lib", "2.0"),
+                ("tool", "1.0"),
+            ],
+        )
+        records = read_image_tar(path)
+        self.assertEqual(
+            records[0].path, f"/{SITE_PACKAGES}/app-1.0.dist-info"
+        )
+        self.assertEqual(records[0].requires, ("lib>=1",))
+
+    def test_oci_layout(self) -> None:
+        path = self._save(
+            {
+                "blobs/sha256/1111": gzip.compress(_tar(self.base)),
+                "blobs/sha256/2222": _tar(self.upper),
+                "blobs/sha256/3333": b'{"config": {}}',
+                "index.json": b"{}",
+                "manifest.json": json.dumps(
+                    [
+                        {
+                            "Layers": [
+                                "blobs/sha256/1111",
+                                "blobs/sha256/2222",
+                            ]
+                        }
+                    ]
+                ).encode(),
+            },
+            "w:gz",
+        )
+        self.assertIn(("lib", "2.0"), self._names(path))
+        self.assertNotIn(("old", "1.0"), self._names(path))
+
+    def test_opaque_directory(self) -> None:
+        upper = {
+            f"{SITE_PACKAGES}/.wh..wh..opq": b"",
+            **_dist_info("tool", "1.0"),
+        }
+        path = self._save(
+            {
+                "a/layer.tar": _tar(self.base),
+                "b/layer.tar": _tar(upper),
+                "manifest.json": json.dumps(
+                    [{"Layers": ["a/layer.tar", "b/layer.tar"]}]
+                ).encode(),
+            }
+        )
+        self.assertEqual(self._names(path), [("tool", "1.0")])
+
+    def test_missing_layer(self) -> None:
+        path = self._save(
+            {
+                "manifest.json": json.dumps(
+                    [{"Layers": ["a/layer.tar"]}]
+                ).encode(),
+            }
+        )
+        with self.assertRaises(tarfile.ReadError):
+            read_image_tar(path)
+
+    def test_single_layer(self) -> None:
+        egg_info = f"{SITE_PACKAGES}/eggy-1.0-py3.11.egg-info"
+        path = self._save(
+            {
+                **self.base,
+                f"{egg_info}/PKG-INFO": b"Name: eggy\nVersion: 1.0\n\n",
+                f"{egg_info}/requires.txt": b"lib\n\n[fast]\nspeedup\n\n"
+                b'[:sys_platform == "win32"]\ncolorama\n',
+                f"{SITE_PACKAGES}/single.egg-info": (
+                    b"Name: single\nVersion: 2.0\n"
+                ),
+                "opt/venv/lib/python3.11/site-packages/tool-1.0.dist-info"
+                "/METADATA": _metadata("tool", "1.0"),
+                "usr/share/doc/other-1.0.dist-info/METADATA": _metadata(
+                    "other", "1.0"
+                ),
+            }
+        )
+        records = {record.name: record for record in read_image_tar(path)}
+        self.assertEqual(
+            sorted(records), ["app", "eggy", "lib", "old", "single", "tool"]
+        )
+        self.assertEqual(
+            records["eggy"].requires,
+            (
+                "lib",
+                'speedup; extra == "fast"',
+                'colorama; sys_platform == "win32"',
+            ),
+        )
+
+    def test_chill(self) -> None:
+        path = self._save(
+            {
+                "a/layer.tar": _tar(self.base),
+                "b/layer.tar": _tar(self.upper),
+                "manifest.json": json.dumps(
+                    [{"Layers": ["a/layer.tar", "b/layer.tar"]}]
+                ).encode(),
+            }
+        )
+        packages, dependencies = chill(
+            metadata=read_image_tar(path),
+            environment={"python_version": "3.11"},
+        )
+        self.assertEqual(
+            [str(package) for package in packages],
+            ["app==1.0", "backport==1.0", "tool==1.0"],
+        )
+        self.assertEqual(
+            [dependency.name for dependency in dependencies], ["lib"]
+        )
+
+        command = f"pip_chill/cli.py --image-tar {path}"
+        result = os.popen(command).read()
+        self.assertEqual(
+            result.splitlines(), ["app==1.0", "backport==1.0", "tool==1.0"]
+        )
+
+    def test_command_line_errors(self) -> None:
+        path = os.path.join(self.directory, "broken.tar")
+        with open(path, "wb") as broken:
+            broken.write(b"not a tarball")
+        command = f"pip_chill/cli.py --image-tar {path} 2>&1"
+        self.assertIn("--image-tar", os.popen(command).read())
+        command = (
+            f"pip_chill/cli.py --image-tar {path} --rootfs {self.directory}"
+            " 2>&1"
+        )
+        self.assertIn(
+            "--rootfs can't be used with --image-tar",
+            os.popen(command).read(),
+        )
+
+        missing = os.path.join(self.directory, "missing.tar")
+        command = f"pip_chill/cli.py --fingerprint --image-tar {missing}"
+        with os.popen(f"{command} 2>&1") as output:
+            self.assertIn(
+                "--fingerprint can't be used with --image-tar", output.read()
+            )
+            self.assertEqual(output.close() >> 8, 2)
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+"""
+test_import_time
+----------------------------------
+
+Guards the start-up time of the `pip_chill` command line.
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time budget for the command line and the core module, in
+# microseconds, checked only when set. 40000 is about twice what a warm
+# import takes on a developer machine. Wall clock checks fail on busy
+# machines, so they are left out of the default run.
+IMPORT_BUDGET_US = os.environ.get("PIP_CHILL_IMPORT_BUDGET_US")
+
+# Modules only some runs need, that must not be imported up front.
+LAZY_MODULES = {
+    "argparse",
+    "concurrent.futures",
+    "importlib.metadata",
+    "json",
+    "pathlib",
+    "platform",
+    "pip_chill.markers",
+    "tempfile",
+    "typing",
+}
+
+
+def import_times() -> dict[str, int]:
+    """
+    Imports the command line in a new interpreter with -X importtime and
+    returns the cumulative import time of each module imported after the
+    interpreter started.
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import pip_chill.cli, pip_chill.pip_chill",
+        ],
+        capture_output=True,
+        check=True,
+        cwd=ROOT,
+        text=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.strip() == "site":
+            # Everything up to here is interpreter start-up.
+            times.clear()
+            continue
+        times[name.rstrip()] = int(cumulative)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    def test_lazy_modules(self) -> None:
+        imported = {name.strip() for name in import_times()}
+        self.assertEqual(imported & LAZY_MODULES, set())
+
+    @unittest.skipUnless(
+        IMPORT_BUDGET_US, "set PIP_CHILL_IMPORT_BUDGET_US=40000 to run"
+    )
+    def test_import_budget(self) -> None:
+        # Best of a few runs, to keep disk caches and noisy neighbours out.
+        best = min(
+            sum(
+                cumulative
+                for name, cumulative in import_times().items()
+                if not name.startswith("  ")
+            )
+            for _ in range(5)
+        )
+        self.assertLessEqual(best, int(IMPORT_BUDGET_US))
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
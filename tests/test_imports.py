@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+
+"""
+test_imports
+----------------------------------
+
+Tests for `pip_chill.imports` module.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from pip_chill import chill, imports
+from pip_chill.imports import (
+    ImportCache,
+    imported_modules,
+    mark_used,
+    module_index,
+    scan_imports,
+    used_distributions,
+)
+from tests.helpers import make_dist_info
+
+
+def _write(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as source:
+        source.write(text)
+
+
+class TestImports(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.site_packages = os.path.join(self.directory, "site-packages")
+        requests = make_dist_info(
+            self.site_packages, "requests", "2.0", ("urllib3",)
+        )
+        _write(os.path.join(requests, "top_level.txt"), "requests\n")
+        yaml = make_dist_info(self.site_packages, "PyYAML", "6.0")
+        _write(
+            os.path.join(yaml, "RECORD"),
+            "yaml/__init__.py,sha256=x,1\n"
+            "_yaml.cpython-312-x86_64-linux-gnu.so,sha256=x,1\n"
+            "PyYAML-6.0.dist-info/METADATA,sha256=x,1\n"
+            "../../bin/tool,sha256=x,1\n",
+        )
+        make_dist_info(self.site_packages, "urllib3", "2.0")
+        make_dist_info(self.site_packages, "unused-tool", "1.0")
+
+        self.sources = os.path.join(self.directory, "project")
+        _write(
+            os.path.join(self.sources, "app", "main.py"),
+            "import os, requests.adapters\n"
+            "from . import sibling\n"
+            "def load():\n"
+            "    from yaml import safe_load\n",
+        )
+        _write(
+            os.path.join(self.sources, "legacy.py"),
+            "import urllib3\nprint 'python 2'\n",
+        )
+        # Neither of these are the project's sources.
+        _write(os.path.join(self.sources, ".venv", "pyvenv.cfg"), "")
+        _write(
+            os.path.join(self.sources, ".venv", "lib", "x.py"), "import tool"
+        )
+        _write(os.path.join(self.sources, "env", "pyvenv.cfg"), "")
+        _write(os.path.join(self.sources, "env", "x.py"), "import tool")
+
+    def test_imported_modules(self) -> None:
+        self.assertEqual(
+            imported_modules(
+                b"import a.b as c, d\nfrom e.f import g\nfrom .h import i\n"
+                b"try:\n    import j\nexcept ImportError:\n    pass\n"
+            ),
+            ["a", "d", "e", "j"],
+        )
+        self.assertEqual(
+            imported_modules(b"import a, b.c\nfrom d import e\nprint 'x'\n"),
+            ["a", "b", "d"],
+        )
+        self.assertEqual(imported_modules(b"x = 1\n"), [])
+
+    def test_module_index(self) -> None:
+        self.assertEqual(
+            module_index([self.site_packages]),
+            {
+                "requests": {"requests"},
+                "yaml": {"pyyaml"},
+                "_yaml": {"pyyaml"},
+            },
+        )
+
+    def test_scan_imports(self) -> None:
+        expected = {"os", "requests", "yaml", "urllib3"}
+        self.assertEqual(scan_imports(self.sources, processes=1), expected)
+        with mock.patch.object(imports, "PARALLEL_THRESHOLD", 0):
+            self.assertEqual(
+                scan_imports(self.sources, processes=2), expected
+            )
+
+    def test_cache(self) -> None:
+        cache_dir = os.path.join(self.directory, "cache")
+        expected = scan_imports(self.sources, cache_dir)
+        with mock.patch.object(imports, "_read_imports") as read_imports:
+            self.assertEqual(scan_imports(self.sources, cache_dir), expected)
+            # A copy has other paths and times, but the same contents.
+            shutil.copytree(self.sources, os.path.join(self.directory, "copy"))
+            self.assertEqual(
+                scan_imports(os.path.join(self.directory, "copy"), cache_dir),
+                expected,
+            )
+        read_imports.assert_not_called()
+
+        _write(os.path.join(self.sources, "legacy.py"), "import json\n")
+        self.assertEqual(
+            scan_imports(self.sources, cache_dir),
+            {"os", "requests", "yaml", "json"},
+        )
+        cache = ImportCache(cache_dir)
+        self.assertEqual(len(cache.files), 2)
+        with open(cache.path, encoding="utf-8") as cache_file:
+            self.assertEqual(len(json.load(cache_file)["imports"]), 2)
+
+    def test_mark_used(self) -> None:
+        packages, _ = chill(paths=[self.site_packages])
+        used = used_distributions(
+            scan_imports(self.sources, processes=1),
+            module_index([self.site_packages]),
+        )
+        self.assertEqual(
+            [str(package) for package in mark_used(packages, used)],
+            [
+                "PyYAML==6.0",
+                "requests==2.0",
+                "unused-tool==1.0 # Not imported",
+            ],
+        )
+
+    def test_command_line_interface(self) -> None:
+        command = (
+            f"pip_chill/cli.py --path {self.site_packages} "
+            f"--used-by {self.sources} --format jsonl"
+        )
+        result = [
+            json.loads(line) for line in os.popen(command).read().splitlines()
+        ]
+        self.assertEqual(
+            [(record["name"], record.get("used")) for record in result],
+            [
+                ("PyYAML", True),
+                ("requests", True),
+                ("unused-tool", False),
+                ("urllib3", None),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
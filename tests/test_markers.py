@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+"""
+test_markers
+----------------------------------
+
+Tests for `pip_chill.markers` module.
+"""
+
+import sys
+import unittest
+
+from pip_chill.markers import InvalidMarker, compile_marker
+
+ENVIRONMENT = {
+    "os_name": "posix",
+    "platform_release": "6.1.0-generic",
+    "python_full_version": "3.11.7",
+    "python_version": "3.11",
+    "sys_platform": "linux",
+}
+
+
+class TestMarkers(unittest.TestCase):
+    def evaluate(self, marker: str, extra: str = "") -> bool:
+        return compile_marker(marker).evaluate(ENVIRONMENT, extra)
+
+    def test_versions(self) -> None:
+        self.assertTrue(self.evaluate('python_version >= "3.8"'))
+        self.assertFalse(self.evaluate('python_version < "3.8"'))
+        self.assertTrue(self.evaluate('python_version > "3.9"'))
+        self.assertTrue(self.evaluate('python_full_version == "3.11.*"'))
+
+    def test_strings(self) -> None:
+        self.assertTrue(self.evaluate("sys_platform == 'linux'"))
+        self.assertTrue(self.evaluate('"linux" in sys_platform'))
+        self.assertTrue(self.evaluate("os.name == 'posix'"))
+        self.assertFalse(self.evaluate('platform_release >= "5"'))
+
+    def test_boolean_operators(self) -> None:
+        self.assertTrue(
+            self.evaluate(
+                'sys_platform == "win32" or '
+                '(python_version >= "3" and os_name == "posix")'
+            )
+        )
+        self.assertFalse(
+            self.evaluate('sys_platform == "linux" and os_name == "nt"')
+        )
+
+    def test_extras(self) -> None:
+        marker = 'extra == "Dev_Tools" and python_version >= "3"'
+        self.assertEqual(compile_marker(marker).extras, {"dev-tools"})
+        self.assertFalse(self.evaluate(marker))
+        self.assertTrue(self.evaluate(marker, "dev-tools"))
+        self.assertTrue(self.evaluate(marker, "dev_tools"))
+
+    def test_compiled_once(self) -> None:
+        marker = 'os_name == "nt"'
+        self.assertIs(compile_marker(marker), compile_marker(marker))
+
+    def test_invalid(self) -> None:
+        for marker in ('python_version >=', 'unknown == "1"', "(os_name"):
+            with self.subTest(marker=marker):
+                with self.assertRaises(InvalidMarker):
+                    compile_marker(marker)
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
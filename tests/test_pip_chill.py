@@ -7,12 +7,16 @@ test_pip_chill
 Tests for `pip_chill` module.
 """
 
+import json
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 from pip_chill import pip_chill
 from pip_chill.pip_chill import Distribution
+from tests.helpers import make_dist_info
 
 
 class TestPipChill(unittest.TestCase):
@@ -154,6 +158,15 @@ class TestPipChill(unittest.TestCase):
         result = os.popen(command).read()
         self.assertNotIn("pip-chill", result)
 
+    def test_command_line_interface_unsorted(self) -> None:
+        command = "pip_chill/cli.py --verbose --unsorted"
+
+        returncode = os.system(command)
+        self.assertEqual(returncode, 0)
+
+        result = os.popen(command).read()
+        self.assertIn("# Installed as dependency for", result)
+
     def test_command_line_invalid_option(self) -> None:
         command = "pip_chill/cli.py --invalid-option"
 
@@ -161,5 +174,205 @@ class TestPipChill(unittest.TestCase):
         self.assertEqual(returncode, 512)
 
 
+class TestChillPaths(unittest.TestCase):
+    def setUp(self) -> None:
+        self.prefix = tempfile.mkdtemp()
+        self.site_packages = os.path.join(
+            self.prefix, "lib", "python3.99", "site-packages"
+        )
+        os.makedirs(self.site_packages)
+        make_dist_info(self.site_packages, "app", "1.0", ("lib>=2",))
+        make_dist_info(self.site_packages, "lib", "2.0")
+        self.other = tempfile.mkdtemp()
+        make_dist_info(self.other, "tool", "3.0")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.prefix)
+        shutil.rmtree(self.other)
+
+    def test_chill_paths(self) -> None:
+        packages, dependencies = pip_chill.chill(paths=[self.site_packages])
+        self.assertEqual([str(p) for p in packages], ["app==1.0"])
+        self.assertEqual(
+            [str(p) for p in dependencies],
+            ["# lib==2.0 # Installed as dependency for app"],
+        )
+
+    def test_iter_chill(self) -> None:
+        packages, dependencies = pip_chill.chill(paths=[self.site_packages])
+        self.assertEqual(
+            [
+                str(p)
+                for p in pip_chill.iter_chill(
+                    paths=[self.site_packages], dependencies=True
+                )
+            ],
+            [str(p) for p in packages + dependencies],
+        )
+
+    def test_iter_chill_unsorted(self) -> None:
+        make_dist_info(self.other, "a-tool", "1.0")
+        self.assertEqual(
+            [p.name for p in pip_chill.iter_chill(paths=[self.other])],
+            ["a-tool", "tool"],
+        )
+        self.assertEqual(
+            sorted(
+                p.name
+                for p in pip_chill.iter_chill(paths=[self.other], sort=False)
+            ),
+            ["a-tool", "tool"],
+        )
+
+    def test_chill_normalises_names(self) -> None:
+        make_dist_info(self.other, "Foo_Bar", "1.0")
+        make_dist_info(self.other, "user", "1.0", ("foo-bar[extra]>=1",))
+        make_dist_info(self.other, "selfish", "1.0", ("Selfish[all]",))
+        packages, dependencies = pip_chill.chill(paths=[self.other])
+        self.assertEqual(
+            [str(p) for p in packages],
+            ["selfish==1.0", "tool==3.0", "user==1.0"],
+        )
+        self.assertEqual(
+            [str(p) for p in dependencies],
+            ["# Foo_Bar==1.0 # Installed as dependency for user"],
+        )
+
+    def test_chill_lists_cycles(self) -> None:
+        make_dist_info(self.other, "egg", "1.0", ("hen",))
+        make_dist_info(self.other, "hen", "1.0", ("egg", "grain"))
+        make_dist_info(self.other, "grain", "1.0")
+        make_dist_info(self.other, "rock", "1.0", ("paper",))
+        make_dist_info(self.other, "paper", "1.0", ("scissors",))
+        make_dist_info(self.other, "scissors", "1.0", ("rock",))
+        make_dist_info(self.other, "player", "1.0", ("rock",))
+        packages, dependencies = pip_chill.chill(paths=[self.other])
+        self.assertEqual(
+            [str(p) for p in packages],
+            [
+                "egg==1.0 # Installed in a cycle with hen",
+                "hen==1.0 # Installed in a cycle with egg",
+                "player==1.0",
+                "tool==3.0",
+            ],
+        )
+        self.assertEqual(
+            [p.name for p in dependencies],
+            ["grain", "paper", "rock", "scissors"],
+        )
+
+    def test_chill_evaluates_markers(self) -> None:
+        make_dist_info(
+            self.other,
+            "app",
+            "1.0",
+            (
+                'legacy; python_version < "3"',
+                'dev-tool; extra == "dev"',
+                "web[server]",
+            ),
+        )
+        make_dist_info(self.other, "legacy", "1.0")
+        make_dist_info(self.other, "dev-tool", "1.0")
+        make_dist_info(
+            self.other,
+            "web",
+            "1.0",
+            ('server-lib; extra == "server"', 'test-lib; extra == "test"'),
+        )
+        make_dist_info(self.other, "server-lib", "1.0")
+        make_dist_info(self.other, "test-lib", "1.0")
+
+        packages, _ = pip_chill.chill(paths=[self.other])
+        self.assertEqual(
+            [p.name for p in packages],
+            ["app", "dev-tool", "legacy", "test-lib", "tool"],
+        )
+
+        packages, _ = pip_chill.chill(
+            paths=[self.other], environment={"python_version": "2.7"}
+        )
+        self.assertNotIn("legacy", [p.name for p in packages])
+
+    def test_environment_markers(self) -> None:
+        self.assertEqual(
+            pip_chill.environment_markers([self.site_packages]),
+            {"python_version": "3.99"},
+        )
+        self.assertEqual(
+            pip_chill.environment_markers(
+                [self.site_packages], {"python_full_version": "3.99.1"}
+            ),
+            {"python_version": "3.99", "python_full_version": "3.99.1"},
+        )
+        self.assertEqual(pip_chill.environment_markers([self.other]), {})
+
+    def test_chill_environments(self) -> None:
+        expected = [
+            (self.prefix, ["app==1.0"]),
+            (self.other, ["tool==3.0"]),
+        ]
+        for processes in (None, 2):
+            results = pip_chill.chill_environments(
+                [self.prefix, self.other], processes=processes
+            )
+            self.assertEqual(
+                [
+                    (environment, [str(p) for p in packages])
+                    for environment, (packages, _) in results
+                ],
+                expected,
+            )
+
+    def test_command_line_interface_paths(self) -> None:
+        command = (
+            f"pip_chill/cli.py --path {self.prefix} --path {self.other}"
+        )
+
+        result = os.popen(command).read()
+        self.assertEqual(
+            result.splitlines(),
+            [
+                f"# Environment: {self.prefix}",
+                "app==1.0",
+                f"# Environment: {self.other}",
+                "tool==3.0",
+            ],
+        )
+
+    def test_missing_environment(self) -> None:
+        with self.assertRaises(FileNotFoundError):
+            list(pip_chill.chill_environments(["/nonexistent/venv"]))
+
+        command = "pip_chill/cli.py --path /nonexistent/venv 2> /dev/null"
+        self.assertEqual(os.system(command), 512)
+
+    def test_command_line_processes_without_paths(self) -> None:
+        command = "pip_chill/cli.py --processes 2 2> /dev/null"
+        self.assertEqual(os.system(command), 512)
+
+    def test_command_line_interface_json_lines(self) -> None:
+        command = f"pip_chill/cli.py --format jsonl --path {self.prefix}"
+
+        result = os.popen(command).read()
+        self.assertEqual(
+            [json.loads(line) for line in result.splitlines()],
+            [
+                {
+                    "name": "app",
+                    "version": "1.0",
+                    "required_by": [],
+                    "environment": self.prefix,
+                },
+                {
+                    "name": "lib",
+                    "version": "2.0",
+                    "required_by": ["app"],
+                    "environment": self.prefix,
+                },
+            ],
+        )
+
+
 if __name__ == "__main__":
     sys.exit(unittest.main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+"""
+test_render
+----------------------------------
+
+Tests for `pip_chill.render` module.
+"""
+
+import io
+import json
+import sys
+import unittest
+from unittest import mock
+
+from pip_chill import render
+from pip_chill.pip_chill import Distribution
+from pip_chill.timings import Timings
+
+
+class TestRender(unittest.TestCase):
+    def setUp(self) -> None:
+        self.results = [
+            (
+                "/venv",
+                [
+                    Distribution("app", "1.0"),
+                    Distribution("lib", "2.0", ["app", "tool"]),
+                ],
+            ),
+            ("/other", []),
+        ]
+
+    def rendered(self, output_format: str, **options) -> str:
+        stream = io.StringIO()
+        render.render(self.results, stream, output_format, **options)
+        return stream.getvalue()
+
+    def test_text(self) -> None:
+        self.assertEqual(
+            self.rendered("text").splitlines(),
+            ["app==1.0", "# lib==2.0 # Installed as dependency for app, tool"],
+        )
+        self.assertEqual(
+            self.rendered("text", tagged=True).splitlines()[::3],
+            ["# Environment: /venv", "# Environment: /other"],
+        )
+
+    def test_json_lines(self) -> None:
+        self.assertEqual(
+            [json.loads(line) for line in self.rendered("jsonl").splitlines()],
+            [
+                {
+                    "name": "app",
+                    "version": "1.0",
+                    "required_by": [],
+                    "environment": "/venv",
+                },
+                {
+                    "name": "lib",
+                    "version": "2.0",
+                    "required_by": ["app", "tool"],
+                    "environment": "/venv",
+                },
+            ],
+        )
+
+    def test_json(self) -> None:
+        document = json.loads(self.rendered("json"))
+        self.assertEqual(document["format_version"], render.FORMAT_VERSION)
+        self.assertEqual(
+            [
+                (environment["environment"], environment["distributions"])
+                for environment in document["environments"]
+            ],
+            [
+                (
+                    "/venv",
+                    [
+                        {"name": "app", "version": "1.0", "required_by": []},
+                        {
+                            "name": "lib",
+                            "version": "2.0",
+                            "required_by": ["app", "tool"],
+                        },
+                    ],
+                ),
+                ("/other", []),
+            ],
+        )
+
+    def test_hidden_version(self) -> None:
+        self.results = [
+            (None, [Distribution("app", "1.0", hide_version=True)])
+        ]
+        self.assertEqual(
+            json.loads(self.rendered("jsonl")),
+            {
+                "name": "app",
+                "version": None,
+                "required_by": [],
+                "environment": None,
+            },
+        )
+
+    def test_buffered(self) -> None:
+        self.results = [
+            (None, [Distribution(f"package-{n}", "1.0") for n in range(5000)])
+        ]
+        stream = io.StringIO()
+        with mock.patch.object(render, "BUFFER_SIZE", 1000):
+            with mock.patch.object(
+                stream, "write", wraps=stream.write
+            ) as write:
+                render.render(self.results, stream)
+        self.assertLess(write.call_count, 100)
+        self.assertEqual(len(stream.getvalue().splitlines()), 5000)
+
+    def test_timings(self) -> None:
+        timings = Timings()
+        self.rendered("json", timings=timings)
+        (span,) = timings
+        self.assertEqual(span.name, "rendering")
+        self.assertEqual(span.counts, {"distributions": 2})
+
+    def test_unknown_format(self) -> None:
+        with self.assertRaises(ValueError):
+            self.rendered("xml")
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
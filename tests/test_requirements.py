@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+"""
+test_requirements
+----------------------------------
+
+Tests for `pip_chill.requirements` module.
+"""
+
+import sys
+import unittest
+
+from pip_chill.requirements import (
+    Requirement,
+    canonicalize_name,
+    parse_requirement,
+)
+
+
+class TestRequirements(unittest.TestCase):
+    def test_canonicalize_name(self) -> None:
+        for name in ("Foo_Bar", "foo-bar", "FOO.BAR", "foo__-bar"):
+            self.assertEqual(canonicalize_name(name), "foo-bar")
+
+    def test_plain_name(self) -> None:
+        self.assertEqual(parse_requirement("foo"), Requirement("foo"))
+
+    def test_full_requirement(self) -> None:
+        requirement = parse_requirement(
+            'Foo_Bar[Baz, qux] (>=1.0,<2) ; python_version < "3.8"'
+        )
+        self.assertEqual(requirement.name, "Foo_Bar")
+        self.assertEqual(requirement.key, "foo-bar")
+        self.assertEqual(requirement.extras, ("baz", "qux"))
+        self.assertEqual(requirement.specifier, ">=1.0,<2")
+        self.assertEqual(requirement.marker, 'python_version < "3.8"')
+
+    def test_url_requirement(self) -> None:
+        requirement = parse_requirement(
+            'pkg @ https://example.com/pkg.whl ; os_name == "nt"'
+        )
+        self.assertEqual(requirement.name, "pkg")
+        self.assertEqual(requirement.url, "https://example.com/pkg.whl")
+        self.assertEqual(requirement.marker, 'os_name == "nt"')
+
+    def test_memoised(self) -> None:
+        self.assertIs(
+            parse_requirement("memoised>=1"), parse_requirement("memoised>=1")
+        )
+
+    def test_broken_requirement(self) -> None:
+        self.assertEqual(parse_requirement(" -broken").name, "-broken")
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
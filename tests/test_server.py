@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+
+"""
+test_server
+----------------------------------
+
+Tests for `pip_chill.server` module.
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from pip_chill import pip_chill, server
+from tests.helpers import make_dist_info
+
+
+class TestLiveGraph(unittest.TestCase):
+    def setUp(self) -> None:
+        self.site_packages = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.site_packages)
+        make_dist_info(self.site_packages, "app", "1.0", ("lib>=1",))
+        make_dist_info(self.site_packages, "lib", "1.0")
+        self.live = server.LiveGraph([self.site_packages])
+
+    def assertMatchesChill(self) -> None:
+        graph = self.live.graph
+        packages, dependencies = pip_chill.chill(paths=[self.site_packages])
+        self.assertEqual(
+            [
+                str(distribution)
+                for dependencies in (False, True)
+                for distribution in pip_chill.iter_distributions(
+                    graph, dependencies=dependencies
+                )
+            ],
+            [str(distribution) for distribution in packages + dependencies],
+        )
+
+    def test_added_and_removed(self) -> None:
+        generation = self.live.generation
+        self.assertFalse(self.live.refresh())
+        make_dist_info(self.site_packages, "tool", "2.0", ("lib",))
+        self.assertTrue(self.live.refresh())
+        self.assertMatchesChill()
+        shutil.rmtree(os.path.join(self.site_packages, "app-1.0.dist-info"))
+        self.assertTrue(self.live.refresh([self.site_packages]))
+        self.assertMatchesChill()
+        self.assertEqual(self.live.generation, generation + 2)
+
+    def test_extras(self) -> None:
+        make_dist_info(
+            self.site_packages, "web", "1.0", ('server; extra == "server"',)
+        )
+        make_dist_info(self.site_packages, "server", "1.0")
+        self.live.refresh()
+        self.assertMatchesChill()
+        make_dist_info(self.site_packages, "site", "1.0", ("web[server]",))
+        self.live.refresh()
+        self.assertMatchesChill()
+        shutil.rmtree(os.path.join(self.site_packages, "site-1.0.dist-info"))
+        self.live.refresh()
+        self.assertMatchesChill()
+
+    def test_incomplete_metadata_is_retried(self) -> None:
+        path = make_dist_info(self.site_packages, "tool", "2.0")
+        metadata = os.path.join(path, "METADATA")
+        os.rename(metadata, metadata + ".tmp")
+        self.assertFalse(self.live.refresh())
+        os.rename(metadata + ".tmp", metadata)
+        self.assertTrue(self.live.refresh())
+        self.assertMatchesChill()
+
+    def test_response(self) -> None:
+        response = self.live.response()
+        self.assertIs(self.live.response(), response)
+        self.assertIn(b'"name":"app"', response)
+        self.assertNotIn(b'"name":"lib"', response)
+        self.assertIn(b'"name":"lib"', self.live.response(dependencies=True))
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix sockets")
+class TestServe(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.site_packages = os.path.join(self.directory, "site-packages")
+        os.mkdir(self.site_packages)
+        make_dist_info(self.site_packages, "app", "1.0", ("lib>=1",))
+        make_dist_info(self.site_packages, "lib", "1.0")
+        self.socket = os.path.join(self.directory, "socket")
+
+    def start(self) -> None:
+        ready = threading.Event()
+        thread = threading.Thread(
+            target=server.serve,
+            args=(self.socket, [self.site_packages]),
+            kwargs={"interval": 0.05, "ready": ready.set},
+        )
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.query, self.socket, "stop")
+        ready.wait()
+
+    def wait_for(self, generation: int) -> dict:
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            response = server.query(self.socket)
+            if response["generation"] >= generation:
+                return response
+            time.sleep(0.01)
+        self.fail(f"no generation {generation}")
+
+    def names(self, response: dict) -> list[str]:
+        return [record["name"] for record in response["distributions"]]
+
+    def check_updates(self) -> None:
+        response = server.query(self.socket)
+        self.assertEqual(self.names(response), ["app"])
+        make_dist_info(self.site_packages, "tool", "2.0")
+        response = self.wait_for(response["generation"] + 1)
+        self.assertEqual(self.names(response), ["app", "tool"])
+        response = server.query(self.socket, dependencies=True)
+        self.assertEqual(response["distributions"][-1]["required_by"], ["app"])
+
+    def test_serve(self) -> None:
+        self.start()
+        self.check_updates()
+        status = server.query(self.socket, "status")
+        self.assertEqual(status["distributions"], 3)
+        self.assertIn("error", server.query(self.socket, "unknown"))
+
+    def test_polling(self) -> None:
+        with mock.patch.object(server, "_watcher", return_value=None):
+            self.start()
+        status = server.query(self.socket, "status")
+        self.assertEqual(status["watcher"], "polling")
+        self.check_updates()
+
+    def test_clients_that_leave(self) -> None:
+        self.start()
+        for _ in range(20):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(self.socket)
+                client.sendall(b'{"command": "chill"}\n')
+        # One that asks for a lot and never reads the answers.
+        greedy = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(greedy.close)
+        greedy.connect(self.socket)
+        greedy.sendall(b'{"dependencies": true}\n' * 20000)
+        self.assertEqual(self.names(server.query(self.socket)), ["app"])
+
+    def test_socket_permissions(self) -> None:
+        self.start()
+        self.assertEqual(os.stat(self.socket).st_mode & 0o777, 0o600)
+
+    def test_socket_path_in_use(self) -> None:
+        with open(self.socket, "w", encoding="utf-8") as other_file:
+            other_file.write("keep me")
+        with self.assertRaises(FileExistsError):
+            server.serve(self.socket, [self.site_packages])
+        os.remove(self.socket)
+
+        self.start()
+        with self.assertRaises(OSError):
+            server.serve(self.socket, [self.site_packages])
+        self.assertEqual(self.names(server.query(self.socket)), ["app"])
+
+    def test_stale_socket_is_replaced(self) -> None:
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.socket)
+        stale.close()
+        self.start()
+        self.assertEqual(self.names(server.query(self.socket)), ["app"])
+
+    def test_command_line_interface(self) -> None:
+        missing = os.path.join(self.site_packages, "missing")
+        result = subprocess.run(
+            [
+                sys.executable,
+                "pip_chill/cli.py",
+                "serve",
+                "--socket",
+                self.socket,
+                "--path",
+                missing,
+            ],
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 2)
+        self.assertIn(f"--path {missing}: no such file", result.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+
+"""
+test_sizes
+----------------------------------
+
+Tests for `pip_chill.sizes` module.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from pip_chill import dependency_graph
+from pip_chill.sizes import (
+    Footprint,
+    distribution_sizes,
+    footprints,
+    format_size,
+)
+from tests.helpers import make_dist_info
+
+
+def _install(
+    directory: str,
+    name: str,
+    size: int,
+    requires: tuple[str, ...] = (),
+    recorded: bool = True,
+) -> None:
+    """
+    Installs a distribution of name with a module of size bytes, given
+    in RECORD if recorded is true, and bytecode RECORD has no size for.
+    """
+    dist_info = make_dist_info(directory, name, "1.0", requires)
+    package = os.path.join(directory, name)
+    os.makedirs(os.path.join(package, "__pycache__"))
+    with open(os.path.join(package, "__init__.py"), "wb") as module:
+        module.write(b"#" * size)
+    with open(
+        os.path.join(package, "__pycache__", "__init__.pyc"), "wb"
+    ) as bytecode:
+        bytecode.write(b"#" * 10)
+    with open(
+        os.path.join(dist_info, "RECORD"), "w", encoding="utf-8"
+    ) as record:
+        record.write(
+            f"{name}/__init__.py,sha256=x,{size if recorded else ''}\n"
+            f"{name}/__pycache__/__init__.pyc,,\n"
+            f"{os.path.basename(dist_info)}/RECORD,,\n"
+        )
+
+
+class TestSizes(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        # app -> lib, app -> shared <- other
+        _install(self.directory, "app", 1000, ("lib", "shared"))
+        _install(self.directory, "lib", 2000, recorded=False)
+        _install(self.directory, "shared", 4000)
+        _install(self.directory, "other", 8000, ("shared",))
+
+    def record_size(self, name: str) -> int:
+        return os.path.getsize(
+            os.path.join(self.directory, f"{name}-1.0.dist-info", "RECORD")
+        )
+
+    def test_format_size(self) -> None:
+        self.assertEqual(format_size(0), "0 B")
+        self.assertEqual(format_size(1023), "1023 B")
+        self.assertEqual(format_size(1536), "1.5 KiB")
+        self.assertEqual(format_size(5 * 1024**3), "5.0 GiB")
+
+    def test_distribution_sizes(self) -> None:
+        for workers in (1, None):
+            sizes = distribution_sizes([self.directory], workers)
+            self.assertEqual(
+                sizes[("lib", "1.0")], 2000 + 10 + self.record_size("lib")
+            )
+            self.assertEqual(
+                sizes[("app", "1.0")], 1000 + 10 + self.record_size("app")
+            )
+
+    def test_footprints(self) -> None:
+        graph = dependency_graph(paths=[self.directory])
+        sizes = {
+            ("app", "1.0"): 1,
+            ("lib", "1.0"): 2,
+            ("shared", "1.0"): 4,
+            ("other", "1.0"): 8,
+        }
+        self.assertEqual(
+            footprints(graph, sizes),
+            (
+                [
+                    Footprint("app", "1.0", 1 + 2 + 4, 1 + 2),
+                    Footprint("other", "1.0", 8 + 4, 8),
+                ],
+                4,
+            ),
+        )
+        self.assertEqual(
+            str(Footprint("app", "1.0", 4096, 1024)),
+            "app==1.0 # 1.0 KiB exclusive, 4.0 KiB total",
+        )
+
+    def test_command_line_interface(self) -> None:
+        command = f"pip_chill/cli.py --sizes --path {self.directory}"
+        result = os.popen(command).read().splitlines()
+        self.assertEqual(len(result), 3)
+        self.assertTrue(result[0].startswith("app==1.0 # "))
+        self.assertTrue(result[1].startswith("other==1.0 # "))
+        self.assertTrue(result[2].endswith(" shared by several packages"))
+
+        result = json.loads(os.popen(f"{command} --format json").read())
+        sizes = distribution_sizes([self.directory])
+        self.assertEqual(result["shared"], sizes[("shared", "1.0")])
+        self.assertEqual(
+            result["packages"][1],
+            {
+                "name": "other",
+                "version": "1.0",
+                "total": sizes[("other", "1.0")] + sizes[("shared", "1.0")],
+                "exclusive": sizes[("other", "1.0")],
+            },
+        )
+
+    def test_other_modes(self) -> None:
+        snapshot = os.path.join(self.directory, "snapshot.txt")
+        with open(snapshot, "w", encoding="utf-8"):
+            pass
+        for options in (
+            ["--diff", snapshot],
+            ["--why", "shared"],
+            ["--hashes"],
+            ["--tree"],
+            ["--used-by", self.directory],
+        ):
+            with self.subTest(options=options):
+                result = subprocess.run(
+                    [sys.executable, "pip_chill/cli.py", "--sizes", *options],
+                    capture_output=True,
+                    text=True,
+                )
+                self.assertEqual(result.returncode, 2)
+                self.assertEqual(result.stdout, "")
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+"""
+test_snapshot
+----------------------------------
+
+Tests for `pip_chill.snapshot` module.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from pip_chill.pip_chill import Distribution
+from pip_chill.snapshot import Entry, Snapshot
+from tests.helpers import make_dist_info
+
+SNAPSHOT = """\
+# Environment: /home/user/venv
+app==1.0
+Old_Tool==2.0
+cyclic==1.0 # Installed in a cycle with other
+unversioned
+-r other-requirements.txt
+# A comment
+# lib==1.0 # Installed as dependency for app, other
+"""
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self) -> None:
+        self.snapshot = Snapshot(SNAPSHOT.splitlines())
+
+    def test_parse(self) -> None:
+        self.assertEqual(
+            self.snapshot.entries,
+            {
+                "app": Entry("app", "1.0"),
+                "old-tool": Entry("Old_Tool", "2.0"),
+                "cyclic": Entry("cyclic", "1.0"),
+                "unversioned": Entry("unversioned", None),
+                "lib": Entry("lib", "1.0", True),
+            },
+        )
+        self.assertTrue(self.snapshot.dependencies)
+
+    def test_diff(self) -> None:
+        distributions = [
+            Distribution("app", "1.1"),
+            Distribution("cyclic", "1.0", cycle=["other"]),
+            Distribution("new", "1.0"),
+            Distribution("unversioned", "3.0"),
+            Distribution("lib", "1.0", ["app"]),
+            Distribution("old-tool", "2.0", ["app"]),
+        ]
+        self.assertEqual(
+            [str(change) for change in self.snapshot.diff(distributions)],
+            [
+                "~ app==1.0 -> app==1.1",
+                "+ new==1.0",
+                "~ Old_Tool==2.0 -> old-tool==2.0 (dependency)",
+            ],
+        )
+
+    def test_dependencies_only_compared_if_listed(self) -> None:
+        snapshot = Snapshot(["app==1.0", "tool==1.0"])
+        distributions = [
+            Distribution("app", "1.0"),
+            Distribution("lib", "1.0", ["app"]),
+            Distribution("tool", "1.0", ["app"]),
+        ]
+        self.assertEqual(
+            [str(change) for change in snapshot.diff(distributions)],
+            ["~ tool==1.0 -> tool==1.0 (dependency)"],
+        )
+
+    def test_removed(self) -> None:
+        changes = list(self.snapshot.diff([]))
+        self.assertEqual(
+            [change.name for change in changes],
+            ["app", "cyclic", "lib", "Old_Tool", "unversioned"],
+        )
+        self.assertEqual({change.change for change in changes}, {"removed"})
+
+
+class TestDiffCommandLine(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.site_packages = os.path.join(self.directory, "site-packages")
+        os.mkdir(self.site_packages)
+        make_dist_info(self.site_packages, "app", "1.0", ("lib",))
+        make_dist_info(self.site_packages, "lib", "1.0")
+        self.snapshot = os.path.join(self.directory, "snapshot.txt")
+        command = f"pip_chill/cli.py -v --path {self.site_packages}"
+        with open(self.snapshot, "w", encoding="utf-8") as snapshot_file:
+            snapshot_file.write(os.popen(command).read())
+
+    def diff(self) -> tuple[int, list[str]]:
+        command = (
+            f"pip_chill/cli.py --path {self.site_packages} "
+            f"--diff {self.snapshot}"
+        )
+        with os.popen(command) as output:
+            lines = output.read().splitlines()
+            status = output.close()
+        return (status or 0) >> 8, lines
+
+    def test_unchanged(self) -> None:
+        self.assertEqual(self.diff(), (0, []))
+
+    def test_changed(self) -> None:
+        shutil.rmtree(make_dist_info(self.site_packages, "lib", "1.0"))
+        make_dist_info(self.site_packages, "lib", "2.0")
+        make_dist_info(self.site_packages, "tool", "1.0")
+        self.assertEqual(
+            self.diff(),
+            (
+                1,
+                [
+                    "+ tool==1.0",
+                    "~ lib==1.0 (dependency) -> lib==2.0 (dependency)",
+                ],
+            ),
+        )
+
+    def test_other_modes(self) -> None:
+        for options in (
+            ["--fingerprint"],
+            ["--sizes"],
+            ["--tree"],
+            ["--check"],
+            ["--hashes"],
+            ["--why", "lib"],
+            ["--orphans-if-removed", "app"],
+            ["--format", "json"],
+        ):
+            with self.subTest(options=options):
+                result = subprocess.run(
+                    [
+                        sys.executable,
+                        "pip_chill/cli.py",
+                        "--path",
+                        self.site_packages,
+                        "--diff",
+                        self.snapshot,
+                        *options,
+                    ],
+                    capture_output=True,
+                    text=True,
+                )
+                self.assertEqual(result.returncode, 2)
+                self.assertEqual(result.stdout, "")
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+"""
+test_timings
+----------------------------------
+
+Tests for `pip_chill.timings` module.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from pip_chill import pip_chill, timings
+from pip_chill.timings import Span, Timings
+from tests.helpers import make_dist_info
+
+
+class TestTimings(unittest.TestCase):
+    def test_spans(self) -> None:
+        recorded = Timings()
+        recorded.count("custom", "things", 2)
+        recorded.add("graph", 0.5)
+        recorded.add("discovery", 0.25)
+        recorded.add("discovery", 0.25)
+        recorded.count("discovery", "directories", 3)
+        self.assertEqual(
+            list(recorded),
+            [
+                Span("discovery", 0.5, 2, {"directories": 3}),
+                Span("graph", 0.5, 1, {}),
+                Span("custom", 0.0, 0, {"things": 2}),
+            ],
+        )
+        self.assertEqual(
+            recorded.report().splitlines()[0],
+            "discovery      500.00 ms  50.0%  3 directories",
+        )
+
+    def test_phase(self) -> None:
+        recorded = Timings()
+        for _ in range(3):
+            with recorded.phase("sorting"):
+                pass
+        (span,) = recorded
+        self.assertEqual((span.name, span.calls), ("sorting", 3))
+        self.assertGreaterEqual(span.seconds, 0)
+
+    def test_hooks(self) -> None:
+        spans = []
+        timings.add_hook(spans.append)
+        self.addCleanup(timings.remove_hook, spans.append)
+        recorded = Timings()
+        recorded.add("graph", 1.0)
+        recorded.close()
+        recorded.close()
+        self.assertEqual(spans, [Span("graph", 1.0, 1, {})])
+
+
+class TestChillTimings(unittest.TestCase):
+    def setUp(self) -> None:
+        self.site_packages = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.site_packages)
+        make_dist_info(
+            self.site_packages, "app", "1.0", ("lib>=2", "other"), "x" * 100
+        )
+        make_dist_info(self.site_packages, "lib", "2.0")
+
+    def test_chill_reports_phases(self) -> None:
+        spans = []
+        timings.add_hook(spans.append)
+        self.addCleanup(timings.remove_hook, spans.append)
+        pip_chill.chill(paths=[self.site_packages])
+        self.assertEqual(
+            [span.name for span in spans],
+            ["discovery", "metadata", "parsing", "graph", "sorting"],
+        )
+        counts = {span.name: span.counts for span in spans}
+        self.assertEqual(counts["discovery"]["distributions"], 2)
+        self.assertGreater(counts["metadata"]["bytes read"], 100)
+        self.assertEqual(counts["parsing"]["requirements"], 2)
+        self.assertEqual(counts["graph"]["edges"], 2)
+
+    def test_given_timings_are_not_closed(self) -> None:
+        recorded = Timings()
+        pip_chill.chill(paths=[self.site_packages], timings=recorded)
+        self.assertFalse(recorded.closed)
+        self.assertIn("metadata", [span.name for span in recorded])
+
+    def test_command_line_interface_timings(self) -> None:
+        result = subprocess.run(
+            [
+                sys.executable,
+                os.path.join("pip_chill", "cli.py"),
+                "--timings",
+                "--path",
+                self.site_packages,
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(result.stdout.splitlines(), ["app==1.0"])
+        phases = [line.split()[0] for line in result.stderr.splitlines()]
+        self.assertEqual(
+            phases,
+            [
+                "discovery",
+                "metadata",
+                "parsing",
+                "graph",
+                "sorting",
+                "rendering",
+                "total",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+"""
+test_tree
+----------------------------------
+
+Tests for `pip_chill.tree` module.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from pip_chill.graph import DependencyGraph
+from pip_chill.pip_chill import dependency_graph
+from pip_chill.tree import iter_tree
+from tests.helpers import make_dist_info
+
+
+class TestTree(unittest.TestCase):
+    def setUp(self) -> None:
+        self.site_packages = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.site_packages)
+        make_dist_info(self.site_packages, "app", "1.0", ("web", "db"))
+        make_dist_info(self.site_packages, "web", "2.0", ("core", "missing"))
+        make_dist_info(self.site_packages, "db", "3.0", ("core",))
+        make_dist_info(self.site_packages, "core", "1.0", ("six",))
+        make_dist_info(self.site_packages, "six", "1.16")
+        make_dist_info(self.site_packages, "tool", "1.0", ("core",))
+        self.graph = dependency_graph(paths=[self.site_packages])
+
+    def test_iter_tree(self) -> None:
+        self.assertEqual(
+            list(iter_tree(self.graph)),
+            [
+                "app==1.0",
+                "#   db==3.0",
+                "#     core==1.0",
+                "#       six==1.16",
+                "#   web==2.0",
+                "#     core==1.0 # See above",
+                "#     missing # Not installed",
+                "tool==1.0",
+                "#   core==1.0 # See above",
+            ],
+        )
+
+    def test_depth(self) -> None:
+        self.assertEqual(
+            list(iter_tree(self.graph, depth=0, no_version=True)),
+            ["app", "tool"],
+        )
+        # core is shown to a single level below app, then again, deeper,
+        # below tool.
+        self.assertEqual(
+            list(iter_tree(self.graph, depth=2)),
+            [
+                "app==1.0",
+                "#   db==3.0",
+                "#     core==1.0",
+                "#   web==2.0",
+                "#     core==1.0",
+                "#     missing # Not installed",
+                "tool==1.0",
+                "#   core==1.0",
+                "#     six==1.16",
+            ],
+        )
+
+    def test_cycles(self) -> None:
+        graph = DependencyGraph()
+        first = graph.add_distribution("first", "1.0")
+        second = graph.add_distribution("second", "1.0")
+        graph.add_edge(first, second)
+        graph.add_edge(second, first)
+        self.assertEqual(
+            list(iter_tree(graph)),
+            [
+                "first==1.0",
+                "#   second==1.0",
+                "#     first==1.0 # See above",
+                "second==1.0 # See above",
+            ],
+        )
+
+    def test_shared_subtrees(self) -> None:
+        # Two packages per layer, each requiring both of the next layer,
+        # make 2 ** 40 paths, but 160 edges.
+        graph = DependencyGraph()
+        layers = [
+            [
+                graph.add_distribution(f"layer-{layer}-{side}", "1.0")
+                for side in "ab"
+            ]
+            for layer in range(41)
+        ]
+        for upper, lower in zip(layers, layers[1:]):
+            for source in upper:
+                for target in lower:
+                    graph.add_edge(source, target)
+        lines = list(iter_tree(graph))
+        self.assertEqual(len(lines), graph.edge_count + 2)
+        self.assertEqual(len(list(iter_tree(graph, depth=5))), 5 * 4 + 2)
+
+    def test_command_line_interface(self) -> None:
+        result = os.popen(
+            f"pip_chill/cli.py --tree --depth 1 --path {self.site_packages}"
+        ).read()
+        self.assertEqual(
+            result.splitlines(),
+            [
+                "app==1.0",
+                "#   db==3.0",
+                "#   web==2.0",
+                "tool==1.0",
+                "#   core==1.0",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+"""
+test_versions
+----------------------------------
+
+Tests for `pip_chill.versions` module.
+"""
+
+import sys
+import unittest
+
+from pip_chill.versions import parse_specifier, parse_version, satisfies
+
+
+class TestVersions(unittest.TestCase):
+    def test_ordering(self) -> None:
+        ordered = [
+            "1.0.dev1",
+            "1.0a1",
+            "1.0b2",
+            "1.0rc1",
+            "1.0",
+            "1.0+local",
+            "1.0.post1.dev1",
+            "1.0.post1",
+            "1.1",
+            "1!0.1",
+        ]
+        versions = [parse_version(version) for version in ordered]
+        self.assertEqual(versions, sorted(versions))
+
+    def test_normalisation(self) -> None:
+        self.assertEqual(parse_version("1.0"), parse_version("1.0.0"))
+        self.assertEqual(str(parse_version("v1.0-ALPHA1")), "1.0a1")
+        self.assertEqual(str(parse_version("1.0-1")), "1.0.post1")
+
+    def test_invalid(self) -> None:
+        self.assertIsNone(parse_version("not a version"))
+        self.assertIsNone(parse_specifier("~=1"))
+        self.assertIsNone(parse_specifier(">=1.0.*"))
+        self.assertIsNone(parse_specifier("<1.0+local"))
+
+    def test_specifiers(self) -> None:
+        cases = [
+            (">=1.0", "1.0", True),
+            (">=1.0", "0.9", False),
+            ("<2", "2.0a1", False),
+            ("<2", "1.9", True),
+            (">1.0", "1.0.post1", False),
+            (">1.0", "1.1", True),
+            ("==1.*", "1.5.2", True),
+            ("==1.*", "2.0", False),
+            ("!=1.0", "1.0+local", False),
+            ("~=1.4.2", "1.4.9", True),
+            ("~=1.4.2", "1.5", False),
+            ("===1.0", "1.0", True),
+        ]
+        for specifier, version, expected in cases:
+            with self.subTest(specifier=specifier, version=version):
+                self.assertEqual(
+                    parse_specifier(specifier).contains(version), expected
+                )
+
+    def test_satisfies(self) -> None:
+        self.assertTrue(satisfies("1.5", ">=1.0, !=1.3,<2"))
+        self.assertFalse(satisfies("1.3", ">=1.0, !=1.3,<2"))
+        self.assertFalse(satisfies("2.0rc1", ">=1.0,<2"))
+        self.assertTrue(satisfies("1.0", ""))
+        # Invalid specifiers are left out.
+        self.assertTrue(satisfies("1.0", ">=1.0,>>2"))
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+"""
+test_wheelhouse
+----------------------------------
+
+Tests for `pip_chill.wheelhouse` module.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+
+from pip_chill import chill
+from pip_chill.wheelhouse import iter_wheelhouse, read_wheel
+from tests.helpers import make_wheel
+
+
+class TestWheelhouse(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        make_wheel(self.directory, "app", "1.0", ("lib>=1", "Other_Lib"))
+        make_wheel(self.directory, "lib", "1.0")
+        make_wheel(self.directory, "lib", "1.10", description="x" * 100000)
+        make_wheel(self.directory, "other-lib", "2.0")
+        make_wheel(self.directory, "tool", "3.0")
+
+    def test_read_wheel(self) -> None:
+        path = os.path.join(self.directory, "app-1.0-py3-none-any.whl")
+        record = read_wheel(path)
+        self.assertEqual(
+            (record.name, record.version, record.requires, record.path),
+            ("app", "1.0", ("lib>=1", "Other_Lib"), path),
+        )
+
+    def test_folded_headers(self) -> None:
+        path = os.path.join(self.directory, "odd-1.0-py3-none-any.whl")
+        with zipfile.ZipFile(path, "w") as wheel:
+            wheel.writestr(
+                "odd-1.0.dist-info/METADATA",
+                "Name: odd\nVersion: 1.0\nRequires-Dist: lib;\n"
+                ' python_version > "3"\n\n',
+            )
+        record = read_wheel(path)
+        self.assertEqual((record.name, record.version), ("odd", "1.0"))
+        self.assertEqual(len(record.requires), 1)
+
+    def test_broken_wheels_are_skipped(self) -> None:
+        with open(
+            os.path.join(self.directory, "broken-1.0-py3-none-any.whl"), "wb"
+        ) as broken:
+            broken.write(b"not a zip file")
+        for workers in (1, None):
+            self.assertEqual(
+                [
+                    (record.name, record.version)
+                    for record in iter_wheelhouse(self.directory, workers)
+                ],
+                [
+                    ("app", "1.0"),
+                    ("lib", "1.10"),
+                    ("other-lib", "2.0"),
+                    ("tool", "3.0"),
+                ],
+            )
+
+    def test_chill(self) -> None:
+        packages, dependencies = chill(
+            metadata=iter_wheelhouse(self.directory)
+        )
+        self.assertEqual(
+            [str(package) for package in packages], ["app==1.0", "tool==3.0"]
+        )
+        self.assertEqual(
+            [dependency.name for dependency in dependencies],
+            ["lib", "other-lib"],
+        )
+
+    def test_command_line_interface(self) -> None:
+        command = f"pip_chill/cli.py --wheelhouse {self.directory} -j 4"
+
+        result = os.popen(command).read()
+        self.assertEqual(result.splitlines(), ["app==1.0", "tool==3.0"])
+
+        # Fingerprints are computed from what is installed only.
+        self.assertEqual(
+            os.system(f"{command} --fingerprint 2> /dev/null"), 512
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())